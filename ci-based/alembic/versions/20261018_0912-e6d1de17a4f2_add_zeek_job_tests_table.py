@@ -0,0 +1,37 @@
+"""add zeek_job_tests table
+
+Revision ID: e6d1de17a4f2
+Revises: 311be9937d3e
+Create Date: 2026-10-18 09:12:31.402216
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e6d1de17a4f2"
+down_revision: str | None = "311be9937d3e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Information about a test within a job that isn't
+    # specific to individual runs.
+    op.create_table(
+        "zeek_job_tests",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("ts", sa.DateTime, server_default=sa.text("(STRFTIME('%s'))")),
+        sa.Column("job_id", sa.Text, nullable=False),
+        sa.Column("test_id", sa.Text, nullable=False),
+        sa.Column("container_setup_time", sa.Float, nullable=True),
+        sa.Column("container_teardown_time", sa.Float, nullable=True),
+        sa.UniqueConstraint("job_id", "test_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("zeek_job_tests")
@@ -0,0 +1,26 @@
+"""add cpu slot
+
+Revision ID: 5b8e3c0a9d71
+Revises: e6d1de17a4f2
+Create Date: 2026-10-18 10:04:12.531873
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8e3c0a9d71"
+down_revision: str | None = "e6d1de17a4f2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("zeek_tests", sa.Column("cpu_slot", sa.Text))
+
+
+def downgrade() -> None:
+    op.drop_column("zeek_tests", "cpu_slot")
@@ -0,0 +1,27 @@
+"""add machine cpu topology
+
+Revision ID: a41f6c2e8b37
+Revises: 5b8e3c0a9d71
+Create Date: 2026-10-18 10:47:55.118302
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a41f6c2e8b37"
+down_revision: str | None = "5b8e3c0a9d71"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # JSON list with an object per logical CPU.
+    op.add_column("machines", sa.Column("cpu_topology", sa.Text))
+
+
+def downgrade() -> None:
+    op.drop_column("machines", "cpu_topology")
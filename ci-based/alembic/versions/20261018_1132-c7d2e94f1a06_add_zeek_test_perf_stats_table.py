@@ -0,0 +1,42 @@
+"""add zeek_test_perf_stats table
+
+Revision ID: c7d2e94f1a06
+Revises: a41f6c2e8b37
+Create Date: 2026-10-18 11:32:08.640127
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d2e94f1a06"
+down_revision: str | None = "a41f6c2e8b37"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "zeek_test_perf_stats",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column(
+            "zeek_test_id",
+            sa.Integer,
+            sa.ForeignKey("zeek_tests.id"),
+            nullable=False,
+            index=True,
+        ),
+        sa.Column("instructions", sa.Integer, nullable=True),
+        sa.Column("cycles", sa.Integer, nullable=True),
+        sa.Column("branches", sa.Integer, nullable=True),
+        sa.Column("branch_misses", sa.Integer, nullable=True),
+        sa.Column("cache_misses", sa.Integer, nullable=True),
+        sa.Column("context_switches", sa.Integer, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("zeek_test_perf_stats")
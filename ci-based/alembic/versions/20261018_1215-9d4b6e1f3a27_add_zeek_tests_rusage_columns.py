@@ -0,0 +1,37 @@
+"""add zeek_tests rusage columns
+
+Revision ID: 9d4b6e1f3a27
+Revises: c7d2e94f1a06
+Create Date: 2026-10-18 12:15:41.208733
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9d4b6e1f3a27"
+down_revision: str | None = "c7d2e94f1a06"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+_COLUMNS = [
+    "minor_faults",
+    "major_faults",
+    "voluntary_ctx_switches",
+    "involuntary_ctx_switches",
+    "block_input",
+    "block_output",
+]
+
+
+def upgrade() -> None:
+    for name in _COLUMNS:
+        op.add_column("zeek_tests", sa.Column(name, sa.Integer, nullable=True))
+
+
+def downgrade() -> None:
+    for name in reversed(_COLUMNS):
+        op.drop_column("zeek_tests", name)
@@ -0,0 +1,32 @@
+"""add zeek_job_tests stop reason
+
+Revision ID: 4e8a1c7b2d95
+Revises: 9d4b6e1f3a27
+Create Date: 2026-10-18 13:02:17.553921
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4e8a1c7b2d95"
+down_revision: str | None = "9d4b6e1f3a27"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Number of runs executed for a test and why it stopped:
+    # fixed, converged or max_runs.
+    op.add_column("zeek_job_tests", sa.Column("run_count", sa.Integer))
+    op.add_column("zeek_job_tests", sa.Column("stop_reason", sa.Text))
+    op.add_column("zeek_job_tests", sa.Column("elapsed_rel_ci", sa.Float))
+
+
+def downgrade() -> None:
+    op.drop_column("zeek_job_tests", "elapsed_rel_ci")
+    op.drop_column("zeek_job_tests", "stop_reason")
+    op.drop_column("zeek_job_tests", "run_count")
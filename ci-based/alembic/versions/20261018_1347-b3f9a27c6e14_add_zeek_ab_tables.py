@@ -0,0 +1,50 @@
+"""add A/B job columns and zeek_ab_deltas table
+
+Revision ID: b3f9a27c6e14
+Revises: 4e8a1c7b2d95
+Create Date: 2026-10-18 13:47:52.918064
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b3f9a27c6e14"
+down_revision: str | None = "4e8a1c7b2d95"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("jobs", sa.Column("baseline_build_url", sa.Text))
+    op.add_column("jobs", sa.Column("baseline_build_hash", sa.Text))
+
+    # baseline or candidate for results of A/B jobs.
+    op.add_column("zeek_tests", sa.Column("variant", sa.Text))
+
+    # Per test difference between the candidate and the baseline of
+    # an A/B job, computed from pairs of interleaved runs.
+    op.create_table(
+        "zeek_ab_deltas",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("ts", sa.DateTime, server_default=sa.text("(STRFTIME('%s'))")),
+        sa.Column("job_id", sa.Text, nullable=False),
+        sa.Column("test_id", sa.Text, nullable=False),
+        sa.Column("pairs", sa.Integer, nullable=False),
+        sa.Column("baseline_mean", sa.Float, nullable=False),
+        sa.Column("candidate_mean", sa.Float, nullable=False),
+        sa.Column("delta", sa.Float, nullable=False),
+        sa.Column("delta_ci", sa.Float, nullable=False),
+        sa.Column("relative_delta", sa.Float, nullable=True),
+        sa.UniqueConstraint("job_id", "test_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("zeek_ab_deltas")
+    op.drop_column("zeek_tests", "variant")
+    op.drop_column("jobs", "baseline_build_hash")
+    op.drop_column("jobs", "baseline_build_url")
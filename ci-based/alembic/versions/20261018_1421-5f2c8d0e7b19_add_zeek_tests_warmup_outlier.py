@@ -0,0 +1,37 @@
+"""add zeek_tests warmup and outlier columns
+
+Revision ID: 5f2c8d0e7b19
+Revises: b3f9a27c6e14
+Create Date: 2026-10-18 14:21:06.375148
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5f2c8d0e7b19"
+down_revision: str | None = "b3f9a27c6e14"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Warmup runs are executed but not meant to be included in
+    # aggregations, same for outliers flagged after all runs of
+    # a test completed.
+    op.add_column(
+        "zeek_tests",
+        sa.Column("warmup", sa.Boolean, nullable=False, server_default=sa.false()),
+    )
+    op.add_column(
+        "zeek_tests",
+        sa.Column("outlier", sa.Boolean, nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("zeek_tests", "outlier")
+    op.drop_column("zeek_tests", "warmup")
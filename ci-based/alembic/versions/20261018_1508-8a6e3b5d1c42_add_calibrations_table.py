@@ -0,0 +1,53 @@
+"""add calibrations table
+
+Revision ID: 8a6e3b5d1c42
+Revises: 5f2c8d0e7b19
+Create Date: 2026-10-18 15:08:44.120371
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8a6e3b5d1c42"
+down_revision: str | None = "5f2c8d0e7b19"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Results of the calibration workload run at the start of a job.
+    op.create_table(
+        "calibrations",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("ts", sa.DateTime, server_default=sa.text("(STRFTIME('%s'))")),
+        sa.Column("job_id", sa.Text, nullable=False, index=True),
+        sa.Column(
+            "machine_id",
+            sa.Integer,
+            sa.ForeignKey("machines.id"),
+            nullable=False,
+        ),
+        sa.Column("cpu_slot", sa.Text, nullable=False),
+        sa.Column("cpu_time", sa.Float, nullable=False),
+        sa.Column("mem_time", sa.Float, nullable=False),
+        sa.Column("score", sa.Float, nullable=True),
+    )
+    op.create_index(
+        "ix_calibrations_machine_id_cpu_slot",
+        "calibrations",
+        ["machine_id", "cpu_slot"],
+    )
+
+    op.add_column("jobs", sa.Column("calibration_score", sa.Float))
+    op.add_column("jobs", sa.Column("calibration_drifted", sa.Boolean))
+
+
+def downgrade() -> None:
+    op.drop_column("jobs", "calibration_drifted")
+    op.drop_column("jobs", "calibration_score")
+    op.drop_index("ix_calibrations_machine_id_cpu_slot")
+    op.drop_table("calibrations")
@@ -0,0 +1,42 @@
+"""add zeek_test_profiles table
+
+Revision ID: 2c7e9f4a8b31
+Revises: 8a6e3b5d1c42
+Create Date: 2026-10-18 15:49:30.781442
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2c7e9f4a8b31"
+down_revision: str | None = "8a6e3b5d1c42"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Gzip compressed folded stacks of a profiled run.
+    op.create_table(
+        "zeek_test_profiles",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("ts", sa.DateTime, server_default=sa.text("(STRFTIME('%s'))")),
+        sa.Column("job_id", sa.Text, nullable=False),
+        sa.Column("test_id", sa.Text, nullable=False),
+        sa.Column("variant", sa.Text, nullable=True),
+        sa.Column("samples", sa.Integer, nullable=False),
+        sa.Column("folded_gz", sa.LargeBinary, nullable=False),
+    )
+    op.create_index(
+        "ix_zeek_test_profiles_job_id_test_id",
+        "zeek_test_profiles",
+        ["job_id", "test_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_zeek_test_profiles_job_id_test_id")
+    op.drop_table("zeek_test_profiles")
@@ -0,0 +1,46 @@
+"""add zeek_script_profiles table
+
+Revision ID: e1d5a9c3f707
+Revises: 2c7e9f4a8b31
+Create Date: 2026-10-18 16:26:13.509887
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1d5a9c3f707"
+down_revision: str | None = "2c7e9f4a8b31"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Entries of Zeek's script profiler for a script profiled run.
+    op.create_table(
+        "zeek_script_profiles",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("ts", sa.DateTime, server_default=sa.text("(STRFTIME('%s'))")),
+        sa.Column("job_id", sa.Text, nullable=False),
+        sa.Column("test_id", sa.Text, nullable=False),
+        sa.Column("variant", sa.Text, nullable=True),
+        sa.Column("function", sa.Text, nullable=False),
+        sa.Column("location", sa.Text, nullable=True),
+        sa.Column("kind", sa.Text, nullable=True),
+        sa.Column("calls", sa.Integer, nullable=False),
+        sa.Column("total_time", sa.Float, nullable=False),
+        sa.Column("self_time", sa.Float, nullable=True),
+    )
+    op.create_index(
+        "ix_zeek_script_profiles_job_id_test_id",
+        "zeek_script_profiles",
+        ["job_id", "test_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_zeek_script_profiles_job_id_test_id")
+    op.drop_table("zeek_script_profiles")
@@ -0,0 +1,63 @@
+"""add startup times and zeek_test_processing_times view
+
+Revision ID: 7b3d1f6e9a58
+Revises: e1d5a9c3f707
+Create Date: 2026-10-18 17:04:38.662015
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7b3d1f6e9a58"
+down_revision: str | None = "e1d5a9c3f707"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Medians of runs on an empty pcap with the test's pcap_args.
+    op.add_column("zeek_job_tests", sa.Column("startup_elapsed_time", sa.Float))
+    op.add_column("zeek_job_tests", sa.Column("startup_user_time", sa.Float))
+    op.add_column("zeek_job_tests", sa.Column("startup_system_time", sa.Float))
+    op.add_column("zeek_job_tests", sa.Column("startup_max_rss", sa.Float))
+
+    # Results with the startup cost subtracted. The processing
+    # columns are NULL for tests without startup times.
+    op.execute(
+        """
+        CREATE VIEW zeek_test_processing_times AS
+        SELECT t.id,
+               t.ts,
+               t.job_id,
+               t.test_id,
+               t.test_run,
+               t.variant,
+               t.warmup,
+               t.outlier,
+               t.success,
+               t.elapsed_time,
+               t.user_time,
+               t.system_time,
+               s.startup_elapsed_time,
+               s.startup_user_time,
+               s.startup_system_time,
+               t.elapsed_time - s.startup_elapsed_time AS processing_time,
+               t.user_time - s.startup_user_time AS processing_user_time,
+               t.system_time - s.startup_system_time AS processing_system_time
+          FROM zeek_tests t
+     LEFT JOIN zeek_job_tests s
+            ON t.job_id = s.job_id AND t.test_id = s.test_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW zeek_test_processing_times")
+    op.drop_column("zeek_job_tests", "startup_max_rss")
+    op.drop_column("zeek_job_tests", "startup_system_time")
+    op.drop_column("zeek_job_tests", "startup_user_time")
+    op.drop_column("zeek_job_tests", "startup_elapsed_time")
@@ -0,0 +1,45 @@
+"""add pcaps table and zeek_job_tests.pcap_sha256
+
+Revision ID: 3f8b2d6c1e40
+Revises: 7b3d1f6e9a58
+Create Date: 2026-10-18 17:52:11.204398
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8b2d6c1e40"
+down_revision: str | None = "7b3d1f6e9a58"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Metadata of test pcaps. A replaced pcap gets a new row for its
+    # sha256 so that older results keep their packet and byte counts.
+    op.create_table(
+        "pcaps",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("ts", sa.DateTime, server_default=sa.text("(STRFTIME('%s'))")),
+        sa.Column("filename", sa.Text, nullable=False),
+        sa.Column("sha256", sa.Text, nullable=False),
+        sa.Column("size", sa.Integer, nullable=False),
+        sa.Column("mtime_ns", sa.Integer, nullable=False),
+        sa.Column("packets", sa.Integer, nullable=False),
+        sa.Column("bytes", sa.Integer, nullable=False),
+        sa.Column("duration", sa.Float, nullable=False),
+        sa.Column("flows", sa.Integer, nullable=False),
+        sa.UniqueConstraint("filename", "sha256"),
+    )
+
+    # The pcap a job's test ran with.
+    op.add_column("zeek_job_tests", sa.Column("pcap_sha256", sa.Text))
+
+
+def downgrade() -> None:
+    op.drop_column("zeek_job_tests", "pcap_sha256")
+    op.drop_table("pcaps")
@@ -0,0 +1,44 @@
+"""add zeek_test_log_records table and zeek_ab_deltas.workload_changed
+
+Revision ID: a6c4e0b9d251
+Revises: 3f8b2d6c1e40
+Create Date: 2026-10-18 18:38:52.117830
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a6c4e0b9d251"
+down_revision: str | None = "3f8b2d6c1e40"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Number of records per log stream written by a run.
+    op.create_table(
+        "zeek_test_log_records",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column(
+            "zeek_test_id",
+            sa.Integer,
+            sa.ForeignKey("zeek_tests.id"),
+            nullable=False,
+            index=True,
+        ),
+        sa.Column("stream", sa.Text, nullable=False),
+        sa.Column("records", sa.Integer, nullable=False),
+    )
+
+    # Set if the median log record counts of baseline and
+    # candidate differ, NULL if they weren't counted.
+    op.add_column("zeek_ab_deltas", sa.Column("workload_changed", sa.Boolean))
+
+
+def downgrade() -> None:
+    op.drop_column("zeek_ab_deltas", "workload_changed")
+    op.drop_table("zeek_test_log_records")
@@ -0,0 +1,30 @@
+"""enable WAL journal mode
+
+Revision ID: d2b7f5a1c386
+Revises: a6c4e0b9d251
+Create Date: 2026-10-18 19:15:03.472913
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d2b7f5a1c386"
+down_revision: str | None = "a6c4e0b9d251"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # The journal mode is stored in the database file and can't be
+    # changed within a transaction. With WAL, readers like Grafana
+    # don't block the worker's writes and vice versa.
+    with op.get_context().autocommit_block():
+        op.execute("PRAGMA journal_mode=WAL")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("PRAGMA journal_mode=DELETE")
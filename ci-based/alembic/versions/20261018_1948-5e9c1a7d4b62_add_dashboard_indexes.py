@@ -0,0 +1,48 @@
+"""add indexes for dashboard and comparison queries
+
+Revision ID: 5e9c1a7d4b62
+Revises: d2b7f5a1c386
+Create Date: 2026-10-18 19:48:26.930174
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e9c1a7d4b62"
+down_revision: str | None = "d2b7f5a1c386"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Indexes matching the shapes of the dashboard queries, see
+# tools/query-benchmark.py for examples.
+INDEXES = [
+    # Time series of a test, on one branch or across branches.
+    ("ix_zeek_tests_test_id_branch_ts", "zeek_tests", ["test_id", "branch", "ts"]),
+    ("ix_zeek_tests_test_id_ts", "zeek_tests", ["test_id", "ts"]),
+    # Comparing commits and joining jobs on sha.
+    ("ix_zeek_tests_sha_test_id", "zeek_tests", ["sha", "test_id"]),
+    # Per job and test lookups. Supersedes ix_zeek_tests_job_id.
+    ("ix_zeek_tests_job_id_test_id", "zeek_tests", ["job_id", "test_id"]),
+    ("ix_jobs_branch_ts", "jobs", ["branch", "ts"]),
+    ("ix_jobs_sha", "jobs", ["sha"]),
+    ("ix_jobs_build_hash_ts", "jobs", ["build_hash", "ts"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+    op.drop_index("ix_zeek_tests_job_id", "zeek_tests")
+
+    # Give the query planner statistics about the new indexes.
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    op.create_index("ix_zeek_tests_job_id", "zeek_tests", ["job_id"])
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table)
@@ -0,0 +1,57 @@
+"""add zeek_test_summaries table
+
+Revision ID: 9a3f6d2e8c15
+Revises: 5e9c1a7d4b62
+Create Date: 2026-10-18 20:21:47.518264
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a3f6d2e8c15"
+down_revision: str | None = "5e9c1a7d4b62"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Statistics of a metric over the successful, non-warmup and
+    # non-outlier runs of a test within a job, one row per variant
+    # and metric. Populate for existing jobs with
+    # python -m zeek_benchmarker.cli backfill-summaries
+    op.create_table(
+        "zeek_test_summaries",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("ts", sa.DateTime, server_default=sa.text("(STRFTIME('%s'))")),
+        sa.Column("job_id", sa.Text, nullable=False),
+        sa.Column("test_id", sa.Text, nullable=False),
+        sa.Column("variant", sa.Text, nullable=True),
+        sa.Column("metric", sa.Text, nullable=False),
+        sa.Column("n", sa.Integer, nullable=False),
+        sa.Column("mean", sa.Float, nullable=False),
+        sa.Column("median", sa.Float, nullable=False),
+        sa.Column("stddev", sa.Float, nullable=True),
+        sa.Column("min", sa.Float, nullable=False),
+        sa.Column("max", sa.Float, nullable=False),
+        sa.Column("p95", sa.Float, nullable=False),
+    )
+    op.create_index(
+        "ix_zeek_test_summaries_job_id_test_id",
+        "zeek_test_summaries",
+        ["job_id", "test_id"],
+    )
+    op.create_index(
+        "ix_zeek_test_summaries_test_id_metric_ts",
+        "zeek_test_summaries",
+        ["test_id", "metric", "ts"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_zeek_test_summaries_test_id_metric_ts")
+    op.drop_index("ix_zeek_test_summaries_job_id_test_id")
+    op.drop_table("zeek_test_summaries")
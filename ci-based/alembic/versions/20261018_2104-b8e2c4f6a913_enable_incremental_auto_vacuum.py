@@ -0,0 +1,32 @@
+"""enable incremental auto_vacuum
+
+Revision ID: b8e2c4f6a913
+Revises: 9a3f6d2e8c15
+Create Date: 2026-10-18 21:04:12.806457
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e2c4f6a913"
+down_revision: str | None = "9a3f6d2e8c15"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Allows the retention command to return pages freed by deleted
+    # rows with PRAGMA incremental_vacuum. Switching an existing
+    # database requires a full VACUUM, which rewrites the file once.
+    with op.get_context().autocommit_block():
+        op.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        op.execute("VACUUM")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("PRAGMA auto_vacuum=NONE")
+        op.execute("VACUUM")
@@ -0,0 +1,32 @@
+"""add calibrations reference column
+
+Revision ID: c4a7e2d9f318
+Revises: b8e2c4f6a913
+Create Date: 2026-10-18 21:47:30.518204
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4a7e2d9f318"
+down_revision: str | None = "b8e2c4f6a913"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Calibrations making up the fixed reference of their machine and
+    # CPU slot. Existing calibrations aren't part of it, the next ones
+    # of every machine and slot form a new reference.
+    op.add_column(
+        "calibrations",
+        sa.Column("reference", sa.Boolean, nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("calibrations", "reference")
@@ -11,6 +11,7 @@ app = zeek_benchmarker.app.create_app(
         "HMAC_KEY": cfg["HMAC_KEY"],
         "ALLOWED_BUILD_URLS": cfg["ALLOWED_BUILD_URLS"],
         "DATABASE_FILE": cfg["DATABASE_FILE"],
+        "MACHINE_CACHE_TTL": cfg.machine_cache_ttl,
     }
 )
 
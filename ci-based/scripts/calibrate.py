@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Fixed CPU and memory workload for calibrating a benchmark machine.
+
+Neither the workload nor the interpreter running it (the one of the
+runner image) change between jobs, so changes of its runtime on the
+same CPUs point at the machine rather than at Zeek. The result is a
+single versioned key=value line with the best time of a few repetitions
+of each kernel in microseconds:
+
+    CALIBRATION=v=1;cpu_us=...;mem_us=...
+
+The process pins itself to the first CPU in ZEEKCPUS, if set.
+"""
+
+import os
+import sys
+import time
+
+VERSION = 1
+REPETITIONS = 5
+
+CPU_ITERATIONS = 2_000_000
+
+MEM_SIZE = 64 * 1024 * 1024
+MEM_STEPS = 1_000_000
+
+
+def cpu_kernel():
+    """
+    Integer arithmetic and branches on a 64bit LCG.
+    """
+    mask = (1 << 64) - 1
+    x, acc = 1, 0
+    for _ in range(CPU_ITERATIONS):
+        x = (x * 6364136223846793005 + 1442695040888963407) & mask
+        if x & 1:
+            acc ^= x >> 32
+        else:
+            acc += x & 0xFFFF
+
+    return acc
+
+
+def mem_kernel(buf: bytearray):
+    """
+    Pseudo-random reads and writes across a buffer much larger than
+    the caches.
+    """
+    size = len(buf)
+    idx = 0
+    for _ in range(MEM_STEPS):
+        idx = (idx * 1103515245 + 12345) % size
+        buf[idx] = (buf[idx] + 1) & 0xFF
+
+
+def best_of(func, *args) -> int:
+    best = None
+    for _ in range(REPETITIONS):
+        start = time.perf_counter_ns()
+        func(*args)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best // 1000
+
+
+def main() -> int:
+    cpus = os.environ.get("ZEEKCPUS")
+    if cpus:
+        os.sched_setaffinity(0, [int(cpus.split(",")[0].split("-")[0])])
+
+    cpu_us = best_of(cpu_kernel)
+
+    buf = bytearray(MEM_SIZE)
+    mem_us = best_of(mem_kernel, buf)
+
+    print(f"CALIBRATION=v={VERSION};cpu_us={cpu_us};mem_us={mem_us}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Count the records of every Zeek log in a directory.
+
+Reports the number of records per log stream, named after the log file,
+as a single versioned key=value line:
+
+    LOG_RECORDS=v=1;conn=1234;dns=56;weird=7
+
+Both the ASCII format, skipping its # header lines, and the JSON
+format with one record per line are supported.
+
+Usage: count-log-records.py [DIRECTORY]
+"""
+
+import os
+import sys
+
+VERSION = 1
+
+
+def count_records(path: str) -> int:
+    records = 0
+    with open(path, "rb") as fp:
+        for line in fp:
+            if line.strip() and not line.startswith(b"#"):
+                records += 1
+
+    return records
+
+
+def main() -> int:
+    directory = sys.argv[1] if len(sys.argv) > 1 else "."
+
+    values = [("v", VERSION)]
+    for filename in sorted(os.listdir(directory)):
+        stream, ext = os.path.splitext(filename)
+        if ext != ".log" or "=" in stream or ";" in stream:
+            continue
+
+        values.append((stream, count_records(os.path.join(directory, filename))))
+
+    print("LOG_RECORDS=" + ";".join(f"{k}={v}" for k, v in values))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,7 +17,17 @@ FLAMEGRAPH_PATH=""
 FLAMEGRAPH_PREFIX="benchmark"
 
 # Path to perf
-PERF_BINARY=/bin/perf
+PERF_BINARY=${PERF_BINARY:-/bin/perf}
+
+# Launcher reporting microsecond resolution rusage in parseable file mode.
+RUSAGE_LAUNCHER=${RUSAGE_LAUNCHER:-$(dirname "$0")/rusage-launcher.py}
+
+# Comma separated perf stat events for file mode, empty to disable.
+PERF_STAT_EVENTS=""
+
+# Run Zeek under perf record in file mode and output collapsed stacks.
+PERF_RECORD=0
+PERF_RECORD_FREQ=${PERF_RECORD_FREQ:-999}
 
 usage() {
     usage="\
@@ -56,6 +66,12 @@ Usage: $0 -b [zeek binary path] -d [data file path]
 			    benchmarker to calculate averages between
 			    multiple runs. It has no effect in any other
 			    modes.
+    --perf-stat EVENTS      Run Zeek under perf stat collecting the given comma
+                            separated events in file mode. The counters are
+                            output as PERF_STAT=<perf stat -x ';' line>.
+    --perf-record           Run Zeek under perf record in file mode. The sampled
+                            stacks are collapsed and output gzip compressed
+                            as a COLLAPSED_STACKS=... line.
 
     By default or when 'intf' is passed for the mode argument, the output will
     include CPU, memory, etc statistics from Zeek processing all of the data
@@ -64,7 +80,9 @@ Usage: $0 -b [zeek binary path] -d [data file path]
 
     When 'file' is passed for the mode (-m) argument, the output will include
     the runtime and maximum memory usage of Zeek when reading the data file
-    directly from disk.
+    directly from disk. With --parseable, the output is a BENCHMARK_RUSAGE
+    line with microsecond times, page faults, context switches and block
+    I/O as reported by rusage-launcher.py, if available.
 
     When 'flamegraph' is passed for the mode (-m) argument, this script will
     output two flamegraphs for the process runtime in svg format. The first
@@ -138,6 +156,14 @@ while (("$#")); do
             ZEEK_EXTRA_ARGS="${2}"
             shift 2
             ;;
+        --perf-stat)
+            PERF_STAT_EVENTS="${2}"
+            shift 2
+            ;;
+        --perf-record)
+            PERF_RECORD=1
+            shift 1
+            ;;
         -h | --help)
             usage
             ;;
@@ -238,11 +264,30 @@ elif [ "${MODE}" = "file" ]; then
 
     TIME_FILE=$(mktemp)
 
+    TIME_CMD=(/usr/bin/time -f "BENCHMARK_TIMING=%e;%M;%U;%S" -o $TIME_FILE)
+    if [ ${PARSEABLE} -eq 1 ] && [ -x "${RUSAGE_LAUNCHER}" ]; then
+        TIME_CMD=("${RUSAGE_LAUNCHER}" -o $TIME_FILE --)
+    fi
+
+    PERF_STAT_CMD=()
+    if [ -n "${PERF_STAT_EVENTS}" ]; then
+        PERF_STAT_FILE=$(mktemp)
+        PERF_STAT_CMD=(${PERF_BINARY} stat -x ';' -e "${PERF_STAT_EVENTS}" -o "${PERF_STAT_FILE}" --)
+    fi
+
+    PERF_RECORD_CMD=()
+    if [ ${PERF_RECORD} -eq 1 ]; then
+        PERF_RECORD_FILE=$(mktemp)
+        PERF_RECORD_CMD=(${PERF_BINARY} record --quiet -g -F ${PERF_RECORD_FREQ} -o "${PERF_RECORD_FILE}" --)
+    fi
+
     if [ ${QUIET} -eq 0 ]; then
         echo "####### Testing reading the file directly from disk #######"
         echo "Using CPU ${ZEEK_CPU} for zeek"
     fi
-    taskset --all-tasks --cpu-list $ZEEK_CPU /usr/bin/time -f "BENCHMARK_TIMING=%e;%M;%U;%S" -o $TIME_FILE $ZEEK_BUILD $ZEEK_ARGS -r $DATA_FILE
+    # The launcher wraps perf rather than the other way around, so that
+    # perf only counts and samples Zeek and not the launcher's interpreter.
+    taskset --all-tasks --cpu-list $ZEEK_CPU "${TIME_CMD[@]}" "${PERF_STAT_CMD[@]}" "${PERF_RECORD_CMD[@]}" $ZEEK_BUILD $ZEEK_ARGS -r $DATA_FILE
     TIME_PID=$!
     ZEEK_PID=$(ps -ef | awk -v timepid="${TIME_PID}" '{ if ($3 == timepid) { print $2 } }')
     renice -20 -p $ZEEK_PID >/dev/null
@@ -255,6 +300,21 @@ elif [ "${MODE}" = "file" ]; then
 
     rm $TIME_FILE
 
+    if [ -n "${PERF_STAT_EVENTS}" ]; then
+        grep -v -e '^#' -e '^$' $PERF_STAT_FILE | sed 's/^/PERF_STAT=/'
+        rm $PERF_STAT_FILE
+    fi
+
+    if [ ${PERF_RECORD} -eq 1 ]; then
+        DEMANGLE=cat
+        if command -v c++filt >/dev/null; then
+            DEMANGLE=c++filt
+        fi
+        ${PERF_BINARY} script -i $PERF_RECORD_FILE 2>/dev/null | ${DEMANGLE} |
+            python3 "$(dirname "$0")/stackcollapse-perf.py" --encode
+        rm $PERF_RECORD_FILE
+    fi
+
 elif [ "${MODE}" = "flamegraph" ]; then
 
     if [ ${QUIET} -eq 0 ]; then
@@ -11,13 +11,41 @@ if [ -n "${BENCH_COMMAND}" ] && [ -n "${BENCH_ARGS}" ]; then
     exit 1
 fi
 
+# With STARTUP_ONLY set, Zeek reads a pcap without any packets to
+# measure the cost of parsing scripts and zeek_init/zeek_done.
+if [ -n "${STARTUP_ONLY}" ]; then
+    DATA_FILE_NAME=startup-only-empty.pcap
+    # pcap global header only: little endian, version 2.4, snaplen 65535, ethernet.
+    printf '\xd4\xc3\xb2\xa1\x02\x00\x04\x00\x00\x00\x00\x00\x00\x00\x00\x00\xff\xff\x00\x00\x01\x00\x00\x00' \
+        >${TMPFS_PATH}/${DATA_FILE_NAME}
+fi
+
 if [ -z "${DATA_FILE_NAME}" ] || [ -z "${TMPFS_PATH}" ]; then
     echo "DATA_FILE_NAME or TMPFS_PATH not set" >&2
     exit 1
 fi
 
-cp /test_data/${DATA_FILE_NAME} ${TMPFS_PATH}/${DATA_FILE_NAME}
+# When runs are executed within the same container, the pcap
+# is already in tmpfs from the previous run.
+if [ ! -f ${TMPFS_PATH}/${DATA_FILE_NAME} ]; then
+    cp /test_data/${DATA_FILE_NAME} ${TMPFS_PATH}/${DATA_FILE_NAME}
+fi
+
+# With PERF_RECORD set, this is a profiled run collecting stacks.
+PERF_RECORD_ARGS=()
+if [ -n "${PERF_RECORD}" ]; then
+    PERF_RECORD_ARGS=(--perf-record)
+fi
+
 timeout --signal=SIGKILL 5m /benchmarker/scripts/perf-benchmark.sh --quiet --parseable --mode file \
     --seed ${ZEEKSEED} --build ${ZEEKBIN} --data-file ${TMPFS_PATH}/${DATA_FILE_NAME} \
     --cpus ${ZEEKCPUS} \
+    --perf-stat "${PERF_STAT_EVENTS}" \
+    "${PERF_RECORD_ARGS[@]}" \
     --zeek-extra-args "${PCAP_ARGS}"
+
+# With COUNT_LOG_RECORDS set, output the number of records per
+# log written by Zeek as LOG_RECORDS=...
+if [ -n "${COUNT_LOG_RECORDS:-}" ]; then
+    python3 /benchmarker/scripts/count-log-records.py ${RUN_PATH:-.}
+fi
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Run a command and report its resource usage with microsecond resolution.
+
+Replacement for /usr/bin/time -f 'BENCHMARK_TIMING=...' whose times have
+a resolution of 10ms. The command is spawned and reaped with wait4(), the
+rusage is written as a single versioned key=value line:
+
+    BENCHMARK_RUSAGE=v=1;elapsed_us=...;user_us=...;sys_us=...;...
+
+Times are in microseconds and max_rss_kb in KB. The exit status of the
+command is passed through, or 128 + signal number if it was killed.
+
+Usage: rusage-launcher.py [-o FILE] -- command [args...]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+VERSION = 1
+
+
+def format_rusage(elapsed_ns: int, ru) -> str:
+    values = [
+        ("v", VERSION),
+        ("elapsed_us", elapsed_ns // 1000),
+        ("user_us", round(ru.ru_utime * 1_000_000)),
+        ("sys_us", round(ru.ru_stime * 1_000_000)),
+        ("max_rss_kb", ru.ru_maxrss),
+        ("minflt", ru.ru_minflt),
+        ("majflt", ru.ru_majflt),
+        ("nvcsw", ru.ru_nvcsw),
+        ("nivcsw", ru.ru_nivcsw),
+        ("inblock", ru.ru_inblock),
+        ("oublock", ru.ru_oublock),
+    ]
+    return "BENCHMARK_RUSAGE=" + ";".join(f"{k}={v}" for k, v in values)
+
+
+def main() -> int:
+    p = argparse.ArgumentParser()
+    p.add_argument("-o", "--output", default="/dev/stdout")
+    p.add_argument("command", nargs=argparse.REMAINDER)
+    args = p.parse_args()
+
+    command = args.command
+    if command and command[0] == "--":
+        command = command[1:]
+
+    if not command:
+        p.error("missing command")
+
+    start = time.monotonic_ns()
+    pid = os.posix_spawnp(command[0], command, os.environ)
+    _, status, ru = os.wait4(pid, 0)
+    elapsed_ns = time.monotonic_ns() - start
+
+    with open(args.output, "w") as fp:
+        fp.write(format_rusage(elapsed_ns, ru) + "\n")
+
+    if os.WIFSIGNALED(status):
+        return 128 + os.WTERMSIG(status)
+
+    return os.waitstatus_to_exitcode(status)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Collapse `perf script` output read from stdin into folded stacks,
+one line per distinct stack with its sample count:
+
+    zeek;main;run_loop;...;leaf_function 42
+
+This is a reduced version of FlameGraph's stackcollapse-perf.pl that
+doesn't need perl in the runner image. With --encode, the folded stacks
+are gzip compressed and output as a single versioned line:
+
+    COLLAPSED_STACKS=v=1;samples=...;gzip_b64=...
+"""
+
+import argparse
+import base64
+import collections
+import gzip
+import os
+import re
+import sys
+
+VERSION = 1
+
+# "\t    55d4c0a1b2c3 zeek::Foo::Bar(int)+0x1c (/usr/local/zeek/bin/zeek)"
+_FRAME_RE = re.compile(r"^\s*[0-9a-f]+\s+(?P<sym>.*?)\s+\((?P<dso>[^)]*)\)\s*$")
+_OFFSET_RE = re.compile(r"\+0x[0-9a-f]+$")
+
+
+def frame_name(line: str) -> str | None:
+    m = _FRAME_RE.match(line)
+    if not m:
+        return None
+
+    sym = _OFFSET_RE.sub("", m.group("sym"))
+    if sym == "[unknown]":
+        sym = f"[{os.path.basename(m.group('dso'))}]"
+
+    # Semicolons separate frames in the folded format.
+    return sym.replace(";", ":")
+
+
+def collapse(lines) -> collections.Counter:
+    stacks: collections.Counter = collections.Counter()
+    comm, frames = None, []
+
+    def flush():
+        if comm is not None:
+            stacks[";".join([comm] + list(reversed(frames)))] += 1
+
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            flush()
+            comm, frames = None, []
+        elif line[0].isspace():
+            name = frame_name(line)
+            if name is not None:
+                frames.append(name)
+        elif not line.startswith("#"):
+            # Sample header: "zeek 12345 1234.5678: 1001001 cycles:u:"
+            comm = line.split()[0]
+
+    flush()
+    return stacks
+
+
+def main() -> int:
+    p = argparse.ArgumentParser()
+    p.add_argument("--encode", action="store_true")
+    args = p.parse_args()
+
+    stacks = collapse(sys.stdin)
+    folded = "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+    if not args.encode:
+        sys.stdout.write(folded)
+        return 0
+
+    data = base64.b64encode(gzip.compress(folded.encode())).decode()
+    samples = sum(stacks.values())
+    print(f"COLLAPSED_STACKS=v={VERSION};samples={samples};gzip_b64={data}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,8 +12,74 @@ KILL_TIMEOUT=${KILL_TIMEOUT:-300}
 orig_zeekpath=$(${ZEEKCONFIG} --zeekpath)
 export ZEEKPATH="${orig_zeekpath}:$(dirname $0)"
 
-exec timeout --signal=SIGKILL ${KILL_TIMEOUT} \
+# With PERF_STAT_EVENTS set, run Zeek under perf stat and output
+# the counters as PERF_STAT=<perf stat -x ';' line>.
+PERF_BINARY=${PERF_BINARY:-/bin/perf}
+PERF_STAT_EVENTS=${PERF_STAT_EVENTS:-}
+PERF_STAT_CMD=()
+if [ -n "${PERF_STAT_EVENTS}" ]; then
+    PERF_STAT_FILE=$(mktemp)
+    PERF_STAT_CMD=(${PERF_BINARY} stat -x ';' -e "${PERF_STAT_EVENTS}" -o "${PERF_STAT_FILE}" --)
+fi
+
+# With PERF_RECORD set, run Zeek under perf record and output the
+# collapsed stacks as COLLAPSED_STACKS=...
+PERF_RECORD=${PERF_RECORD:-}
+PERF_RECORD_CMD=()
+if [ -n "${PERF_RECORD}" ]; then
+    PERF_RECORD_FILE=$(mktemp)
+    PERF_RECORD_CMD=(${PERF_BINARY} record --quiet -g -F ${PERF_RECORD_FREQ:-999} -o "${PERF_RECORD_FILE}" --)
+fi
+
+# With SCRIPT_PROFILE set, run Zeek's script profiler and output
+# its lines as SCRIPT_PROFILE=<line>.
+SCRIPT_PROFILE=${SCRIPT_PROFILE:-}
+SCRIPT_PROFILE_ARGS=()
+if [ -n "${SCRIPT_PROFILE}" ]; then
+    SCRIPT_PROFILE_FILE=$(mktemp)
+    SCRIPT_PROFILE_ARGS=(--profile-scripts=${SCRIPT_PROFILE_FILE})
+fi
+
+# Report rusage with microsecond resolution as BENCHMARK_RUSAGE=...
+# if the launcher is available, else fall back to GNU time. It runs
+# outside of perf so that perf only counts and samples Zeek.
+RUSAGE_LAUNCHER=${RUSAGE_LAUNCHER:-$(dirname $0)/rusage-launcher.py}
+TIME_CMD=(/usr/bin/time -o /dev/stdout -f 'BENCHMARK_TIMING=%e;%M;%U;%S')
+if [ -x "${RUSAGE_LAUNCHER}" ]; then
+    TIME_CMD=("${RUSAGE_LAUNCHER}" --)
+fi
+
+timeout --signal=SIGKILL ${KILL_TIMEOUT} \
     nice -n ${NICE_ADJUSTMENT} \
     /usr/bin/taskset --cpu-list ${ZEEKCPUS} \
-    /usr/bin/time -o /dev/stdout -f 'BENCHMARK_TIMING=%e;%M;%U;%S' \
-    ${ZEEKBIN} $*
+    "${TIME_CMD[@]}" \
+    "${PERF_STAT_CMD[@]}" \
+    "${PERF_RECORD_CMD[@]}" \
+    ${ZEEKBIN} "${SCRIPT_PROFILE_ARGS[@]}" $*
+
+if [ -n "${PERF_STAT_EVENTS}" ]; then
+    grep -v -e '^#' -e '^$' ${PERF_STAT_FILE} | sed 's/^/PERF_STAT=/'
+    rm ${PERF_STAT_FILE}
+fi
+
+if [ -n "${PERF_RECORD}" ]; then
+    # Demangle like perf-benchmark.sh so profiles of both are comparable.
+    DEMANGLE=cat
+    if command -v c++filt >/dev/null; then
+        DEMANGLE=c++filt
+    fi
+    ${PERF_BINARY} script -i ${PERF_RECORD_FILE} 2>/dev/null | ${DEMANGLE} |
+        python3 $(dirname $0)/stackcollapse-perf.py --encode
+    rm ${PERF_RECORD_FILE}
+fi
+
+if [ -n "${SCRIPT_PROFILE}" ]; then
+    sed 's/^/SCRIPT_PROFILE=/' ${SCRIPT_PROFILE_FILE}
+    rm ${SCRIPT_PROFILE_FILE}
+fi
+
+# With COUNT_LOG_RECORDS set, output the number of records per
+# log written by Zeek as LOG_RECORDS=...
+if [ -n "${COUNT_LOG_RECORDS:-}" ]; then
+    python3 $(dirname $0)/count-log-records.py ${RUN_PATH:-.}
+fi
@@ -4,7 +4,8 @@ import time
 import unittest
 from unittest import mock
 
-from zeek_benchmarker.app import create_app, is_valid_branch_name
+from zeek_benchmarker import storage
+from zeek_benchmarker.app import MachineCache, create_app, is_valid_branch_name
 from zeek_benchmarker.models import Job, Machine
 from zeek_benchmarker.testing import TestWithDatabase
 
@@ -192,6 +193,167 @@ class TestApi(TestWithDatabase):
         self.assertEqual(400, r.status_code)
         self.assertIn("Missing or invalid branch", r.text)
 
+    def test_zeek_ab_baseline_lookup(self, enqueue_job_mock, get_machine_mock):
+        enqueue_job_mock.return_value = self.enqueue_job_result_mock
+        baseline_hash = "a" * 64
+        self.storage.store_job(
+            job_id="baseline-job-id",
+            kind="zeek",
+            machine_id=1,
+            req_vals={
+                "build_url": "http://localhost:8080/baseline.tgz",
+                "build_hash": baseline_hash,
+                "commit": "baseline-commit",
+                "branch": "release/7.0",
+                "original_branch": "master",
+            }
+            | dict.fromkeys(
+                [
+                    "cirrus_repo_owner",
+                    "cirrus_repo_name",
+                    "cirrus_task_id",
+                    "cirrus_task_name",
+                    "cirrus_build_id",
+                    "cirrus_pr",
+                    "github_check_suite_id",
+                    "repo_version",
+                ]
+            ),
+        )
+
+        r = self._test_client.post(
+            "/zeek-ab",
+            query_string={
+                "branch": "test-branch",
+                "build": "http://localhost:8080/build.tgz",
+                "build_hash": self._test_build_hash,
+                "baseline_build_hash": baseline_hash,
+                "baseline_commit": "baseline-commit",
+            },
+            headers={
+                "Zeek-HMAC": self.hmac_digest(
+                    "/zeek-ab",
+                    self._test_ts,
+                    f"{self._test_build_hash}-{baseline_hash}",
+                ),
+                "Zeek-HMAC-Timestamp": self._test_ts,
+            },
+        )
+        self.assertEqual(200, r.status_code, r.text)
+
+        req_vals = enqueue_job_mock.call_args[0][1]
+        self.assertEqual(
+            "http://localhost:8080/baseline.tgz", req_vals["baseline_build_url"]
+        )
+        self.assertEqual(baseline_hash, req_vals["baseline_build_hash"])
+        self.assertEqual("baseline-commit", req_vals["baseline_commit"])
+        self.assertEqual("release/7.0", req_vals["baseline_branch"])
+        self.assertEqual("release70", req_vals["baseline_original_branch"])
+
+        with self.storage.Session() as session:
+            job = session.query(Job).filter(Job.id == "test-job-id").one()
+            self.assertEqual("zeek-ab", job.kind)
+            self.assertEqual(baseline_hash, job.baseline_build_hash)
+
+    def test_zeek_ab_unknown_baseline(self, enqueue_job_mock, get_machine_mock):
+        baseline_hash = "b" * 64
+        r = self._test_client.post(
+            "/zeek-ab",
+            query_string={
+                "branch": "test-branch",
+                "build": "http://localhost:8080/build.tgz",
+                "build_hash": self._test_build_hash,
+                "baseline_build_hash": baseline_hash,
+                "baseline_commit": "baseline-commit",
+            },
+            headers={
+                "Zeek-HMAC": self.hmac_digest(
+                    "/zeek-ab",
+                    self._test_ts,
+                    f"{self._test_build_hash}-{baseline_hash}",
+                ),
+                "Zeek-HMAC-Timestamp": self._test_ts,
+            },
+        )
+        self.assertEqual(400, r.status_code)
+        self.assertIn("Unknown baseline build hash", r.text)
+        enqueue_job_mock.assert_not_called()
+
+    def test_zeek_ab_missing_baseline_commit(self, enqueue_job_mock, get_machine_mock):
+        baseline_hash = "b" * 64
+        r = self._test_client.post(
+            "/zeek-ab",
+            query_string={
+                "branch": "test-branch",
+                "build": "http://localhost:8080/build.tgz",
+                "build_hash": self._test_build_hash,
+                "baseline_build": "http://localhost:8080/baseline.tgz",
+                "baseline_build_hash": baseline_hash,
+                "baseline_branch": "master",
+            },
+            headers={
+                "Zeek-HMAC": self.hmac_digest(
+                    "/zeek-ab",
+                    self._test_ts,
+                    f"{self._test_build_hash}-{baseline_hash}",
+                ),
+                "Zeek-HMAC-Timestamp": self._test_ts,
+            },
+        )
+        self.assertEqual(400, r.status_code)
+        self.assertIn("Baseline commit argument required", r.text)
+        enqueue_job_mock.assert_not_called()
+
+    def test_zeek_ab_unsigned_baseline(self, enqueue_job_mock, get_machine_mock):
+        r = self._test_client.post(
+            "/zeek-ab",
+            query_string={
+                "branch": "test-branch",
+                "build": "http://localhost:8080/build.tgz",
+                "build_hash": self._test_build_hash,
+                "baseline_build": "http://localhost:8080/baseline.tgz",
+                "baseline_build_hash": "c" * 64,
+            },
+            headers={
+                "Zeek-HMAC": self.hmac_digest(
+                    "/zeek-ab", self._test_ts, self._test_build_hash
+                ),
+                "Zeek-HMAC-Timestamp": self._test_ts,
+            },
+        )
+        self.assertEqual(403, r.status_code)
+        enqueue_job_mock.assert_not_called()
+
+    def test_zeek_processing_times(self, enqueue_job_mock, get_machine_mock):
+        r = self._test_client.get("/zeek/test-job-id/processing-times")
+        self.assertEqual(200, r.status_code)
+        self.assertEqual({"job": {"id": "test-job-id"}, "tests": []}, r.json)
+
+
+@mock.patch("zeek_benchmarker.machine.get_machine", side_effect=make_test_machine)
+class TestMachineCache(TestWithDatabase):
+    def setUp(self):
+        super().setUp()
+        self.store = storage.Storage(self.database_file.name)
+
+    def test_get_id(self, get_machine_mock):
+        cache = MachineCache(ttl=3600)
+        machine_id = cache.get_id(self.store)
+        self.assertEqual(machine_id, cache.get_id(self.store))
+        self.assertEqual(1, get_machine_mock.call_count)
+
+        cache.invalidate()
+        self.assertEqual(machine_id, cache.get_id(self.store))
+        self.assertEqual(2, get_machine_mock.call_count)
+
+    def test_ttl(self, get_machine_mock):
+        cache = MachineCache(ttl=0)
+        cache.get_id(self.store)
+        with mock.patch("time.monotonic", return_value=time.monotonic() + 1):
+            cache.get_id(self.store)
+
+        self.assertEqual(2, get_machine_mock.call_count)
+
 
 class TestBranchName(unittest.TestCase):
     def test_good(self):
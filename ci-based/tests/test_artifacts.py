@@ -0,0 +1,59 @@
+import os
+import pathlib
+import tempfile
+import unittest
+
+from zeek_benchmarker.artifacts import ArtifactCache
+
+
+def sha(c: str) -> str:
+    return c * 64
+
+
+class TestArtifactCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmpdir.name)
+        self.cache = ArtifactCache(self.path / "cache", max_bytes=130)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_file(self, name: str, size: int) -> pathlib.Path:
+        p = self.path / name
+        p.write_bytes(b"x" * size)
+        return p
+
+    def test_get_miss(self):
+        self.assertFalse(self.cache.get(sha("a"), self.path / "dest"))
+        self.assertFalse((self.path / "dest").exists())
+
+    def test_put_get(self):
+        src = self.make_file("build.tgz", 10)
+        self.cache.put(sha("a"), src)
+
+        dest = self.path / "dest.tgz"
+        self.assertTrue(self.cache.get(sha("a"), dest))
+        self.assertEqual(b"x" * 10, dest.read_bytes())
+
+    def test_invalid_sha256(self):
+        with self.assertRaises(ValueError):
+            self.cache.get("../../etc/passwd", self.path / "dest")
+
+    def test_put_too_large(self):
+        src = self.make_file("build.tgz", 131)
+        self.cache.put(sha("a"), src)
+        self.assertEqual([], self.cache.entries())
+
+    def test_evict_lru(self):
+        for i, c in enumerate("abc"):
+            self.cache.put(sha(c), self.make_file(f"{c}.tgz", 40))
+            entry = self.cache.entry_path(sha(c))
+            os.utime(entry, (1000 + i, 1000 + i))
+
+        # Using "a" makes "b" the least recently used entry.
+        self.assertTrue(self.cache.get(sha("a"), self.path / "dest"))
+        self.cache.put(sha("d"), self.make_file("d.tgz", 40))
+
+        names = sorted(p.name for p, _ in self.cache.entries())
+        self.assertEqual([sha("a"), sha("c"), sha("d")], names)
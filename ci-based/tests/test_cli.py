@@ -0,0 +1,28 @@
+import os
+import sqlite3
+import tempfile
+
+from zeek_benchmarker import cli, testing
+
+
+class TestSnapshot(testing.TestWithDatabase):
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, "snapshot.db")
+            rc = cli.main(["--database", self.database_file.name, "snapshot", dest])
+            self.assertEqual(0, rc)
+
+            with sqlite3.connect(dest) as conn:
+                tables = {r[0] for r in conn.execute("select name from sqlite_master")}
+                self.assertIn("zeek_tests", tables)
+
+
+class TestRetention(testing.TestWithDatabase):
+    def test_dry_run(self):
+        argv = ["--database", self.database_file.name, "retention", "--dry-run"]
+        with self.assertLogs("zeek_benchmarker.cli", "INFO") as cm:
+            self.assertEqual(0, cli.main(argv + ["--days", "30"]))
+
+        self.assertIn(
+            "Would roll up 0 runs of 0 tests older than 30 days", cm.output[0]
+        )
@@ -0,0 +1,17 @@
+import unittest
+
+from zeek_benchmarker.config import Config
+
+
+class TestConfig(unittest.TestCase):
+    def test_cpu_slots_flat(self):
+        cfg = Config({"CPU_SET": [1, 2]})
+        self.assertEqual([[1, 2]], cfg.cpu_slots)
+        self.assertEqual([1, 2], cfg.cpu_set)
+        self.assertEqual("1,2", cfg.zeek_cpus)
+
+    def test_cpu_slots_nested(self):
+        cfg = Config({"CPU_SET": [[1, 2], [3, 4]]})
+        self.assertEqual([[1, 2], [3, 4]], cfg.cpu_slots)
+        self.assertEqual([1, 2, 3, 4], cfg.cpu_set)
+        self.assertEqual("1,2", cfg.zeek_cpus)
@@ -0,0 +1,122 @@
+import datetime
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from zeek_benchmarker import export, storage, testing
+from zeek_benchmarker.tasks import ZeekJob, ZeekTest, ZeekTestResult
+
+
+class TestExport(testing.TestWithDatabase):
+    def setUp(self):
+        super().setUp()
+        self.store = storage.Storage(self.database_file.name)
+        job = ZeekJob(
+            job_id="test_job_id",
+            build_url="test_build_url",
+            build_hash="test_build_hash",
+            original_branch="master",
+            normalized_branch="master",
+            commit="test_commit",
+        )
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=1.12;42;1.10;0.02")
+        for test_id in ["test-a", "test-b", "test-a"]:
+            self.store.store_zeek_result(
+                job=job, test=ZeekTest(test_id=test_id, runs=1), result=result
+            )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            # 2023-09-30 and 2023-10-01 UTC
+            conn.execute("UPDATE zeek_tests SET ts = 1696032000 WHERE id = 1")
+            conn.execute("UPDATE zeek_tests SET ts = 1696118400 WHERE id > 1")
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dest = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def test_read_batches(self):
+        with sqlite3.connect(self.database_file.name) as conn:
+            batches = list(export.read_batches(conn, 0, 2))
+            self.assertEqual([2, 1], [len(b) for b in batches])
+            self.assertEqual("test-a", batches[0][0][0])
+            self.assertEqual(1, batches[0][0][1])
+            self.assertEqual(len(export.COLUMNS) + 1, len(batches[0][0]))
+
+            self.assertEqual([], list(export.read_batches(conn, 3, 2)))
+
+    def test_partitions(self):
+        with sqlite3.connect(self.database_file.name) as conn:
+            (rows,) = export.read_batches(conn, 0, 10)
+
+        parts = export.partitions(rows)
+        self.assertEqual(
+            [("2023-09", "test-a"), ("2023-10", "test-b"), ("2023-10", "test-a")],
+            list(parts),
+        )
+        # The partition key test_id isn't part of the rows.
+        self.assertEqual(3, parts[("2023-10", "test-a")][0][0])
+
+    def test_to_columns(self):
+        with sqlite3.connect(self.database_file.name) as conn:
+            (rows,) = export.read_batches(conn, 0, 10)
+
+        columns = export.to_columns(export.partitions(rows)[("2023-10", "test-a")])
+        self.assertEqual([3], columns["id"])
+        self.assertEqual(
+            [datetime.datetime(2023, 10, 1, tzinfo=datetime.timezone.utc)],
+            columns["ts"],
+        )
+        self.assertEqual([True], columns["success"])
+        self.assertEqual([False], columns["warmup"])
+        self.assertEqual([1.12], columns["elapsed_time"])
+
+    def test_partition_dir(self):
+        self.assertEqual(
+            os.path.join("d", "month=2023-10", "test_id=micro%2Fa"),
+            export.partition_dir("d", "2023-10", "micro/a"),
+        )
+
+    def test_state(self):
+        self.assertEqual(0, export.read_state(self.dest))
+        export.write_state(self.dest, 42)
+        self.assertEqual(42, export.read_state(self.dest))
+
+    def test_export_arrow(self):
+        import pyarrow.dataset as ds
+
+        result = export.export(self.database_file.name, self.dest, fmt="arrow")
+        self.assertEqual((3, 3, 3), result)
+
+        table = ds.dataset(self.dest, format="arrow", partitioning="hive").to_table()
+        self.assertEqual(3, table.num_rows)
+
+    def test_export_without_pyarrow(self):
+        with mock.patch.object(export, "pa", None):
+            with self.assertRaisesRegex(export.Error, "requires pyarrow"):
+                export.export(self.database_file.name, self.dest)
+
+    def test_export(self):
+        # pyarrow is in requirements-dev.txt, so this doesn't skip.
+        import pyarrow.dataset as ds
+
+        result = export.export(self.database_file.name, self.dest, batch_size=2)
+        self.assertEqual((3, 3, 3), result)
+        self.assertEqual(3, export.read_state(self.dest))
+
+        table = ds.dataset(self.dest, format="parquet", partitioning="hive").to_table()
+        self.assertEqual(3, table.num_rows)
+        for field in export.schema():
+            self.assertEqual(field.type, table.schema.field(field.name).type)
+        self.assertEqual([True] * 3, table.column("success").to_pylist())
+        self.assertEqual(
+            ["test-a", "test-a", "test-b"],
+            sorted(table.column("test_id").to_pylist()),
+        )
+
+        # Nothing new to export.
+        result = export.export(self.database_file.name, self.dest)
+        self.assertEqual((0, 0, 3), result)
@@ -0,0 +1,104 @@
+import pathlib
+import tempfile
+import unittest
+
+from zeek_benchmarker import machine
+
+
+def make_cpu(cpu, core_id, package_id=0, siblings=None, l3=None):
+    return machine.CpuInfo(
+        cpu=cpu,
+        core_id=core_id,
+        package_id=package_id,
+        node=package_id,
+        thread_siblings=tuple(siblings or [cpu]),
+        l3_cpus=tuple(l3) if l3 is not None else (cpu,),
+    )
+
+
+# Two packages with four cores each and two threads per core. CPU n
+# and n + 8 are SMT siblings. Package 0 has CPUs 0-3 and 8-11.
+def make_topology():
+    topology = []
+    for cpu in range(16):
+        core = cpu % 8
+        package = core // 4
+        l3 = [c for c in range(16) if (c % 8) // 4 == package]
+        topology.append(make_cpu(cpu, core, package, [core, core + 8], l3))
+    return topology
+
+
+class TestCpuTopology(unittest.TestCase):
+    def test_parse_cpu_list(self):
+        self.assertEqual(
+            [0, 1, 2, 3, 8, 10, 11], machine.parse_cpu_list("0-3,8,10-11\n")
+        )
+
+    def get_cpu_topology(self, l3: bool = True) -> list[machine.CpuInfo]:
+        """
+        Two SMT siblings in /sys, with or without L3 cache information.
+        """
+        with tempfile.TemporaryDirectory() as d:
+            cpu_path = pathlib.Path(d) / "cpu"
+            node_path = pathlib.Path(d) / "node"
+            cpu_path.mkdir()
+            (cpu_path / "online").write_text("0-1\n")
+            (node_path / "node0").mkdir(parents=True)
+            (node_path / "node0" / "cpulist").write_text("0-1\n")
+            for cpu in [0, 1]:
+                topology = cpu_path / f"cpu{cpu}" / "topology"
+                topology.mkdir(parents=True)
+                (topology / "core_id").write_text("0\n")
+                (topology / "physical_package_id").write_text("0\n")
+                (topology / "thread_siblings_list").write_text("0-1\n")
+                if l3:
+                    index3 = cpu_path / f"cpu{cpu}" / "cache" / "index3"
+                    index3.mkdir(parents=True)
+                    (index3 / "level").write_text("3\n")
+                    (index3 / "shared_cpu_list").write_text("0-1\n")
+
+            return machine.get_cpu_topology(cpu_path, node_path)
+
+    def test_get_cpu_topology(self):
+        result = self.get_cpu_topology()
+        self.assertEqual(2, len(result))
+        self.assertEqual((0, 1), result[1].thread_siblings)
+        self.assertEqual((0, 1), result[1].l3_cpus)
+        self.assertEqual((0, 0), result[1].core)
+
+    def test_get_cpu_topology_no_cache(self):
+        result = self.get_cpu_topology(l3=False)
+        self.assertEqual(2, len(result))
+        self.assertEqual((), result[1].l3_cpus)
+
+    def test_get_cpu_topology_missing(self):
+        self.assertEqual([], machine.get_cpu_topology(pathlib.Path("/nonexistent")))
+
+    def test_select_cpu_slots(self):
+        slots = machine.select_cpu_slots(make_topology(), list(range(16)), 2)
+        # One thread per core, never crossing packages.
+        self.assertEqual([[0, 1], [2, 3], [4, 5], [6, 7]], slots)
+
+    def test_select_cpu_slots_prefers_quiet_l3(self):
+        # Package 1 has fewer CPUs outside of the given ones.
+        cpus = [2, 3, 4, 5, 6, 7, 12, 13, 14, 15]
+        slots = machine.select_cpu_slots(make_topology(), cpus, 2)
+        self.assertEqual([[4, 5], [6, 7], [2, 3]], slots)
+
+    def test_select_cpu_slots_no_l3(self):
+        # Without L3 information, slots are formed per package and node.
+        topology = [c._replace(l3_cpus=()) for c in make_topology()]
+        slots = machine.select_cpu_slots(topology, list(range(16)), 2)
+        self.assertEqual([[0, 1], [2, 3], [4, 5], [6, 7]], slots)
+
+    def test_check_cpu_slots(self):
+        problems = machine.check_cpu_slots(make_topology(), [[0, 8], [3, 4]])
+        self.assertTrue(any("SMT siblings" in p for p in problems))
+        self.assertTrue(any("spans packages" in p for p in problems))
+
+    def test_check_cpu_slots_good(self):
+        topology = make_topology()
+        problems = machine.check_cpu_slots(topology, [[0, 1], [2, 3]])
+        # Siblings 8-11 are idle but could be busy with other work.
+        self.assertEqual(4, len(problems))
+        self.assertFalse(any("another slot" in p for p in problems))
@@ -0,0 +1,114 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+from zeek_benchmarker import pcaps, testing
+
+
+def ipv4_tcp(src: bytes, dst: bytes, sport: int, dport: int) -> bytes:
+    ip = bytes([0x45, 0]) + struct.pack(">H", 40) + bytes(4)
+    ip += bytes([64, 6]) + bytes(2) + src + dst
+    tcp = struct.pack(">HH", sport, dport) + bytes(16)
+    return ip + tcp
+
+
+def ethernet(payload: bytes, vlan: bool = False) -> bytes:
+    header = bytes(12)
+    if vlan:
+        header += struct.pack(">HH", 0x8100, 42)
+
+    return header + struct.pack(">H", 0x0800) + payload
+
+
+def make_pcap(packets: list[tuple[float, bytes]], magic=0xA1B2C3D4) -> bytes:
+    data = struct.pack("<IHHiIII", magic, 2, 4, 0, 0, 65535, 1)
+    for ts, frame in packets:
+        sec = int(ts)
+        frac = round((ts - sec) * (1e9 if magic == 0xA1B23C4D else 1e6))
+        data += struct.pack("<IIII", sec, frac, len(frame), len(frame) + 10)
+        data += frame
+
+    return data
+
+
+A, B, C = bytes([10, 0, 0, 1]), bytes([10, 0, 0, 2]), bytes([10, 0, 0, 3])
+
+PACKETS = [
+    (100.5, ethernet(ipv4_tcp(A, B, 1234, 80))),
+    (101.0, ethernet(ipv4_tcp(B, A, 80, 1234))),  # same flow
+    (102.0, ethernet(ipv4_tcp(A, C, 1234, 80), vlan=True)),
+    (102.5, bytes(14)),  # not IP
+]
+
+
+class TestScan(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, data: bytes, name="test.pcap") -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as fp:
+            fp.write(data)
+        return path
+
+    def test_scan(self):
+        data = make_pcap(PACKETS)
+        info = pcaps.scan(self.write(data))
+
+        self.assertEqual("test.pcap", info.filename)
+        self.assertEqual(len(data), info.size)
+        self.assertEqual(4, info.packets)
+        self.assertEqual(sum(len(f) + 10 for _, f in PACKETS), info.bytes)
+        self.assertAlmostEqual(2.0, info.duration)
+        self.assertEqual(2, info.flows)
+        self.assertEqual(64, len(info.sha256))
+
+    def test_scan_nanoseconds(self):
+        info = pcaps.scan(self.write(make_pcap(PACKETS[:2], magic=0xA1B23C4D)))
+        self.assertAlmostEqual(0.5, info.duration)
+
+    def test_scan_empty(self):
+        info = pcaps.scan(self.write(make_pcap([])))
+        self.assertEqual(
+            (0, 0, 0.0, 0), (info.packets, info.bytes, info.duration, info.flows)
+        )
+
+    def test_scan_pcapng(self):
+        with self.assertRaisesRegex(ValueError, "not a pcap file"):
+            pcaps.scan(self.write(b"\x0a\x0d\x0d\x0a" + bytes(28)))
+
+
+class TestIndex(testing.TestWithDatabase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "test.pcap")
+        with open(self.path, "wb") as fp:
+            fp.write(make_pcap(PACKETS))
+
+    def test_cached(self):
+        info = pcaps.index(self.storage, self.tmp.name, "test.pcap")
+        self.assertEqual(info, self.storage.get_pcap("test.pcap"))
+
+        with mock.patch("zeek_benchmarker.pcaps.scan") as scan_mock:
+            self.assertEqual(
+                info, pcaps.index(self.storage, self.tmp.name, "test.pcap")
+            )
+            scan_mock.assert_not_called()
+
+    def test_replaced(self):
+        old = pcaps.index(self.storage, self.tmp.name, "test.pcap")
+        with open(self.path, "wb") as fp:
+            fp.write(make_pcap(PACKETS[:1]))
+
+        with self.assertLogs("zeek_benchmarker.pcaps", "WARNING") as cm:
+            new = pcaps.index(self.storage, self.tmp.name, "test.pcap")
+
+        self.assertIn("was replaced", cm.output[0])
+        self.assertNotEqual(old.sha256, new.sha256)
+        self.assertEqual(1, new.packets)
+        self.assertEqual(new, self.storage.get_pcap("test.pcap"))
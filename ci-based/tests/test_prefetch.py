@@ -0,0 +1,55 @@
+import unittest
+from unittest import mock
+
+import zeek_benchmarker.config
+from zeek_benchmarker import prefetch
+
+TEST_HASH = "a" * 64
+
+
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        cfg = zeek_benchmarker.config.Config({"CPU_SET": [1, 2], "WORK_DIR": "."})
+        patcher = mock.patch("zeek_benchmarker.config.get", return_value=cfg)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch("os.sched_getaffinity", return_value={0, 1, 2, 3})
+    def test_spare_cpus(self, _):
+        self.assertEqual([0, 3], prefetch.spare_cpus())
+
+    @mock.patch("subprocess.Popen")
+    @mock.patch("zeek_benchmarker.prefetch.peek_next_job", return_value=None)
+    def test_start_next_empty_queue(self, _, popen_mock):
+        self.assertIsNone(prefetch.start_next())
+        popen_mock.assert_not_called()
+
+    @mock.patch("subprocess.Popen")
+    @mock.patch("zeek_benchmarker.artifacts.get")
+    @mock.patch("os.sched_getaffinity", return_value={1, 2})
+    @mock.patch("zeek_benchmarker.prefetch.peek_next_job")
+    def test_start_next_no_spare_cpus(self, peek_mock, _, __, popen_mock):
+        peek_mock.return_value = {"build_url": "test-url", "build_hash": TEST_HASH}
+        self.assertIsNone(prefetch.start_next())
+        popen_mock.assert_not_called()
+
+    @mock.patch("subprocess.Popen")
+    @mock.patch("zeek_benchmarker.artifacts.get")
+    @mock.patch("os.sched_getaffinity", return_value={0, 1, 2, 3})
+    @mock.patch("zeek_benchmarker.prefetch.peek_next_job")
+    def test_start_next(self, peek_mock, _, __, popen_mock):
+        peek_mock.return_value = {"build_url": "test-url", "build_hash": TEST_HASH}
+        prefetch.start_next()
+
+        popen_mock.assert_called_once()
+        cmd = popen_mock.call_args.args[0]
+        self.assertEqual(["zeek_benchmarker.prefetch", "test-url", TEST_HASH], cmd[-3:])
+        self.assertTrue(popen_mock.call_args.kwargs["start_new_session"])
+
+    @mock.patch("subprocess.Popen")
+    @mock.patch("zeek_benchmarker.artifacts.get")
+    @mock.patch("zeek_benchmarker.prefetch.peek_next_job")
+    def test_start_next_invalid_hash(self, peek_mock, _, popen_mock):
+        peek_mock.return_value = {"build_url": "test-url", "build_hash": "../x"}
+        self.assertIsNone(prefetch.start_next())
+        popen_mock.assert_not_called()
@@ -0,0 +1,149 @@
+import base64
+import contextlib
+import gzip
+import io
+import sqlite3
+import unittest
+from unittest import mock
+
+from zeek_benchmarker import profiles, testing
+from zeek_benchmarker.tasks import ZeekJob, ZeekTest
+
+
+def encode(folded: str, samples: int) -> bytes:
+    data = base64.b64encode(gzip.compress(folded.encode())).decode()
+    return f"COLLAPSED_STACKS=v=1;samples={samples};gzip_b64={data}\n".encode()
+
+
+class TestCollapsedStacks(unittest.TestCase):
+    def test_parse_from(self):
+        output = b"BENCHMARK_TIMING=1.0;42;1.0;0.0\n" + encode(
+            "zeek;main;a 3\nzeek;main;b 1\n", 4
+        )
+        stacks = profiles.CollapsedStacks.parse_from(output)
+        self.assertEqual(4, stacks.samples)
+        self.assertEqual({"zeek;main;a": 3, "zeek;main;b": 1}, stacks.folded())
+
+    def test_parse_from_missing(self):
+        self.assertIsNone(profiles.CollapsedStacks.parse_from(b"nothing\n"))
+
+    def test_diff_folded(self):
+        a = {"zeek;main;a": 3, "zeek;main;b": 1}
+        b = {"zeek;main;a": 2, "zeek;main;c": 6}
+        self.assertEqual(
+            "zeek;main;a 3 2\nzeek;main;b 1 0\nzeek;main;c 0 6\n",
+            profiles.diff_folded(a, b),
+        )
+        self.assertEqual(
+            "zeek;main;a 3 1\nzeek;main;b 1 0\nzeek;main;c 0 3\n",
+            profiles.diff_folded(a, b, normalize=True),
+        )
+
+
+SCRIPT_PROFILE = (
+    b"BENCHMARK_TIMING=1.0;42;1.0;0.0\n"
+    b"SCRIPT_PROFILE=#fields\tfunction\tlocation\ttype\tncall\ttot_CPU\tchild_CPU\tCPU\n"
+    b"SCRIPT_PROFILE=#types\tstring\tstring\tstring\tcount\tinterval\tinterval\tinterval\n"
+    b"SCRIPT_PROFILE=zeek_init\tbase/init-bare.zeek:10\tevent\t1\t0.5\t0.4\t0.1\n"
+    b"SCRIPT_PROFILE=f\tmicro.zeek:3-5\tfunc\t1000\t0.4\t0.0\t0.4\n"
+)
+
+
+class TestScriptProfile(unittest.TestCase):
+    def test_parse(self):
+        entries = profiles.parse_script_profile(SCRIPT_PROFILE)
+        self.assertEqual(
+            [
+                profiles.ScriptProfileEntry(
+                    "zeek_init", "base/init-bare.zeek:10", "event", 1, 0.5, 0.1
+                ),
+                profiles.ScriptProfileEntry(
+                    "f", "micro.zeek:3-5", "func", 1000, 0.4, 0.4
+                ),
+            ],
+            entries,
+        )
+
+    def test_parse_minimal_header(self):
+        output = (
+            b"SCRIPT_PROFILE=#fields\tname\tcalls\ttot_CPU\nSCRIPT_PROFILE=f\t3\t0.25\n"
+        )
+        entries = profiles.parse_script_profile(output)
+        self.assertEqual(
+            [profiles.ScriptProfileEntry("f", None, None, 3, 0.25, None)], entries
+        )
+
+    def test_parse_unknown_header(self):
+        output = b"SCRIPT_PROFILE=#fields\ta\tb\nSCRIPT_PROFILE=1\t2\n"
+        self.assertEqual([], profiles.parse_script_profile(output))
+
+    def test_parse_missing(self):
+        self.assertEqual([], profiles.parse_script_profile(b"nothing\n"))
+
+
+class TestDiffCommand(testing.TestWithDatabase):
+    def test_diff(self):
+        t = ZeekTest(test_id="test-id", runs=1)
+        for job_id, folded in [("job-a", "zeek;a 3\n"), ("job-b", "zeek;a 1\n")]:
+            job = ZeekJob(
+                job_id=job_id,
+                build_url="url",
+                build_hash="hash",
+                original_branch="branch",
+                normalized_branch="branch",
+                commit=None,
+            )
+            self.storage.store_zeek_profile(
+                job=job,
+                test=t,
+                stacks=profiles.CollapsedStacks.parse_from(encode(folded, 1)),
+            )
+
+        cfg = {"DATABASE_FILE": self.database_file.name}
+        out = io.BytesIO()
+        with (
+            mock.patch("zeek_benchmarker.config.get", return_value=cfg),
+            mock.patch("sys.stdout", mock.Mock(buffer=out)),
+        ):
+            rc = profiles.main(["diff", "job-a", "job-b", "test-id"])
+
+        self.assertEqual(0, rc)
+        self.assertEqual(b"zeek;a 3 1\n", out.getvalue())
+
+    def test_diff_missing(self):
+        cfg = {"DATABASE_FILE": self.database_file.name}
+        with (
+            mock.patch("zeek_benchmarker.config.get", return_value=cfg),
+            contextlib.redirect_stderr(io.StringIO()),
+        ):
+            rc = profiles.main(["diff", "job-a", "job-b", "test-id"])
+
+        self.assertEqual(1, rc)
+
+
+class TestStoreScriptProfile(testing.TestWithDatabase):
+    def test_store(self):
+        job = ZeekJob(
+            job_id="job-a",
+            build_url="url",
+            build_hash="hash",
+            original_branch="branch",
+            normalized_branch="branch",
+            commit=None,
+        )
+        self.storage.store_zeek_script_profile(
+            job=job,
+            test=ZeekTest(test_id="test-id", runs=1),
+            entries=profiles.parse_script_profile(SCRIPT_PROFILE),
+        )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            rows = list(
+                conn.execute(
+                    "select job_id, function, calls, self_time "
+                    "from zeek_script_profiles order by id"
+                )
+            )
+            self.assertEqual(
+                [("job-a", "zeek_init", 1, 0.1), ("job-a", "f", 1000, 0.4)], rows
+            )
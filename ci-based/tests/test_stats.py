@@ -0,0 +1,81 @@
+import math
+import unittest
+
+from zeek_benchmarker import stats
+
+
+class TestStats(unittest.TestCase):
+    def test_t95(self):
+        self.assertEqual(12.706, stats.t95(1))
+        self.assertEqual(2.086, stats.t95(20))
+        # Between table entries, the lower degrees of freedom are used.
+        self.assertEqual(2.086, stats.t95(22))
+        self.assertEqual(1.96, stats.t95(1000))
+
+        with self.assertRaises(ValueError):
+            stats.t95(0)
+
+    def test_mean_ci(self):
+        ci = stats.mean_ci([1.0, 2.0, 3.0])
+        self.assertEqual(3, ci.n)
+        self.assertEqual(2.0, ci.mean)
+        self.assertAlmostEqual(4.303 / math.sqrt(3), ci.half_width)
+        self.assertAlmostEqual(4.303 / math.sqrt(3) / 2.0, ci.relative)
+
+    def test_mean_ci_constant(self):
+        ci = stats.mean_ci([5.0, 5.0])
+        self.assertEqual(0.0, ci.half_width)
+        self.assertEqual(0.0, ci.relative)
+
+    def test_mean_ci_too_few(self):
+        with self.assertRaises(ValueError):
+            stats.mean_ci([1.0])
+
+    def test_paired_delta(self):
+        # The baseline drifts, the candidate is consistently 10% slower.
+        baseline = [1.0, 2.0, 3.0]
+        candidate = [1.1, 2.1, 3.1]
+        delta = stats.paired_delta(baseline, candidate)
+        self.assertEqual(3, delta.n)
+        self.assertAlmostEqual(2.0, delta.baseline_mean)
+        self.assertAlmostEqual(2.1, delta.candidate_mean)
+        self.assertAlmostEqual(0.1, delta.delta)
+        self.assertAlmostEqual(0.0, delta.half_width)
+        self.assertAlmostEqual(0.05, delta.relative)
+
+    def test_paired_delta_unpaired(self):
+        with self.assertRaises(ValueError):
+            stats.paired_delta([1.0, 2.0], [1.0])
+
+    def test_mad_outliers(self):
+        values = [1.0, 1.1, 0.9, 1.05, 0.95, 3.0]
+        self.assertEqual(
+            [False, False, False, False, False, True], stats.mad_outliers(values)
+        )
+
+    def test_mad_outliers_zero_mad(self):
+        self.assertEqual([False] * 4, stats.mad_outliers([1.0, 1.0, 1.0, 5.0]))
+
+    def test_mad_outliers_few(self):
+        self.assertEqual([False, False], stats.mad_outliers([1.0, 100.0]))
+
+
+class TestSummarize(unittest.TestCase):
+    def test_summarize(self):
+        s = stats.summarize([4.0, 1.0, 3.0, 2.0, 5.0])
+        self.assertEqual(5, s.n)
+        self.assertAlmostEqual(3.0, s.mean)
+        self.assertAlmostEqual(3.0, s.median)
+        self.assertAlmostEqual(1.5811, s.stddev, places=4)
+        self.assertEqual((1.0, 5.0), (s.min, s.max))
+        self.assertAlmostEqual(4.8, s.p95)
+
+    def test_single(self):
+        s = stats.summarize([2.0])
+        self.assertEqual(
+            (1, 2.0, 2.0, None, 2.0), (s.n, s.mean, s.median, s.stddev, s.p95)
+        )
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            stats.summarize([])
@@ -2,11 +2,21 @@
 Smoke integration for faster testing of various pieces
 """
 
+import dataclasses
+import os
 import sqlite3
+import tempfile
 
-from zeek_benchmarker import storage, testing
+import sqlalchemy as sa
+from zeek_benchmarker import profiles, stats, storage, testing
 from zeek_benchmarker.models import Machine
-from zeek_benchmarker.tasks import ZeekJob, ZeekTest, ZeekTestResult
+from zeek_benchmarker.pcaps import PcapInfo
+from zeek_benchmarker.tasks import (
+    CalibrationResult,
+    ZeekJob,
+    ZeekTest,
+    ZeekTestResult,
+)
 
 
 class TestStorage(testing.TestWithDatabase):
@@ -102,6 +112,55 @@ class TestStorage(testing.TestWithDatabase):
             self.assertTrue(rows[0]["success"])
             self.assertIsNone(rows[0]["error"])
 
+    def test_store_zeek_result_rusage(self):
+        zeek_test_result = ZeekTestResult.parse_from(
+            1,
+            b"BENCHMARK_RUSAGE=v=1;elapsed_us=1120345;user_us=1100007;sys_us=20001;"
+            b"max_rss_kb=42;minflt=1000;majflt=2;nvcsw=3;nivcsw=4;inblock=5;oublock=6\n",
+        )
+
+        self.store.store_zeek_result(
+            job=self.zeek_job,
+            test=self.zeek_test,
+            result=zeek_test_result,
+        )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = list(conn.execute("select * from zeek_tests"))
+            self.assertEqual(1, len(rows))
+            self.assertEqual(rows[0]["elapsed_time"], 1.120345)
+            self.assertEqual(rows[0]["minor_faults"], 1000)
+            self.assertEqual(rows[0]["involuntary_ctx_switches"], 4)
+            self.assertEqual(rows[0]["block_output"], 6)
+
+    def test_store_zeek_result_perf_stat(self):
+        zeek_test_result = ZeekTestResult.parse_from(
+            1,
+            b"BENCHMARK_TIMING=1.12;42;1.10;0.02\n"
+            b"PERF_STAT=1000;;instructions:u;1;100.00;;\n"
+            b"PERF_STAT=<not supported>;;cache-misses;0;0.00;;\n",
+        )
+
+        self.store.store_zeek_result(
+            job=self.zeek_job,
+            test=self.zeek_test,
+            result=zeek_test_result,
+        )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = list(
+                conn.execute(
+                    "select p.* from zeek_test_perf_stats p "
+                    "join zeek_tests t on p.zeek_test_id = t.id"
+                )
+            )
+            self.assertEqual(1, len(rows))
+            self.assertEqual(rows[0]["instructions"], 1000)
+            self.assertIsNone(rows[0]["cache_misses"])
+            self.assertIsNone(rows[0]["cycles"])
+
     def test_store_zeek_error(self):
         """
         Store a result in the database.
@@ -121,6 +180,351 @@ class TestStorage(testing.TestWithDatabase):
             self.assertFalse(rows[0]["success"])
             self.assertEqual(rows[0]["error"], "Something broke")
 
+    def test_store_zeek_job_test(self):
+        self.store.store_zeek_job_test(
+            job=self.zeek_job,
+            test=self.zeek_test,
+            container_setup_time=0.5,
+        )
+        self.store.store_zeek_job_test(
+            job=self.zeek_job,
+            test=self.zeek_test,
+            container_teardown_time=0.25,
+        )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = list(conn.execute("select * from zeek_job_tests"))
+            self.assertEqual(1, len(rows))
+            self.assertEqual(rows[0]["job_id"], "test_job_id")
+            self.assertEqual(rows[0]["test_id"], "test-id")
+            self.assertEqual(rows[0]["container_setup_time"], 0.5)
+            self.assertEqual(rows[0]["container_teardown_time"], 0.25)
+
+    def test_get_zeek_processing_times(self):
+        for i, elapsed in enumerate([2.0, 3.0, 9.0], 1):
+            result = ZeekTestResult.parse_from(
+                i, f"BENCHMARK_TIMING={elapsed};42;1.50;0.10".encode()
+            )
+            self.store.store_zeek_result(
+                job=self.zeek_job, test=self.zeek_test, result=result
+            )
+
+        self.store.mark_zeek_outliers(
+            job=self.zeek_job, test=self.zeek_test, test_runs=[3]
+        )
+        self.store.store_zeek_job_test(
+            job=self.zeek_job,
+            test=self.zeek_test,
+            startup_elapsed_time=1.0,
+            startup_user_time=0.5,
+            startup_system_time=0.1,
+        )
+
+        times = self.store.get_zeek_processing_times("test_job_id")
+        self.assertEqual(1, len(times))
+        self.assertEqual(2, times[0]["runs"])
+        self.assertAlmostEqual(2.5, times[0]["elapsed_time"])
+        self.assertAlmostEqual(1.0, times[0]["startup_elapsed_time"])
+        self.assertAlmostEqual(1.5, times[0]["processing_time"])
+        self.assertAlmostEqual(1.0, times[0]["processing_user_time"])
+
+    def test_get_zeek_processing_times_throughput(self):
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=2.0;42;1.50;0.10")
+        self.store.store_zeek_result(
+            job=self.zeek_job, test=self.zeek_test, result=result
+        )
+        self.store.store_pcap(
+            PcapInfo(
+                filename="test.pcap",
+                size=1000,
+                mtime_ns=0,
+                sha256="abc",
+                packets=1000,
+                bytes=1_000_000,
+                duration=10.0,
+                flows=10,
+            )
+        )
+        self.store.store_zeek_job_test(
+            job=self.zeek_job, test=self.zeek_test, pcap_sha256="abc"
+        )
+
+        times = self.store.get_zeek_processing_times("test_job_id")
+        self.assertAlmostEqual(500.0, times[0]["packets_per_sec"])
+        self.assertAlmostEqual(4.0, times[0]["mbit_per_sec"])
+
+    def test_store_zeek_result_log_records(self):
+        result = ZeekTestResult.parse_from(
+            1, b"BENCHMARK_TIMING=2.0;42;1.50;0.10\nLOG_RECORDS=v=1;conn=4;weird=1"
+        )
+        self.store.store_zeek_result(
+            job=self.zeek_job, test=self.zeek_test, result=result
+        )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            rows = list(
+                conn.execute(
+                    "select stream, records from zeek_test_log_records order by stream"
+                )
+            )
+            self.assertEqual([("conn", 4), ("weird", 1)], rows)
+
+        times = self.store.get_zeek_processing_times("test_job_id")
+        self.assertEqual(4, times[0]["conn_records"])
+        self.assertEqual(5, times[0]["log_records"])
+        self.assertAlmostEqual(0.5, times[0]["time_per_conn"])
+        self.assertAlmostEqual(0.4, times[0]["time_per_log_record"])
+
+    def test_get_zeek_processing_times_no_startup(self):
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=1.12;42;1.10;0.02")
+        self.store.store_zeek_result(
+            job=self.zeek_job, test=self.zeek_test, result=result
+        )
+
+        times = self.store.get_zeek_processing_times("test_job_id")
+        self.assertAlmostEqual(1.12, times[0]["elapsed_time"])
+        self.assertIsNone(times[0]["processing_time"])
+
+    def test_batch(self):
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=1.12;42;1.10;0.02")
+
+        def count():
+            with sqlite3.connect(self.database_file.name) as conn:
+                return conn.execute("select count(*) from zeek_tests").fetchone()[0]
+
+        with self.store.batch():
+            self.store.store_zeek_result(
+                job=self.zeek_job, test=self.zeek_test, result=result
+            )
+            self.store.store_zeek_error(
+                job=self.zeek_job, test=self.zeek_test, test_run=2, error="error"
+            )
+            self.assertEqual(0, count())
+
+        self.assertEqual(2, count())
+
+    def test_batch_flushes_on_error(self):
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=1.12;42;1.10;0.02")
+        with self.assertRaises(RuntimeError), self.store.batch():
+            self.store.store_zeek_result(
+                job=self.zeek_job, test=self.zeek_test, result=result
+            )
+            raise RuntimeError("test")
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            rows = list(conn.execute("select test_run from zeek_tests"))
+            self.assertEqual([(1,)], rows)
+
+    def test_batch_failed_write(self):
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=1.12;42;1.10;0.02")
+        # Fails in the batch's transaction and its own, then succeeds.
+        failures = [sqlite3.OperationalError("database is locked")] * 2
+
+        def failing_write(c: sqlite3.Cursor):
+            if failures:
+                raise failures.pop()
+
+            c.execute("UPDATE zeek_tests SET error = 'retried'")
+
+        def rows():
+            with sqlite3.connect(self.database_file.name) as conn:
+                return list(conn.execute("select test_run, error from zeek_tests"))
+
+        with self.assertLogs("zeek_benchmarker.storage", "WARNING"):
+            with self.store.batch():
+                self.store.store_zeek_result(
+                    job=self.zeek_job, test=self.zeek_test, result=result
+                )
+                self.store._write(failing_write)
+
+        # The other row is written, the failed one kept for retry.
+        self.assertEqual([(1, None)], rows())
+        self.assertEqual(1, len(self.store._pending))
+
+        # Unrelated callers don't see errors of buffered rows.
+        self.assertIsNone(self.store.get_pcap("test.pcap"))
+        self.assertEqual([(1, "retried")], rows())
+
+        # Other errors drop the row.
+        failures.extend([sqlite3.IntegrityError("test")] * 2)
+        with self.assertLogs("zeek_benchmarker.storage", "ERROR"):
+            with self.store.batch():
+                self.store._write(failing_write)
+
+        self.assertEqual([], self.store._pending)
+
+    def test_batch_flushed_by_other_writes(self):
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=1.12;42;1.10;0.02")
+        with self.store.batch():
+            self.store.store_zeek_result(
+                job=self.zeek_job, test=self.zeek_test, result=result
+            )
+            self.store.mark_zeek_outliers(
+                job=self.zeek_job, test=self.zeek_test, test_runs=[1]
+            )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            rows = list(conn.execute("select test_run, outlier from zeek_tests"))
+            self.assertEqual([(1, 1)], rows)
+
+    def test_pragmas(self):
+        with self.store._connection() as conn:
+            self.assertEqual("wal", conn.execute("PRAGMA journal_mode").fetchone()[0])
+            self.assertEqual(30000, conn.execute("PRAGMA busy_timeout").fetchone()[0])
+
+        with self.store.Session() as session:
+            busy_timeout = session.execute(sa.text("PRAGMA busy_timeout")).scalar()
+            self.assertEqual(30000, busy_timeout)
+
+    def test_snapshot(self):
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=1.12;42;1.10;0.02")
+        self.store.store_zeek_result(
+            job=self.zeek_job, test=self.zeek_test, result=result
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, "snapshot.db")
+            storage.snapshot(self.database_file.name, dest)
+
+            self.assertEqual(["snapshot.db"], os.listdir(tmpdir))
+            with sqlite3.connect(f"file:{dest}?mode=ro", uri=True) as conn:
+                mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+                self.assertEqual("delete", mode)
+                rows = list(conn.execute("select test_run from zeek_tests"))
+                self.assertEqual([(1,)], rows)
+
+    def test_update_zeek_test_summaries(self):
+        for i, elapsed in enumerate([1.0, 2.0, 3.0, 30.0], 1):
+            result = ZeekTestResult.parse_from(
+                i, f"BENCHMARK_TIMING={elapsed};42;1.00;0.10".encode()
+            )
+            self.store.store_zeek_result(
+                job=self.zeek_job, test=self.zeek_test, result=result
+            )
+        self.store.store_zeek_error(
+            job=self.zeek_job, test=self.zeek_test, test_run=5, error="error"
+        )
+        self.store.mark_zeek_outliers(
+            job=self.zeek_job, test=self.zeek_test, test_runs=[4]
+        )
+
+        for _ in range(2):
+            self.store.update_zeek_test_summaries(
+                job_id="test_job_id", test_id="test-id"
+            )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = {
+                r["metric"]: r
+                for r in conn.execute("select * from zeek_test_summaries")
+            }
+            self.assertEqual(
+                ["elapsed_time", "max_rss", "system_time", "user_time"], sorted(rows)
+            )
+            elapsed = rows["elapsed_time"]
+            self.assertEqual(3, elapsed["n"])
+            self.assertAlmostEqual(2.0, elapsed["mean"])
+            self.assertAlmostEqual(3.0, elapsed["max"])
+            self.assertIsNotNone(elapsed["ts"])
+
+    def test_backfill_zeek_test_summaries(self):
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=1.12;42;1.10;0.02")
+        self.store.store_zeek_result(
+            job=self.zeek_job, test=self.zeek_test, result=result
+        )
+
+        self.assertEqual(1, self.store.backfill_zeek_test_summaries())
+        self.assertEqual(0, self.store.backfill_zeek_test_summaries())
+        self.assertEqual(1, self.store.backfill_zeek_test_summaries(overwrite=True))
+
+    def test_apply_retention(self):
+        output = b"BENCHMARK_TIMING=1.12;42;1.10;0.02\nLOG_RECORDS=v=1;conn=4"
+        result = ZeekTestResult.parse_from(1, output)
+        for job_id, branch in [("old-pr", "topic/x"), ("old-master", "master")]:
+            job = dataclasses.replace(
+                self.zeek_job, job_id=job_id, original_branch=branch
+            )
+            self.store.store_zeek_result(job=job, test=self.zeek_test, result=result)
+        self.store.store_zeek_result(
+            job=self.zeek_job, test=self.zeek_test, result=result
+        )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            conn.execute("UPDATE zeek_tests SET ts = 1000 WHERE job_id LIKE 'old-%'")
+
+        retention = self.store.apply_retention(
+            before=2000, keep_branches=["master"], dry_run=True
+        )
+        self.assertEqual((1, 1, 0), retention)
+
+        retention = self.store.apply_retention(before=2000, keep_branches=["master"])
+        self.assertEqual((1, 1), retention[:2])
+        self.assertGreaterEqual(retention.reclaimed_bytes, 0)
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            rows = list(conn.execute("select job_id from zeek_tests order by job_id"))
+            self.assertEqual([("old-master",), ("test_job_id",)], rows)
+            rows = list(conn.execute("select count(*) from zeek_test_log_records"))
+            self.assertEqual([(2,)], rows)
+            rows = list(
+                conn.execute(
+                    "select job_id, n, ts from zeek_test_summaries"
+                    " where metric = 'elapsed_time'"
+                )
+            )
+            self.assertEqual([("old-pr", 1, 1000)], rows)
+            auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            self.assertEqual(2, auto_vacuum)  # incremental
+
+    def test_apply_retention_ab_job(self):
+        # An old A/B job of a PR: the master baseline is kept, the
+        # candidate is rolled up.
+        output = b"BENCHMARK_TIMING=1.12;42;1.10;0.02\nLOG_RECORDS=v=1;conn=4"
+        result = ZeekTestResult.parse_from(1, output)
+        stacks = profiles.CollapsedStacks(samples=1, data=b"")
+        for variant, branch in [("baseline", "master"), ("candidate", "topic/x")]:
+            job = dataclasses.replace(
+                self.zeek_job, job_id="old-ab", original_branch=branch
+            )
+            for _ in range(2):
+                self.store.store_zeek_result(
+                    job=job, test=self.zeek_test, result=result, variant=variant
+                )
+            self.store.store_zeek_profile(
+                job=job, test=self.zeek_test, stacks=stacks, variant=variant
+            )
+        self.store.update_zeek_test_summaries(job_id="old-ab", test_id="test-id")
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            conn.execute("UPDATE zeek_tests SET ts = 1000")
+
+        retention = self.store.apply_retention(before=2000, keep_branches=["master"])
+        self.assertEqual((1, 2), retention[:2])
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            rows = list(conn.execute("select variant, branch from zeek_tests"))
+            self.assertEqual([("baseline", "master")] * 2, rows)
+            rows = list(conn.execute("select count(*) from zeek_test_log_records"))
+            self.assertEqual([(2,)], rows)
+            rows = list(conn.execute("select variant from zeek_test_profiles"))
+            self.assertEqual([("baseline",)], rows)
+
+        # Rebuilding the summaries keeps the rolled up candidate.
+        self.store.update_zeek_test_summaries(job_id="old-ab", test_id="test-id")
+        with sqlite3.connect(self.database_file.name) as conn:
+            rows = list(
+                conn.execute(
+                    "select variant, n from zeek_test_summaries"
+                    " where metric = 'elapsed_time' order by variant"
+                )
+            )
+            self.assertEqual([("baseline", 2), ("candidate", 2)], rows)
+
+        retention = self.store.apply_retention(before=2000, keep_branches=["master"])
+        self.assertEqual((0, 0), retention[:2])
+
     def test_get_or_create_machine(self):
         m1 = self.store.get_or_create_machine(self.make_test_machine())
         m2 = self.store.get_or_create_machine(self.make_test_machine())
@@ -135,3 +539,115 @@ class TestStorage(testing.TestWithDatabase):
         self.assertEqual(m3.id, m4.id)
 
         self.assertNotEqual(m1.id, m3.id)
+
+    def test_store_zeek_ab_delta(self):
+        delta = stats.paired_delta([1.0, 1.0, 1.0], [1.1, 1.2, 1.0])
+        self.store.store_zeek_ab_delta(
+            job=self.zeek_job, test=self.zeek_test, delta=delta
+        )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = list(conn.execute("select * from zeek_ab_deltas"))
+            self.assertEqual(1, len(rows))
+            self.assertEqual(rows[0]["pairs"], 3)
+            self.assertAlmostEqual(rows[0]["delta"], 0.1)
+            self.assertAlmostEqual(rows[0]["relative_delta"], 0.1)
+
+    def test_store_zeek_result_variant(self):
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=1.12;42;1.10;0.02")
+        self.store.store_zeek_result(
+            job=self.zeek_job, test=self.zeek_test, result=result, variant="baseline"
+        )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            rows = list(conn.execute("select variant from zeek_tests"))
+            self.assertEqual([("baseline",)], rows)
+
+    def test_find_build(self):
+        self.assertIsNone(self.store.find_build("test_build_hash"))
+
+    def test_mark_zeek_outliers(self):
+        result = ZeekTestResult.parse_from(1, b"BENCHMARK_TIMING=1.12;42;1.10;0.02")
+        for warmup in [True, False]:
+            self.store.store_zeek_result(
+                job=self.zeek_job, test=self.zeek_test, result=result, warmup=warmup
+            )
+
+        result = result._replace(test_run=2)
+        self.store.store_zeek_result(
+            job=self.zeek_job, test=self.zeek_test, result=result
+        )
+
+        self.store.mark_zeek_outliers(
+            job=self.zeek_job, test=self.zeek_test, test_runs=[1]
+        )
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            rows = list(
+                conn.execute(
+                    "select test_run, warmup, outlier from zeek_tests order by id"
+                )
+            )
+            self.assertEqual([(1, 1, 0), (1, 0, 1), (2, 0, 0)], rows)
+
+    def test_calibration(self):
+        machine_id = self.store.get_or_create_machine(self.make_test_machine()).id
+        self.assertEqual(
+            [], self.store.calibration_reference(machine_id=machine_id, cpu_slot="1,2")
+        )
+
+        for total, reference in [(3.0, True), (1.0, False), (2.0, True)]:
+            self.store.store_calibration(
+                job=self.zeek_job,
+                machine_id=machine_id,
+                cpu_slot="1,2",
+                result=CalibrationResult(cpu_time=total / 2, mem_time=total / 2),
+                score=None,
+                reference=reference,
+            )
+
+        self.assertEqual(
+            [3.0, 2.0],
+            self.store.calibration_reference(machine_id=machine_id, cpu_slot="1,2"),
+        )
+        self.assertEqual(
+            [], self.store.calibration_reference(machine_id=machine_id, cpu_slot="3,4")
+        )
+
+        self.assertEqual(
+            0, self.store.reset_calibration_reference(machine_id=machine_id + 1)
+        )
+        self.assertEqual(2, self.store.reset_calibration_reference(cpu_slot="1,2"))
+        self.assertEqual(
+            [], self.store.calibration_reference(machine_id=machine_id, cpu_slot="1,2")
+        )
+
+    def test_store_job_calibration(self):
+        self.store.store_job(
+            job_id=self.zeek_job.job_id,
+            kind="zeek",
+            machine_id=1,
+            req_vals={
+                "build_url": "test-build-url",
+                "build_hash": "test-build-hash",
+                "commit": "test-sha",
+                "branch": "test-branch",
+                "original_branch": "test-original-branch",
+                "cirrus_repo_owner": None,
+                "cirrus_repo_name": None,
+                "cirrus_task_id": None,
+                "cirrus_task_name": None,
+                "cirrus_build_id": None,
+                "cirrus_pr": None,
+                "github_check_suite_id": None,
+                "repo_version": None,
+            },
+        )
+        self.store.store_job_calibration(job=self.zeek_job, score=1.05, drifted=True)
+
+        with sqlite3.connect(self.database_file.name) as conn:
+            rows = list(
+                conn.execute("select calibration_score, calibration_drifted from jobs")
+            )
+            self.assertEqual([(1.05, 1)], rows)
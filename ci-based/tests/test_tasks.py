@@ -1,11 +1,17 @@
+import base64
 import contextlib
+import gzip
 import os
 import pathlib
 import unittest
 from unittest import mock
 
 import docker.client
+import zeek_benchmarker.config
 import zeek_benchmarker.tasks
+from zeek_benchmarker import storage
+from zeek_benchmarker.models import Machine
+from zeek_benchmarker.testing import TestWithDatabase
 
 
 class TestContainerRunner(unittest.TestCase):
@@ -48,6 +54,19 @@ class TestContainerRunner(unittest.TestCase):
         # bash -x -c 'cmd'
         self.assertIn("-xzf fake-job-id/build.tgz", run_kwargs["command"][3])
 
+    def test_unpack_build_size(self):
+        self.test_path.parent.mkdir()
+        self.test_path.touch()
+        self._client_mock.containers.run.return_value = b"1234\t/target\n"
+        size = self._cr.unpack_build(
+            build_path=self.test_path,
+            image="test-image",
+            volume="test-volume",
+        )
+        self.assertEqual(1234, size)
+        run_kwargs = self._client_mock.containers.run.call_args[1]
+        self.assertIn("&& du -sb /target", run_kwargs["command"][3])
+
     def test_unpack_build_space_quote(self):
         self.test_path = self.test_spool / "fake job id/space in build.tgz"
         self.test_path.parent.mkdir()
@@ -98,6 +117,50 @@ class TestContainerRunner(unittest.TestCase):
         self.assertEqual("/source", source_volume["Target"])
         self.assertTrue(source_volume["ReadOnly"])
 
+    def test_stream_build(self):
+        self._client_mock.containers.create.return_value = self._container_mock
+        self._container_mock.logs.return_value = b"4321\t/target\n"
+        verify = mock.Mock()
+
+        size = self._cr.stream_build(
+            chunks=iter([b"chunk"]),
+            verify=verify,
+            image="test-image",
+            volume="test-volume",
+            strip_components=1,
+        )
+        self.assertEqual(4321, size)
+        verify.assert_called_once()
+
+        # staging directory, the build archive and the commit marker
+        put_calls = self._container_mock.put_archive.call_args_list
+        self.assertEqual(3, len(put_calls))
+        self.assertEqual("/target", put_calls[0].args[0])
+        self.assertRegex(put_calls[1].args[0], r"^/target/.incoming-[0-9a-f]+$")
+        self.assertEqual("/target", put_calls[2].args[0])
+
+        command = self._client_mock.containers.create.call_args[1]["command"][3]
+        self.assertRegex(command, r"mv .incoming-[0-9a-f]+/\*/\* \.;")
+        self._container_mock.start.assert_called_once()
+        self._container_mock.remove.assert_called_once_with(force=True)
+
+    def test_stream_build_invalid_checksum(self):
+        self._client_mock.containers.create.return_value = self._container_mock
+        verify = mock.Mock(side_effect=zeek_benchmarker.tasks.InvalidChecksum())
+
+        with self.assertRaises(zeek_benchmarker.tasks.InvalidChecksum):
+            self._cr.stream_build(
+                chunks=iter([b"chunk"]),
+                verify=verify,
+                image="test-image",
+                volume="test-volume",
+            )
+
+        # No commit marker, but the container runs for cleanup.
+        self.assertEqual(2, len(self._container_mock.put_archive.call_args_list))
+        self._container_mock.start.assert_called_once()
+        self._container_mock.remove.assert_called_once_with(force=True)
+
     def test__runc(self):
         result = self._cr.runc(
             image="test-image",
@@ -126,6 +189,45 @@ class TestContainerRunner(unittest.TestCase):
                 test_data_volume="test_data",
             )
 
+    def test_start_warm_exec(self):
+        self._container_mock.exec_run.return_value = (0, (b"out", None))
+        warm = self._cr.start_warm(
+            image="test-image",
+            seccomp_profile={},
+            install_volume="test-install-volume",
+            install_target="/test/install",
+            test_data_volume="test_data",
+        )
+        run_kwargs = self._client_mock.containers.run.call_args[1]
+        self.assertEqual(["sleep", "infinity"], run_kwargs["command"])
+        self.assertEqual("/run", run_kwargs["environment"]["RUN_PATH"])
+
+        result = warm.exec("/test/cmd --arg", {"TEST": "1"})
+        self.assertEqual(0, result.returncode)
+        self.assertEqual(b"out", result.stdout)
+        self.assertEqual(b"", result.stderr)
+
+        # Cleanup of the run directory, then the command itself.
+        cleanup_call, exec_call = self._container_mock.exec_run.call_args_list
+        self.assertEqual("find", cleanup_call.args[0][0])
+        self.assertEqual(["/test/cmd", "--arg"], exec_call.args[0])
+        self.assertEqual({"TEST": "1"}, exec_call.kwargs["environment"])
+
+        warm.close()
+        self._container_mock.remove.assert_called_once_with(force=True)
+
+    def test_start_warm_exec__failed(self):
+        self._container_mock.exec_run.return_value = (1, (None, b"err"))
+        warm = self._cr.start_warm(
+            image="test-image",
+            seccomp_profile={},
+            install_volume="test-install-volume",
+            install_target="/test/install",
+            test_data_volume="test_data",
+        )
+        with self.assertRaises(zeek_benchmarker.tasks.CommandFailed):
+            warm.exec("/test/cmd", {})
+
     def test__runc__tmpfs(self):
         self._cr.runc(
             image="test-image",
@@ -156,6 +258,10 @@ class TestZeekJob(unittest.TestCase):
             job_id="test-job-id",
         )
 
+        patcher = mock.patch("zeek_benchmarker.storage.get")
+        self.store_mock = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
     @mock.patch("zeek_benchmarker.tasks.ZeekJob.run_zeek_test")
     def test_process(self, run_zeek_test_mock):
         # This uses the Config.get() singleton call to get access
@@ -170,3 +276,461 @@ class TestZeekJob(unittest.TestCase):
         self.assertGreater(len(ids), 10)
         self.assertIn("micro-table-ops-copy", ids)
         self.assertIn("pcap-500k-syns", ids)
+        self.assertEqual(len(ids), self.store_mock.batch.call_count)
+        self.assertEqual(
+            len(ids), self.store_mock.update_zeek_test_summaries.call_count
+        )
+
+    @mock.patch("zeek_benchmarker.tasks.ZeekJob.run_zeek_test")
+    def test_process_cpu_slots(self, run_zeek_test_mock):
+        cfg = zeek_benchmarker.config.Config(
+            {
+                "CPU_SET": [[1, 2], [3, 4]],
+                "RUN_COUNT": 1,
+                "TESTS_FILE": "./config-tests.yml",
+            }
+        )
+        with mock.patch("zeek_benchmarker.config.get", return_value=cfg):
+            self.job._process()
+
+        ids = [c.args[0].test_id for c in run_zeek_test_mock.call_args_list]
+        self.assertIn("pcap-500k-syns", ids)
+        self.assertEqual(len(ids), len(set(ids)))
+
+        slots = {c.kwargs["cpus"] for c in run_zeek_test_mock.call_args_list}
+        self.assertLessEqual(slots, {"1,2", "3,4"})
+
+
+class TestPerfStatResult(unittest.TestCase):
+    def test_parse(self):
+        output = b"""BENCHMARK_TIMING=1.12;42;1.10;0.02
+PERF_STAT=2000;;cpu_core/instructions/;10;100.00;;
+PERF_STAT=500;;cpu_atom/instructions/;10;100.00;;
+PERF_STAT=300;;cycles:u;10;100.00;;
+PERF_STAT=7;;branch-misses;10;100.00;;
+PERF_STAT=<not counted>;;cache-misses;0;0.00;;
+PERF_STAT=12;;context-switches;10;100.00;;
+"""
+        result = zeek_benchmarker.tasks.PerfStatResult.parse_from(output)
+        self.assertEqual(2500, result.instructions)
+        self.assertEqual(300, result.cycles)
+        self.assertEqual(7, result.branch_misses)
+        self.assertIsNone(result.cache_misses)
+        self.assertIsNone(result.branches)
+        self.assertEqual(12, result.context_switches)
+
+    def test_parse_missing(self):
+        output = b"BENCHMARK_TIMING=1.12;42;1.10;0.02\n"
+        self.assertIsNone(zeek_benchmarker.tasks.PerfStatResult.parse_from(output))
+        result = zeek_benchmarker.tasks.ZeekTestResult.parse_from(1, output)
+        self.assertIsNone(result.perf_stat)
+
+
+class TestZeekTestResult(unittest.TestCase):
+    RUSAGE = (
+        b"BENCHMARK_RUSAGE=v=1;elapsed_us=1120345;user_us=1100007;sys_us=20001;"
+        b"max_rss_kb=42;minflt=1000;majflt=2;nvcsw=3;nivcsw=4;inblock=5;oublock=6\n"
+    )
+
+    def test_parse_rusage(self):
+        result = zeek_benchmarker.tasks.ZeekTestResult.parse_from(1, self.RUSAGE)
+        self.assertEqual(1.120345, result.elapsed_time)
+        self.assertEqual(1.100007, result.user_time)
+        self.assertEqual(0.020001, result.system_time)
+        self.assertEqual(42 * 1024, result.max_rss)
+        self.assertEqual(1000, result.minor_faults)
+        self.assertEqual(2, result.major_faults)
+        self.assertEqual(3, result.voluntary_ctx_switches)
+        self.assertEqual(4, result.involuntary_ctx_switches)
+        self.assertEqual(5, result.block_input)
+        self.assertEqual(6, result.block_output)
+
+    def test_parse_rusage_preferred(self):
+        output = b"BENCHMARK_TIMING=1.12;42;1.10;0.02\n" + self.RUSAGE
+        result = zeek_benchmarker.tasks.ZeekTestResult.parse_from(1, output)
+        self.assertEqual(1.120345, result.elapsed_time)
+
+    def test_parse_timing(self):
+        output = b"BENCHMARK_TIMING=1.12;42;1.10;0.02\n"
+        result = zeek_benchmarker.tasks.ZeekTestResult.parse_from(1, output)
+        self.assertEqual(1.12, result.elapsed_time)
+        self.assertIsNone(result.minor_faults)
+
+    def test_parse_log_records(self):
+        output = self.RUSAGE + b"LOG_RECORDS=v=1;conn=12;weird=3\n"
+        result = zeek_benchmarker.tasks.ZeekTestResult.parse_from(1, output)
+        self.assertEqual({"conn": 12, "weird": 3}, result.log_records)
+
+        result = zeek_benchmarker.tasks.ZeekTestResult.parse_from(1, self.RUSAGE)
+        self.assertIsNone(result.log_records)
+
+    def test_parse_rusage_unknown_version(self):
+        output = self.RUSAGE.replace(b"v=1;", b"v=2;")
+        with self.assertRaises(zeek_benchmarker.tasks.ResultNotFound):
+            zeek_benchmarker.tasks.ZeekTestResult.parse_from(1, output)
+
+
+class TestZeekTestStopReason(unittest.TestCase):
+    def test_fixed(self):
+        t = zeek_benchmarker.tasks.ZeekTest(test_id="t", runs=3)
+        self.assertIsNone(t.stop_reason(2, [1.0, 1.0]))
+        self.assertEqual("fixed", t.stop_reason(3, [1.0, 1.0, 1.0]))
+
+    def test_converged(self):
+        t = zeek_benchmarker.tasks.ZeekTest(
+            test_id="t", runs=5, target_rel_ci=0.01, min_runs=3, max_runs=10
+        )
+        self.assertIsNone(t.stop_reason(2, [1.0, 1.0]))
+        self.assertEqual("converged", t.stop_reason(3, [1.0, 1.001, 0.999]))
+
+    def test_max_runs(self):
+        t = zeek_benchmarker.tasks.ZeekTest(
+            test_id="t", runs=5, target_rel_ci=0.01, min_runs=3, max_runs=4
+        )
+        self.assertIsNone(t.stop_reason(3, [1.0, 2.0, 1.5]))
+        self.assertEqual("max_runs", t.stop_reason(4, [1.0, 2.0, 1.5, 1.2]))
+
+    def test_errors_count_towards_max_runs(self):
+        t = zeek_benchmarker.tasks.ZeekTest(
+            test_id="t", runs=5, target_rel_ci=0.01, min_runs=3, max_runs=4
+        )
+        self.assertEqual("max_runs", t.stop_reason(4, []))
+
+
+class TestZeekJobRunZeekTest(unittest.TestCase):
+    def setUp(self):
+        self.job = zeek_benchmarker.tasks.ZeekJob(
+            build_url="test-url",
+            build_hash="test-hash",
+            original_branch="test-original-branch",
+            normalized_branch="test-normalized-branch",
+            commit="test-commit",
+            job_id="test-job-id",
+        )
+        self.outputs = []
+
+        def run(command, env):
+            return zeek_benchmarker.tasks.RunResult(0, self.outputs.pop(0), b"")
+
+        @contextlib.contextmanager
+        def test_runner(t):
+            yield run
+
+        patcher = mock.patch.object(self.job, "test_runner", test_runner)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch("zeek_benchmarker.storage.get")
+        self.store_mock = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_adaptive_converged(self):
+        self.outputs = [
+            b"BENCHMARK_TIMING=1.00;42;1.00;0.00\n",
+            b"BENCHMARK_TIMING=1.00;42;1.00;0.00\n",
+            b"BENCHMARK_TIMING=1.00;42;1.00;0.00\n",
+            b"BENCHMARK_TIMING=9.99;42;9.99;0.00\n",
+        ]
+        t = zeek_benchmarker.tasks.ZeekTest(
+            test_id="t", runs=5, target_rel_ci=0.01, min_runs=3, max_runs=10
+        )
+        self.job.run_zeek_test(t, cpus="1")
+
+        self.assertEqual(3, self.store_mock.store_zeek_result.call_count)
+        self.store_mock.store_zeek_job_test.assert_called_once_with(
+            job=self.job,
+            test=t,
+            run_count=3,
+            stop_reason="converged",
+            elapsed_rel_ci=0.0,
+        )
+
+    def test_warmup_and_outliers(self):
+        self.outputs = [
+            b"BENCHMARK_TIMING=5.00;42;5.00;0.00\n",
+            b"BENCHMARK_TIMING=1.00;42;1.00;0.00\n",
+            b"BENCHMARK_TIMING=1.10;42;1.00;0.00\n",
+            b"BENCHMARK_TIMING=0.90;42;1.00;0.00\n",
+            b"BENCHMARK_TIMING=3.00;42;1.00;0.00\n",
+        ]
+        t = zeek_benchmarker.tasks.ZeekTest(test_id="t", runs=4, warmup_runs=1)
+        self.job.run_zeek_test(t, cpus="1")
+
+        warmups = [
+            (c.kwargs["result"].test_run, c.kwargs["warmup"])
+            for c in self.store_mock.store_zeek_result.call_args_list
+        ]
+        self.assertEqual(
+            [(1, True), (1, False), (2, False), (3, False), (4, False)], warmups
+        )
+        self.store_mock.mark_zeek_outliers.assert_called_once_with(
+            job=self.job, test=t, test_runs=[4], variant=None
+        )
+
+    def test_profile(self):
+        folded = base64.b64encode(gzip.compress(b"zeek;main 2\n")).decode()
+        self.outputs = [
+            b"BENCHMARK_TIMING=1.00;42;1.00;0.00\n",
+            f"COLLAPSED_STACKS=v=1;samples=2;gzip_b64={folded}\n".encode(),
+        ]
+        t = zeek_benchmarker.tasks.ZeekTest(test_id="t", runs=1, profile=True)
+        self.job.run_zeek_test(t, cpus="1")
+
+        self.assertEqual(1, self.store_mock.store_zeek_result.call_count)
+        stacks = self.store_mock.store_zeek_profile.call_args.kwargs["stacks"]
+        self.assertEqual({"zeek;main": 2}, stacks.folded())
+
+    def test_profile_scripts(self):
+        self.outputs = [
+            b"BENCHMARK_TIMING=1.00;42;1.00;0.00\n",
+            (
+                b"SCRIPT_PROFILE=#fields\tfunction\tncall\ttot_CPU\n"
+                b"SCRIPT_PROFILE=f\t10\t0.5\n"
+            ),
+        ]
+        t = zeek_benchmarker.tasks.ZeekTest(test_id="t", runs=1, profile_scripts=True)
+        self.job.run_zeek_test(t, cpus="1")
+
+        self.assertEqual(1, self.store_mock.store_zeek_result.call_count)
+        entries = self.store_mock.store_zeek_script_profile.call_args.kwargs["entries"]
+        self.assertEqual(["f"], [e.function for e in entries])
+
+    def test_startup(self):
+        self.outputs = [
+            b"BENCHMARK_TIMING=5.00;42;4.00;0.50\n",
+            b"BENCHMARK_TIMING=1.00;20;0.80;0.10\n",
+            b"BENCHMARK_TIMING=1.20;22;0.90;0.20\n",
+            b"BENCHMARK_TIMING=1.10;21;0.85;0.15\n",
+        ]
+        t = zeek_benchmarker.tasks.ZeekTest(test_id="t", runs=1, pcap="test.pcap")
+        with mock.patch("zeek_benchmarker.config.get") as config_get_mock:
+            config_get_mock.return_value.startup_runs = 3
+            config_get_mock.return_value.outlier_threshold = 0
+            self.job.run_zeek_test(t, cpus="1")
+
+        self.assertEqual(1, self.store_mock.store_zeek_result.call_count)
+        self.store_mock.store_zeek_job_test.assert_any_call(
+            job=self.job,
+            test=t,
+            startup_elapsed_time=1.10,
+            startup_user_time=0.85,
+            startup_system_time=0.15,
+            startup_max_rss=21 * 1024,
+        )
+
+    def test_fixed_with_error(self):
+        self.outputs = [
+            b"BENCHMARK_TIMING=1.00;42;1.00;0.00\n",
+            b"garbage\n",
+        ]
+        t = zeek_benchmarker.tasks.ZeekTest(test_id="t", runs=2)
+        self.job.run_zeek_test(t, cpus="1")
+
+        self.assertEqual(1, self.store_mock.store_zeek_result.call_count)
+        self.assertEqual(1, self.store_mock.store_zeek_error.call_count)
+        self.store_mock.store_zeek_job_test.assert_called_once_with(
+            job=self.job,
+            test=t,
+            run_count=2,
+            stop_reason="fixed",
+            elapsed_rel_ci=None,
+        )
+
+
+class TestZeekABJob(unittest.TestCase):
+    def setUp(self):
+        self.job = zeek_benchmarker.tasks.ZeekABJob(
+            build_url="test-url/build.tgz",
+            build_hash="test-hash",
+            original_branch="test-original-branch",
+            normalized_branch="test-normalized-branch",
+            commit="test-commit",
+            job_id="test-job-id",
+            baseline_build_url="baseline-url/build.tgz",
+            baseline_build_hash="baseline-hash",
+            baseline_commit="baseline-commit",
+            baseline_branch="release/7.0",
+            baseline_original_branch="release70",
+            job_dir=pathlib.Path("/tmp/test-job-id"),
+        )
+        self.calls = []
+
+        def make_test_runner(variant, elapsed):
+            @contextlib.contextmanager
+            def test_runner(t):
+                def run(command, env):
+                    self.calls.append(variant)
+                    output = f"BENCHMARK_TIMING={elapsed};42;1.00;0.00\n"
+                    return zeek_benchmarker.tasks.RunResult(0, output.encode(), b"")
+
+                yield run
+
+            return test_runner
+
+        patcher = mock.patch.object(
+            self.job.baseline, "test_runner", make_test_runner("baseline", 1.0)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(
+            self.job, "test_runner", make_test_runner("candidate", 1.1)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch("zeek_benchmarker.storage.get")
+        self.store_mock = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_baseline(self):
+        baseline = self.job.baseline
+        self.assertEqual("baseline-hash", baseline.sha256)
+        self.assertEqual("test-job-id", baseline.job_id)
+        self.assertEqual("baseline-commit", baseline.commit)
+        self.assertEqual("release70", baseline.original_branch)
+        self.assertEqual(
+            pathlib.Path("/tmp/test-job-id/baseline-build.tgz"), baseline.build_path
+        )
+
+    @mock.patch("zeek_benchmarker.volumes.get", return_value=None)
+    def test_install_volumes(self, volumes_get_mock):
+        self.assertEqual("zeek_install_data", self.job.install_volume)
+        self.assertEqual("zeek_install_baseline_data", self.job.baseline.install_volume)
+
+    @mock.patch("zeek_benchmarker.volumes.get")
+    def test_release_install(self, volumes_get_mock):
+        self.job.release_install()
+        released = [
+            c.args[0] for c in volumes_get_mock.return_value.release.call_args_list
+        ]
+        self.assertEqual(
+            [self.job.install_volume, "zeek_install_baseline-hash"], released
+        )
+
+    def test_run_zeek_test(self):
+        t = zeek_benchmarker.tasks.ZeekTest(test_id="t", runs=3)
+        self.job.run_zeek_test(t, cpus="1")
+
+        self.assertEqual(["baseline", "candidate"] * 3, self.calls)
+
+        variants = [
+            c.kwargs["variant"]
+            for c in self.store_mock.store_zeek_result.call_args_list
+        ]
+        self.assertEqual(["baseline", "candidate"] * 3, variants)
+
+        # Baseline runs are stored with the baseline's commit and branch.
+        identities = [
+            (c.kwargs["job"].commit, c.kwargs["job"].original_branch)
+            for c in self.store_mock.store_zeek_result.call_args_list[:2]
+        ]
+        self.assertEqual(
+            [("baseline-commit", "release70"), ("test-commit", "test-original-branch")],
+            identities,
+        )
+
+        delta = self.store_mock.store_zeek_ab_delta.call_args.kwargs["delta"]
+        self.assertEqual(3, delta.n)
+        self.assertAlmostEqual(0.1, delta.delta)
+
+        self.assertIsNone(
+            self.store_mock.store_zeek_ab_delta.call_args.kwargs["workload_changed"]
+        )
+
+    def test_workload_changes(self):
+        def result(conn, weird):
+            return zeek_benchmarker.tasks.ZeekTestResult(
+                1, 1.0, 1.0, 0.0, 42, log_records={"conn": conn, "weird": weird}
+            )
+
+        pairs = [
+            (result(10, 1), result(10, 2)),
+            (result(10, 1), result(10, 2)),
+            (result(10, 1), result(11, 1)),
+        ]
+        changes = zeek_benchmarker.tasks.ZeekABJob.workload_changes(pairs)
+        self.assertEqual({"weird": (1, 2)}, changes)
+
+
+class TestCalibration(unittest.TestCase):
+    def setUp(self):
+        self.job = zeek_benchmarker.tasks.ZeekJob(
+            build_url="test-url",
+            build_hash="test-hash",
+            original_branch="test-original-branch",
+            normalized_branch="test-normalized-branch",
+            commit="test-commit",
+            job_id="test-job-id",
+        )
+
+    def test_parse(self):
+        result = zeek_benchmarker.tasks.CalibrationResult.parse_from(
+            b"noise\nCALIBRATION=v=1;cpu_us=450000;mem_us=250000\n"
+        )
+        self.assertEqual(0.45, result.cpu_time)
+        self.assertEqual(0.25, result.mem_time)
+        self.assertAlmostEqual(0.7, result.total)
+
+    def test_parse_missing(self):
+        with self.assertRaises(zeek_benchmarker.tasks.ResultNotFound):
+            zeek_benchmarker.tasks.CalibrationResult.parse_from(b"")
+
+    @mock.patch("zeek_benchmarker.machine.get_machine")
+    @mock.patch("zeek_benchmarker.storage.get")
+    @mock.patch("zeek_benchmarker.tasks.ContainerRunner.get")
+    def test_calibrate(self, cr_get_mock, storage_get_mock, get_machine_mock):
+        cr_get_mock.return_value.runc.return_value = zeek_benchmarker.tasks.RunResult(
+            0, b"CALIBRATION=v=1;cpu_us=500000;mem_us=500000\n", b""
+        )
+        store_mock = storage_get_mock.return_value
+        store_mock.calibration_reference.side_effect = [[0.9], []]
+
+        score = self.job.calibrate(["1,2", "3,4"])
+
+        self.assertAlmostEqual(1.0 / 0.9, score)
+        envs = [c.kwargs["env"] for c in cr_get_mock.return_value.runc.call_args_list]
+        self.assertEqual([{"ZEEKCPUS": "1,2"}, {"ZEEKCPUS": "3,4"}], envs)
+        references = [
+            c.kwargs["reference"] for c in store_mock.store_calibration.call_args_list
+        ]
+        # Drifted results don't become part of the reference.
+        self.assertEqual([False, True], references)
+        store_mock.store_job_calibration.assert_called_once_with(
+            job=self.job, score=score, drifted=True
+        )
+
+
+class TestCalibrationDrift(TestWithDatabase):
+    @mock.patch("zeek_benchmarker.machine.get_machine")
+    @mock.patch("zeek_benchmarker.tasks.ContainerRunner.get")
+    def test_gradual_slowdown(self, cr_get_mock, get_machine_mock):
+        """
+        A machine getting 0.5% slower with every job is flagged
+        eventually, the reference doesn't follow the slowdown.
+        """
+        get_machine_mock.return_value = Machine(dmi_product_uuid="test", os="Linux")
+        store = storage.Storage(self.database_file.name)
+
+        drifted = []
+        for i in range(30):
+            cpu_us = int(500000 * 1.005**i)
+            cr_get_mock.return_value.runc.return_value = (
+                zeek_benchmarker.tasks.RunResult(
+                    0, f"CALIBRATION=v=1;cpu_us={cpu_us};mem_us=0\n".encode(), b""
+                )
+            )
+            job = zeek_benchmarker.tasks.ZeekJob(
+                build_url="test-url",
+                build_hash="test-hash",
+                original_branch="test-original-branch",
+                normalized_branch="test-normalized-branch",
+                commit="test-commit",
+                job_id=f"test-job-id-{i}",
+            )
+            with mock.patch("zeek_benchmarker.storage.get", return_value=store):
+                score = job.calibrate(["1,2"])
+
+            drifted.append(score is not None and abs(score - 1.0) > 0.03)
+
+        self.assertFalse(any(drifted[:10]))
+        self.assertTrue(all(drifted[20:]))
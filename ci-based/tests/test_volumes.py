@@ -0,0 +1,107 @@
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import docker.client
+import docker.errors
+from zeek_benchmarker.volumes import InstallVolumeCache, volume_name
+
+
+class TestInstallVolumeCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.client_mock = mock.Mock(spec=docker.client.DockerClient)
+        self.client_mock.volumes = mock.Mock()
+        self.cache = InstallVolumeCache(
+            client=self.client_mock,
+            index_path=pathlib.Path(self.tmpdir.name) / "index.json",
+            max_count=2,
+            max_bytes=1000,
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def removed_volumes(self):
+        return [c.args[0] for c in self.client_mock.volumes.get.call_args_list]
+
+    def test_volume_name(self):
+        self.assertEqual("zeek_install_abcd", volume_name("zeek_install", "abcd"))
+
+    def test_lookup_miss(self):
+        self.assertFalse(self.cache.lookup("vol-a"))
+
+    def test_commit_lookup(self):
+        self.cache.commit("vol-a", 100)
+        self.assertTrue(self.cache.lookup("vol-a"))
+
+    def test_lookup_vanished_volume(self):
+        self.cache.commit("vol-a", 100)
+        self.client_mock.volumes.get.side_effect = docker.errors.NotFound("gone")
+        self.assertFalse(self.cache.lookup("vol-a"))
+
+        self.client_mock.volumes.get.side_effect = None
+        self.assertFalse(self.cache.lookup("vol-a"))
+
+    def test_evict_count(self):
+        self.cache.commit("vol-a", 100)
+        self.cache.commit("vol-b", 100)
+        self.cache.lookup("vol-a")
+        self.client_mock.volumes.get.reset_mock()
+
+        self.cache.commit("vol-c", 100)
+        self.assertEqual(["vol-b"], self.removed_volumes())
+
+    def test_evict_bytes(self):
+        self.cache.commit("vol-a", 600)
+        self.cache.commit("vol-b", 600)
+        self.assertEqual(["vol-a"], self.removed_volumes())
+
+    def test_evict_in_use(self):
+        self.cache.commit("vol-a", 600)
+        self.client_mock.volumes.get.return_value.remove.side_effect = (
+            docker.errors.APIError("in use")
+        )
+        self.cache.commit("vol-b", 600)
+
+        # vol-a stays in the index because it could not be removed.
+        self.client_mock.volumes.get.return_value.remove.side_effect = None
+        self.assertTrue(self.cache.lookup("vol-a"))
+
+    def test_evict_pinned(self):
+        # The running job's volume is pinned, the prefetch commit of the
+        # next job's volume evicts another one.
+        self.cache.commit("vol-a", 100, pin=True)
+        self.cache.commit("vol-b", 100)
+        self.client_mock.volumes.get.reset_mock()
+
+        self.cache.commit("vol-c", 100)
+        self.assertEqual(["vol-b"], self.removed_volumes())
+
+        # Once released, vol-a is evicted again.
+        self.cache.release("vol-a")
+        self.cache.lookup("vol-c")
+        self.client_mock.volumes.get.reset_mock()
+        self.cache.commit("vol-d", 100)
+        self.assertEqual(["vol-a"], self.removed_volumes())
+
+    def test_evict_pinned_by_lookup(self):
+        self.cache.commit("vol-a", 100)
+        self.cache.commit("vol-b", 100)
+        self.assertTrue(self.cache.lookup("vol-a", pin=True))
+        self.cache.lookup("vol-b")
+        self.client_mock.volumes.get.reset_mock()
+
+        self.cache.commit("vol-c", 100)
+        self.assertEqual(["vol-b"], self.removed_volumes())
+
+    def test_evict_pinned_by_exited_process(self):
+        self.cache.commit("vol-a", 100, pin=True)
+        self.cache.commit("vol-b", 100)
+        self.client_mock.volumes.get.reset_mock()
+
+        with mock.patch("os.kill", side_effect=ProcessLookupError):
+            self.cache.commit("vol-c", 100)
+
+        self.assertEqual(["vol-a"], self.removed_volumes())
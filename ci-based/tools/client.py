@@ -11,6 +11,7 @@ Usage:
 """
 
 import argparse
+import functools
 import hmac
 import logging
 import time
@@ -36,6 +37,10 @@ class Client:
         commit=None,
         cirrus_task_name=None,
         hmac_ts=None,
+        baseline_build_url=None,
+        baseline_build_hash=None,
+        baseline_commit=None,
+        baseline_branch=None,
     ):
         """ """
         hmac_ts = int(time.time()) if hmac_ts is None else hmac_ts
@@ -54,7 +59,21 @@ class Client:
         if cirrus_task_name:
             params["cirrus_task_name"] = cirrus_task_name
 
-        hmac_msg = f"{path:s}-{hmac_ts:d}-{build_hash:s}\n".encode()
+        signed_hash = build_hash
+        if baseline_build_hash:
+            params["baseline_build_hash"] = baseline_build_hash
+            signed_hash = f"{build_hash}-{baseline_build_hash}"
+
+        if baseline_build_url:
+            params["baseline_build"] = baseline_build_url
+
+        if baseline_commit:
+            params["baseline_commit"] = baseline_commit
+
+        if baseline_branch:
+            params["baseline_branch"] = baseline_branch
+
+        hmac_msg = f"{path:s}-{hmac_ts:d}-{signed_hash:s}\n".encode()
         hmac_digest = hmac.digest(self._hmac_key, hmac_msg, "sha256").hex()
         headers = {
             "Zeek-HMAC": hmac_digest,
@@ -88,6 +107,37 @@ class Client:
             hmac_ts=hmac_ts,
         )
 
+    def submit_zeek_ab(
+        self,
+        *,
+        branch,
+        build_url,
+        build_hash,
+        baseline_build_hash,
+        baseline_commit,
+        baseline_build_url=None,
+        baseline_branch=None,
+        commit=None,
+        cirrus_task_name=None,
+        hmac_ts=None,
+    ):
+        """
+        Submit an A/B benchmark request to /zeek-ab
+        """
+        return self._submit_build(
+            path="/zeek-ab",
+            branch=branch,
+            build_url=build_url,
+            build_hash=build_hash,
+            commit=commit,
+            cirrus_task_name=cirrus_task_name,
+            hmac_ts=hmac_ts,
+            baseline_build_url=baseline_build_url,
+            baseline_build_hash=baseline_build_hash,
+            baseline_commit=baseline_commit,
+            baseline_branch=baseline_branch,
+        )
+
     def submit_broker(
         self,
         *,
@@ -120,7 +170,11 @@ def main():
     p.add_argument("--build-hash", type=str, default=None, required=True)
     p.add_argument("--cirrus-task-name", type=str, default=None, required=True)
     p.add_argument("--commit", type=str, default=None)
-    p.add_argument("what", choices=["broker", "zeek"])
+    p.add_argument("--baseline-build-url", type=str, default=None)
+    p.add_argument("--baseline-build-hash", type=str, default=None)
+    p.add_argument("--baseline-commit", type=str, default=None)
+    p.add_argument("--baseline-branch", type=str, default=None)
+    p.add_argument("what", choices=["broker", "zeek", "zeek-ab"])
     p.add_argument("branch")
     args = p.parse_args()
 
@@ -131,6 +185,14 @@ def main():
         submit_func = c.submit_zeek
     elif args.what == "broker":
         submit_func = c.submit_broker
+    elif args.what == "zeek-ab":
+        submit_func = functools.partial(
+            c.submit_zeek_ab,
+            baseline_build_url=args.baseline_build_url,
+            baseline_build_hash=args.baseline_build_hash,
+            baseline_commit=args.baseline_commit,
+            baseline_branch=args.baseline_branch,
+        )
     else:
         raise NotImplementedError(args.what)
 
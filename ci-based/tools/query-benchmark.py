@@ -0,0 +1,199 @@
+"""
+Benchmark dashboard queries against a database with synthetic results.
+
+Creates a temporary database migrated to the revision before the
+dashboard indexes, seeds it with synthetic jobs and runs, and reports
+the latency of typical dashboard and comparison queries. Then it
+migrates to head and reports the latencies again.
+
+Usage, from the ci-based directory:
+
+    $ python3 tools/query-benchmark.py --rows 3000000
+
+"""
+
+import argparse
+import logging
+import pathlib
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import alembic.command
+import alembic.config
+
+logger = logging.getLogger(__name__)
+
+BEFORE_REVISION = "d2b7f5a1c386"
+
+BRANCHES = ["master", "release/7.0", "release/6.0"] + [
+    f"topic/dev-{i}" for i in range(50)
+]
+
+QUERIES = {
+    "test time series on branch": (
+        """SELECT job_id, MIN(ts), AVG(elapsed_time)
+             FROM zeek_tests
+            WHERE test_id = :test_id
+              AND branch = :branch
+              AND ts >= :since
+              AND success
+         GROUP BY job_id"""
+    ),
+    "test time series all branches": (
+        """SELECT job_id, MIN(ts), AVG(elapsed_time)
+             FROM zeek_tests
+            WHERE test_id = :test_id
+              AND ts >= :since
+         GROUP BY job_id"""
+    ),
+    "branch jobs join": (
+        """SELECT j.sha, AVG(t.elapsed_time)
+             FROM jobs j
+             JOIN zeek_tests t ON t.job_id = j.id
+            WHERE j.branch = :branch
+              AND j.ts >= :since
+              AND t.test_id = :test_id
+         GROUP BY j.sha"""
+    ),
+    "compare two commits": (
+        """SELECT t.sha, t.test_id, AVG(t.elapsed_time)
+             FROM zeek_tests t
+            WHERE t.sha IN (:sha_a, :sha_b)
+         GROUP BY t.sha, t.test_id"""
+    ),
+    "join jobs on sha": (
+        """SELECT j.id, j.branch, AVG(t.elapsed_time)
+             FROM zeek_tests t
+             JOIN jobs j ON j.sha = t.sha
+            WHERE t.sha = :sha_a AND t.test_id = :test_id
+         GROUP BY j.id"""
+    ),
+    "latest build url": (
+        """SELECT build_url
+             FROM jobs
+            WHERE build_hash = :build_hash
+         ORDER BY ts DESC
+            LIMIT 1"""
+    ),
+}
+
+
+def migrate(filename: str, revision: str):
+    alembic_config = alembic.config.Config()
+    script_location = pathlib.Path(__file__).parent.parent / "alembic"
+    alembic_config.set_main_option("script_location", str(script_location))
+    alembic_config.set_main_option("sqlalchemy.url", f"sqlite:///{filename}")
+    alembic.command.upgrade(alembic_config, revision)
+
+
+def seed(conn: sqlite3.Connection, rows: int, tests: int, runs: int) -> dict:
+    """
+    Insert synthetic jobs with tests runs each into zeek_tests until
+    there are about rows rows. Returns query parameters that hit data.
+    """
+    rng = random.Random(42)
+    test_ids = [f"test-{i}" for i in range(tests)]
+    n_jobs = max(1, rows // (tests * runs))
+    start = int(time.time()) - n_jobs * 3600
+
+    jobs = []
+    for i in range(n_jobs):
+        jobs.append(
+            (
+                f"job-{i}",
+                start + i * 3600,
+                "zeek",
+                f"https://example.com/builds/{i}/build.tgz",
+                f"{i:064x}",
+                f"{rng.getrandbits(160):040x}",
+                rng.choice(BRANCHES),
+            )
+        )
+
+    conn.executemany(
+        """INSERT INTO jobs (id, ts, kind, build_url, build_hash, sha,
+                             branch, original_branch)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        [job + (job[-1],) for job in jobs],
+    )
+
+    def zeek_tests():
+        for job_id, ts, _, _, _, sha, branch in jobs:
+            for test_id in test_ids:
+                for run in range(1, runs + 1):
+                    yield (job_id, ts, test_id, run, rng.gauss(10, 0.5), sha, branch)
+
+    conn.executemany(
+        """INSERT INTO zeek_tests (job_id, ts, test_id, test_run, elapsed_time,
+                                   sha, branch, success)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 1)""",
+        zeek_tests(),
+    )
+    conn.commit()
+
+    return {
+        "test_id": test_ids[len(test_ids) // 2],
+        "branch": "master",
+        "since": start + n_jobs * 3600 * 3 // 4,
+        "sha_a": jobs[-1][5],
+        "sha_b": jobs[-2][5] if len(jobs) > 1 else jobs[-1][5],
+        "build_hash": jobs[len(jobs) // 2][4],
+    }
+
+
+def measure(filename: str, params: dict, repeat: int) -> dict[str, float]:
+    """
+    Median latency of each query in seconds.
+    """
+    latencies = {}
+    with sqlite3.connect(filename) as conn:
+        for name, sql in QUERIES.items():
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(sql, params).fetchall()
+                times.append(time.perf_counter() - start)
+
+            latencies[name] = statistics.median(times)
+
+    return latencies
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--tests", type=int, default=40)
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--database", help="keep the database at this path")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = args.database or str(pathlib.Path(tmpdir) / "benchmark.db")
+
+        logger.info("Seeding %s with %d rows", filename, args.rows)
+        migrate(filename, BEFORE_REVISION)
+        with sqlite3.connect(filename) as conn:
+            params = seed(conn, args.rows, args.tests, args.runs)
+            conn.execute("ANALYZE")
+
+        before = measure(filename, params, args.repeat)
+
+        logger.info("Migrating to head")
+        migrate(filename, "head")
+        after = measure(filename, params, args.repeat)
+
+    print(f"{'query':<32} {'before ms':>12} {'after ms':>12} {'speedup':>9}")
+    for name in QUERIES:
+        b, a = before[name] * 1000, after[name] * 1000
+        speedup = b / a if a else float("inf")
+        print(f"{name:<32} {b:>12.3f} {a:>12.3f} {speedup:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
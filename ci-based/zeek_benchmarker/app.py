@@ -1,5 +1,7 @@
 import hmac
 import os
+import signal
+import threading
 import time
 import typing
 from datetime import datetime, timedelta
@@ -63,6 +65,11 @@ def check_hmac_request(req):
     if not build_hash:
         raise BadRequest("Build hash argument required")
 
+    # A/B requests sign the baseline's build hash, too.
+    baseline_build_hash = req.args.get("baseline_build_hash", "")
+    if baseline_build_hash:
+        build_hash = f"{build_hash}-{baseline_build_hash}"
+
     if not verify_hmac(req.path, hmac_timestamp, hmac_header, build_hash):
         raise Forbidden("HMAC validation failed")
 
@@ -94,6 +101,15 @@ def is_valid_branch_name(branch: str):
     return True
 
 
+def normalize_branch(branch: str) -> str:
+    """
+    Normalize the branch name to remove any non-alphanumeric characters so it's
+    safe to use as part of a path name. This is way overkill, but it's safer.
+    Docker requires it to be all lowercase as well.
+    """
+    return "".join(x for x in branch if x.isalnum()).lower()
+
+
 def parse_request(req):
     """
     Generic request parsing.
@@ -121,11 +137,8 @@ def parse_request(req):
     else:
         raise BadRequest("Invalid build URL")
 
-    # Normalize the branch name to remove any non-alphanumeric characters so it's
-    # safe to use as part of a path name. This is way overkill, but it's safer.
-    # Docker requires it to be all lowercase as well.
     hmac_timestamp = int(req.headers.get("Zeek-HMAC-Timestamp", 0))
-    req_vals["original_branch"] = "".join(x for x in branch if x.isalnum()).lower()
+    req_vals["original_branch"] = normalize_branch(branch)
     normalized_branch = req_vals["original_branch"]
     if remote_build:
         normalized_branch += f"-{int(hmac_timestamp):d}-{int(time.time()):d}"
@@ -148,6 +161,59 @@ def parse_request(req):
     req_vals["github_check_suite_id"] = request.args.get("github_check_suite_id", None)
     req_vals["repo_version"] = request.args.get("repo_version", None)
 
+    # Run an extra profiled iteration of every test.
+    req_vals["profile"] = request.args.get("profile", "").lower() in ("1", "true")
+
+    return req_vals
+
+
+def parse_ab_request(req, store: storage.Storage):
+    """
+    Parse an A/B request: A regular request for the candidate build
+    plus the baseline's build hash and commit and, optionally, its
+    build URL and branch.
+
+    Without a baseline build URL or branch, those of the most recent
+    job for the baseline's build hash are used.
+    """
+    req_vals = parse_request(req)
+
+    baseline_build_hash = req.args.get("baseline_build_hash", "")
+    if not baseline_build_hash:
+        raise BadRequest("Baseline build hash argument required")
+
+    # Baseline runs are stored with their own commit and branch,
+    # not mixed into the candidate's.
+    baseline_commit = req.args.get("baseline_commit", "")
+    if not baseline_commit:
+        raise BadRequest("Baseline commit argument required")
+
+    baseline_build_url = req.args.get("baseline_build", None)
+    baseline_branch = req.args.get("baseline_branch", None)
+    if not baseline_build_url or not baseline_branch:
+        build = store.find_build(baseline_build_hash)
+        if not build:
+            raise BadRequest("Unknown baseline build hash")
+
+        baseline_build_url = baseline_build_url or build.build_url
+        baseline_branch = baseline_branch or build.branch
+
+    if not is_valid_branch_name(baseline_branch):
+        raise BadRequest("Missing or invalid baseline branch")
+
+    # Same rules as for the candidate's build URL.
+    allowed = is_allowed_build_url_prefix(baseline_build_url) or (
+        not req_vals["remote"] and baseline_build_url.startswith("file://")
+    )
+    if not allowed:
+        raise BadRequest("Invalid baseline build URL")
+
+    req_vals["baseline_build_url"] = baseline_build_url
+    req_vals["baseline_build_hash"] = baseline_build_hash
+    req_vals["baseline_commit"] = baseline_commit
+    req_vals["baseline_branch"] = baseline_branch
+    req_vals["baseline_original_branch"] = normalize_branch(baseline_branch)
+
     return req_vals
 
 
@@ -170,6 +236,36 @@ def enqueue_job(job_func, req_vals: dict[str, typing.Any]):
         return q.enqueue(job_func, req_vals)
 
 
+class MachineCache:
+    """
+    The machines.id of the system serving the API.
+
+    Reading the DMI and /proc files and looking up the machines table
+    is done once, then the id is reused until ttl seconds passed or
+    invalidate() is called, e.g. on SIGHUP.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._machine_id: int | None = None
+        self._resolved_at = 0.0
+
+    def invalidate(self, *args):
+        # Also used as signal handler, so no locking.
+        self._machine_id = None
+
+    def get_id(self, store: storage.Storage) -> int:
+        with self._lock:
+            expired = time.monotonic() - self._resolved_at > self.ttl
+            if self._machine_id is None or expired:
+                m = zeek_benchmarker.machine.get_machine()
+                self._machine_id = store.get_or_create_machine(m).id
+                self._resolved_at = time.monotonic()
+
+            return self._machine_id
+
+
 def create_app(*, config=None):
     """
     Create the zeek-benchmarker app.
@@ -178,6 +274,22 @@ def create_app(*, config=None):
     if config:
         app.config.update(config)
 
+    def get_storage() -> storage.Storage:
+        """
+        The app's Storage, keeping a single database connection per process.
+        """
+        if "storage" not in app.extensions:
+            app.extensions["storage"] = storage.Storage(app.config["DATABASE_FILE"])
+
+        return app.extensions["storage"]
+
+    machine_cache = MachineCache(ttl=app.config.get("MACHINE_CACHE_TTL", 3600))
+    app.extensions["machine_cache"] = machine_cache
+
+    # Signal handlers can only be installed from the main thread.
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGHUP, machine_cache.invalidate)
+
     @app.route("/zeek", methods=["POST"])
     def zeek():
         req_vals = parse_request(request)
@@ -187,16 +299,51 @@ def create_app(*, config=None):
         job = enqueue_job(zeek_benchmarker.tasks.zeek_job, req_vals)
 
         # Store information about this job, too.
-        store = storage.Storage(app.config["DATABASE_FILE"])
+        store = get_storage()
 
         # Store the machine information with the job. The assumption
         # here is that the system serving the API is also executing
         # the job. Otherwise this would need to move into tasks.py.
-        machine = store.get_or_create_machine(zeek_benchmarker.machine.get_machine())
         store.store_job(
             job_id=job.id,
             kind="zeek",
-            machine_id=machine.id,
+            machine_id=machine_cache.get_id(store),
+            req_vals=req_vals,
+        )
+
+        return jsonify(
+            {
+                "job": {
+                    "id": job.id,
+                    "enqueued_at": job.enqueued_at,
+                }
+            }
+        )
+
+    @app.route("/zeek/<job_id>/processing-times", methods=["GET"])
+    def zeek_processing_times(job_id: str):
+        """
+        Elapsed times of a job's tests with and without Zeek's startup cost.
+        """
+        store = get_storage()
+        return jsonify(
+            {
+                "job": {"id": job_id},
+                "tests": store.get_zeek_processing_times(job_id),
+            }
+        )
+
+    @app.route("/zeek-ab", methods=["POST"])
+    def zeek_ab():
+        store = get_storage()
+        req_vals = parse_ab_request(request, store)
+
+        job = enqueue_job(zeek_benchmarker.tasks.zeek_ab_job, req_vals)
+
+        store.store_job(
+            job_id=job.id,
+            kind="zeek-ab",
+            machine_id=machine_cache.get_id(store),
             req_vals=req_vals,
         )
 
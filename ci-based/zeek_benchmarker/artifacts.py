@@ -0,0 +1,155 @@
+"""
+Content-addressed store for downloaded build artifacts.
+
+Artifacts are stored as ``<path>/<sha256>`` once their checksum has been
+verified. The modification time of an entry is bumped whenever it is used
+and serves as the LRU timestamp when evicting entries to stay below the
+configured size limit.
+"""
+
+import contextlib
+import logging
+import os
+import pathlib
+import re
+import shutil
+import typing
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_sha256(s: str | None) -> bool:
+    """
+    Is s a lower-case hex encoded sha256 digest?
+    """
+    return bool(_SHA256_RE.match(s or ""))
+
+
+def _link_or_copy(src: pathlib.Path, dst: pathlib.Path):
+    """
+    Hard-link src to dst, falling back to copying when src and dst
+    are on different filesystems or hard links aren't supported.
+    """
+    with contextlib.suppress(FileNotFoundError):
+        dst.unlink()
+
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        logger.debug("Failed to link %s to %s (%s), copying", src, dst, e)
+        shutil.copyfile(src, dst)
+
+
+class ArtifactCache:
+    def __init__(self, path: pathlib.Path, max_bytes: int):
+        self._path = pathlib.Path(path)
+        self._max_bytes = max_bytes
+        self._path.mkdir(parents=True, exist_ok=True)
+
+    def entry_path(self, sha256: str) -> pathlib.Path:
+        """
+        Path of the cache entry for sha256.
+        """
+        if not is_sha256(sha256):
+            raise ValueError(f"invalid sha256: {sha256!r}")
+
+        return self._path / sha256
+
+    def __contains__(self, sha256: str) -> bool:
+        return self.entry_path(sha256).exists()
+
+    def get(self, sha256: str, dest: pathlib.Path) -> bool:
+        """
+        Place the artifact with the given sha256 at dest.
+
+        Returns False if there's no such entry.
+        """
+        entry = self.entry_path(sha256)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+
+        _link_or_copy(entry, dest)
+        return True
+
+    def put(self, sha256: str, src: pathlib.Path):
+        """
+        Add src as the artifact with the given sha256.
+
+        The caller is responsible for having verified the checksum.
+        """
+        entry = self.entry_path(sha256)
+        size = src.stat().st_size
+        if size > self._max_bytes:
+            logger.warning(
+                "Not caching %s: %d bytes exceed cache size %d",
+                sha256,
+                size,
+                self._max_bytes,
+            )
+            return
+
+        tmp = self._path / f".{sha256}.{os.getpid()}.tmp"
+        _link_or_copy(src, tmp)
+        os.replace(tmp, entry)
+        os.utime(entry)
+
+        self.evict(keep=sha256)
+
+    def entries(self) -> list[tuple[pathlib.Path, os.stat_result]]:
+        """
+        All entries, least recently used first.
+        """
+        result = []
+        for p in self._path.iterdir():
+            if not _SHA256_RE.match(p.name):
+                continue
+
+            with contextlib.suppress(FileNotFoundError):
+                result.append((p, p.stat()))
+
+        return sorted(result, key=lambda e: e[1].st_mtime)
+
+    def evict(self, keep: str | None = None):
+        """
+        Remove least recently used entries until the cache
+        is below its size limit.
+        """
+        entries = self.entries()
+        total = sum(st.st_size for _, st in entries)
+        for p, st in entries:
+            if total <= self._max_bytes:
+                break
+
+            if p.name == keep:
+                continue
+
+            logger.info("Evicting cached artifact %s (%d bytes)", p.name, st.st_size)
+            with contextlib.suppress(FileNotFoundError):
+                p.unlink()
+
+            total -= st.st_size
+
+
+_cache: typing.Optional[ArtifactCache] = None
+
+
+def get() -> ArtifactCache | None:
+    """
+    Get the ArtifactCache singleton, or None if ARTIFACT_CACHE_DIR
+    isn't configured.
+    """
+    global _cache
+    cfg = config.get()
+    if _cache is None and cfg.artifact_cache_dir:
+        _cache = ArtifactCache(
+            pathlib.Path(cfg.artifact_cache_dir),
+            cfg.artifact_cache_max_bytes,
+        )
+
+    return _cache
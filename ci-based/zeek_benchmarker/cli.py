@@ -0,0 +1,143 @@
+"""
+Maintenance commands for the results database.
+
+    python -m zeek_benchmarker.cli snapshot <dest>
+    python -m zeek_benchmarker.cli backfill-summaries [--overwrite]
+    python -m zeek_benchmarker.cli retention [--days N] [--dry-run]
+    python -m zeek_benchmarker.cli calibration-reset [--machine-id N] [--cpu-slot S]
+    python -m zeek_benchmarker.cli export <dest> [--format parquet|arrow]
+
+The database defaults to DATABASE_FILE of the config.
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from . import config, export, storage
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot(args: argparse.Namespace) -> int:
+    storage.snapshot(args.database, args.dest)
+    logger.info("Wrote snapshot of %s to %s", args.database, args.dest)
+    return 0
+
+
+def backfill_summaries(args: argparse.Namespace) -> int:
+    store = storage.Storage(args.database)
+    count = store.backfill_zeek_test_summaries(overwrite=args.overwrite)
+    logger.info("Updated summaries of %d tests", count)
+    return 0
+
+
+def retention(args: argparse.Namespace) -> int:
+    cfg = config.get()
+    days = args.days if args.days is not None else cfg.retention_days
+    keep_branches = args.keep_branch or cfg.retention_keep_branches
+    before = int(time.time()) - days * 24 * 3600
+
+    store = storage.Storage(args.database)
+    result = store.apply_retention(
+        before=before, keep_branches=keep_branches, dry_run=args.dry_run
+    )
+    logger.info(
+        "%s %d runs of %d tests older than %d days, reclaimed %d bytes",
+        "Would roll up" if args.dry_run else "Rolled up",
+        result.runs,
+        result.tests,
+        days,
+        result.reclaimed_bytes,
+    )
+    return 0
+
+
+def calibration_reset(args: argparse.Namespace) -> int:
+    store = storage.Storage(args.database)
+    count = store.reset_calibration_reference(
+        machine_id=args.machine_id, cpu_slot=args.cpu_slot
+    )
+    logger.info("Removed %d calibrations from the reference", count)
+    return 0
+
+
+def export_runs(args: argparse.Namespace) -> int:
+    try:
+        result = export.export(
+            args.database, args.dest, fmt=args.format, batch_size=args.batch_size
+        )
+    except export.Error as e:
+        logger.error("%s", e)
+        return 1
+
+    logger.info(
+        "Exported %d runs into %d files, last id %d",
+        result.runs,
+        result.files,
+        result.last_id,
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser()
+    p.add_argument("--database", help="defaults to DATABASE_FILE")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    snap = sub.add_parser(
+        "snapshot", help="write a consistent read-only copy of the database"
+    )
+    snap.add_argument("dest")
+    snap.set_defaults(func=snapshot)
+
+    backfill = sub.add_parser(
+        "backfill-summaries", help="populate zeek_test_summaries for existing jobs"
+    )
+    backfill.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="also recompute tests that have summaries",
+    )
+    backfill.set_defaults(func=backfill_summaries)
+
+    ret = sub.add_parser(
+        "retention", help="roll up and delete old runs of non-kept branches"
+    )
+    ret.add_argument("--days", type=int, help="defaults to RETENTION_DAYS")
+    ret.add_argument(
+        "--keep-branch",
+        action="append",
+        help="defaults to RETENTION_KEEP_BRANCHES, can be repeated",
+    )
+    ret.add_argument("--dry-run", action="store_true")
+    ret.set_defaults(func=retention)
+
+    reset = sub.add_parser(
+        "calibration-reset",
+        help="let the next calibrations form a new reference, e.g. after a "
+        "hardware change",
+    )
+    reset.add_argument("--machine-id", type=int, help="defaults to all machines")
+    reset.add_argument("--cpu-slot", help="defaults to all CPU slots")
+    reset.set_defaults(func=calibration_reset)
+
+    exp = sub.add_parser(
+        "export", help="export new runs into partitioned Parquet or Arrow files"
+    )
+    exp.add_argument("dest")
+    exp.add_argument("--format", choices=sorted(export.FORMATS), default="parquet")
+    exp.add_argument("--batch-size", type=int, default=100_000)
+    exp.set_defaults(func=export_runs)
+
+    args = p.parse_args(argv)
+    if args.database is None:
+        args.database = config.get()["DATABASE_FILE"]
+
+    logging.basicConfig(level=logging.INFO)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
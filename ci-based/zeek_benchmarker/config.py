@@ -25,14 +25,167 @@ class Config:
     def tar_timeout(self) -> str:
         return self._d.get("TAR_TIMEOUT", 20)
 
+    @property
+    def artifact_cache_dir(self) -> str | None:
+        return self._d.get("ARTIFACT_CACHE_DIR")
+
+    @property
+    def artifact_cache_max_bytes(self) -> int:
+        return int(self._d.get("ARTIFACT_CACHE_MAX_BYTES", 10 * 1024**3))
+
+    @property
+    def install_cache_max_count(self) -> int:
+        return int(self._d.get("INSTALL_CACHE_MAX_COUNT", 0))
+
+    @property
+    def install_cache_max_bytes(self) -> int | None:
+        value = self._d.get("INSTALL_CACHE_MAX_BYTES")
+        return int(value) if value is not None else None
+
+    @property
+    def install_cache_index(self) -> str:
+        default = os.path.join(self.work_dir, "install-volumes.json")
+        return self._d.get("INSTALL_CACHE_INDEX", default)
+
+    @property
+    def stream_builds(self) -> bool:
+        return bool(self._d.get("STREAM_BUILDS", False))
+
+    @property
+    def prefetch_next_job(self) -> bool:
+        return bool(self._d.get("PREFETCH_NEXT_JOB", False))
+
+    @property
+    def prefetch_max_bytes_per_sec(self) -> int:
+        return int(self._d.get("PREFETCH_MAX_BYTES_PER_SEC", 20 * 1024**2))
+
+    @property
+    def container_reuse(self) -> bool:
+        return bool(self._d.get("CONTAINER_REUSE", False))
+
+    @property
+    def perf_stat_events(self) -> str | None:
+        """
+        Comma separated perf stat events if PERF_STAT is enabled.
+        """
+        if not self._d.get("PERF_STAT", False):
+            return None
+
+        default = ",".join(
+            [
+                "instructions",
+                "cycles",
+                "branches",
+                "branch-misses",
+                "cache-misses",
+                "context-switches",
+            ]
+        )
+        return self._d.get("PERF_STAT_EVENTS", default)
+
+    @property
+    def count_log_records(self) -> bool:
+        return bool(self._d.get("COUNT_LOG_RECORDS", False))
+
+    @property
+    def cpu_slots(self) -> list[list[int]]:
+        """
+        CPU_SET is either a list of CPUs used for all tests, or a
+        list of lists, each describing an independent slot of CPUs
+        that tests can run on concurrently.
+        """
+        cpu_set = self._d["CPU_SET"]
+        if all(isinstance(c, list) for c in cpu_set):
+            return [[int(c) for c in slot] for slot in cpu_set]
+
+        return [[int(c) for c in cpu_set]]
+
+    @property
+    def cpu_slot_size(self) -> int | None:
+        value = self._d.get("CPU_SLOT_SIZE")
+        return int(value) if value else None
+
+    @property
+    def cpu_set(self) -> list[int]:
+        return [c for slot in self.cpu_slots for c in slot]
+
     @property
     def zeek_cpus(self) -> str:
-        return ",".join(str(c) for c in self._d["CPU_SET"])
+        return ",".join(str(c) for c in self.cpu_slots[0])
 
     @property
     def run_count(self) -> int:
         return self._d["RUN_COUNT"]
 
+    @property
+    def target_rel_ci(self) -> float | None:
+        """
+        Relative half width of the 95% confidence interval of the mean
+        elapsed time at which adaptive runs stop. None disables them.
+        """
+        value = self._d.get("TARGET_REL_CI")
+        return float(value) if value is not None else None
+
+    @property
+    def min_run_count(self) -> int:
+        return int(self._d.get("MIN_RUN_COUNT", 3))
+
+    @property
+    def max_run_count(self) -> int:
+        return int(self._d.get("MAX_RUN_COUNT", 20))
+
+    @property
+    def outlier_threshold(self) -> float:
+        """
+        Modified z-score above which runs are flagged as outliers,
+        0 disables outlier detection.
+        """
+        return float(self._d.get("OUTLIER_THRESHOLD", 3.5))
+
+    @property
+    def calibrate(self) -> bool:
+        return bool(self._d.get("CALIBRATE", False))
+
+    @property
+    def calibration_history(self) -> int:
+        return int(self._d.get("CALIBRATION_HISTORY", 10))
+
+    @property
+    def calibration_drift_threshold(self) -> float:
+        return float(self._d.get("CALIBRATION_DRIFT_THRESHOLD", 0.03))
+
+    @property
+    def startup_runs(self) -> int:
+        """
+        Number of startup-only runs on an empty pcap per pcap test.
+        """
+        return int(self._d.get("STARTUP_RUNS", 3))
+
+    @property
+    def test_data_dir(self) -> str | None:
+        """
+        Directory of the test_data volume as seen by the worker.
+        """
+        return self._d.get("TEST_DATA_DIR")
+
+    @property
+    def retention_days(self) -> int:
+        return int(self._d.get("RETENTION_DAYS", 90))
+
+    @property
+    def retention_keep_branches(self) -> list[str]:
+        """
+        Branches whose runs are never removed by the retention command.
+        """
+        return list(self._d.get("RETENTION_KEEP_BRANCHES", ["master"]))
+
+    @property
+    def machine_cache_ttl(self) -> int:
+        """
+        Seconds the API reuses the machines.id of the system it runs on.
+        """
+        return int(self._d.get("MACHINE_CACHE_TTL", 3600))
+
     @property
     def zeek_tests(self) -> list[dict[str, typing.Any]]:
         if self._tests_d is None:
@@ -0,0 +1,229 @@
+"""
+Columnar export of zeek_tests joined with jobs and machines.
+
+Runs are written as Parquet or Arrow IPC files partitioned by month and
+test in the Hive layout understood by pyarrow.dataset, pandas and DuckDB:
+
+    <dest>/month=2026-10/test_id=pcap-500k-syns/part-000000123456.parquet
+
+Exports are incremental: the id of the last exported run is kept in
+<dest>/_export-state.json and the next export continues after it. Each
+partition of every batch goes into its own file. Files starting with _
+or . are ignored by readers of the dataset.
+
+Requires the optional pyarrow package.
+"""
+
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import time
+import typing
+import urllib.parse
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "_export-state.json"
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Exported columns and their arrow types, test_id is the partition key.
+COLUMNS: list[tuple[str, str, str]] = [
+    # name, SQL expression, arrow type
+    ("id", "t.id", "int64"),
+    ("ts", "CAST(t.ts AS INTEGER)", "timestamp"),
+    ("job_id", "t.job_id", "string"),
+    ("test_run", "t.test_run", "int32"),
+    ("variant", "t.variant", "string"),
+    ("success", "t.success", "bool"),
+    ("warmup", "t.warmup", "bool"),
+    ("outlier", "t.outlier", "bool"),
+    ("error", "t.error", "string"),
+    ("elapsed_time", "t.elapsed_time", "float64"),
+    ("user_time", "t.user_time", "float64"),
+    ("system_time", "t.system_time", "float64"),
+    ("max_rss", "t.max_rss", "float64"),
+    ("minor_faults", "t.minor_faults", "int64"),
+    ("major_faults", "t.major_faults", "int64"),
+    ("voluntary_ctx_switches", "t.voluntary_ctx_switches", "int64"),
+    ("involuntary_ctx_switches", "t.involuntary_ctx_switches", "int64"),
+    ("block_input", "t.block_input", "int64"),
+    ("block_output", "t.block_output", "int64"),
+    ("cpu_slot", "t.cpu_slot", "string"),
+    ("sha", "t.sha", "string"),
+    ("branch", "t.branch", "string"),
+    ("job_kind", "j.kind", "string"),
+    ("build_hash", "j.build_hash", "string"),
+    ("cirrus_task_name", "j.cirrus_task_name", "string"),
+    ("cirrus_pr", "j.cirrus_pr", "int64"),
+    ("calibration_score", "j.calibration_score", "float64"),
+    ("machine_id", "j.machine_id", "int64"),
+    ("cpu_model", "m.cpu_model", "string"),
+    ("architecture", "m.architecture", "string"),
+    ("os", "m.os", "string"),
+    ("mem_total_bytes", "m.mem_total_bytes", "int64"),
+]
+
+
+class Error(Exception):
+    pass
+
+
+class ExportResult(typing.NamedTuple):
+    runs: int
+    files: int
+    last_id: int
+
+
+def schema() -> "pa.Schema":
+    types = {
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+        "string": pa.string(),
+        # Parquet has no second resolution timestamps.
+        "timestamp": pa.timestamp("ms", tz="UTC"),
+    }
+    return pa.schema([(name, types[t]) for name, _, t in COLUMNS])
+
+
+def read_state(dest: str) -> int:
+    """
+    The id of the last exported run, 0 for a new export.
+    """
+    try:
+        with open(os.path.join(dest, STATE_FILE)) as fp:
+            return int(json.load(fp)["last_id"])
+    except FileNotFoundError:
+        return 0
+
+
+def write_state(dest: str, last_id: int):
+    path = os.path.join(dest, STATE_FILE)
+    with open(f"{path}.tmp", "w") as fp:
+        json.dump({"last_id": last_id}, fp)
+    os.replace(f"{path}.tmp", path)
+
+
+def read_batches(
+    conn: sqlite3.Connection, after_id: int, batch_size: int
+) -> typing.Iterator[list[tuple]]:
+    """
+    Rows of (test_id, *COLUMNS) for runs with an id after after_id,
+    in id order and batches of batch_size rows.
+    """
+    expressions = ", ".join(expr for _, expr, _ in COLUMNS)
+    c = conn.cursor()
+    c.execute(
+        f"""SELECT t.test_id, {expressions}
+              FROM zeek_tests t
+         LEFT JOIN jobs j ON j.id = t.job_id
+         LEFT JOIN machines m ON m.id = j.machine_id
+             WHERE t.id > ?
+          ORDER BY t.id""",
+        (after_id,),
+    )
+    while rows := c.fetchmany(batch_size):
+        yield rows
+
+
+def partitions(rows: list[tuple]) -> dict[tuple[str, str], list[tuple]]:
+    """
+    Group rows of read_batches() by month of their timestamp and test_id.
+    """
+    ts_idx = 1 + [name for name, _, _ in COLUMNS].index("ts")
+    parts: dict[tuple[str, str], list[tuple]] = {}
+    for row in rows:
+        ts = row[ts_idx]
+        month = time.strftime("%Y-%m", time.gmtime(ts)) if ts is not None else "none"
+        parts.setdefault((month, row[0]), []).append(row[1:])
+
+    return parts
+
+
+def to_columns(rows: list[tuple]) -> dict[str, list]:
+    """
+    Values of the rows of a partition by column name. SQLite returns
+    booleans as 0 and 1 and timestamps as seconds, these are converted
+    to bool and datetime.
+    """
+    converters = {
+        "bool": bool,
+        "timestamp": lambda ts: datetime.datetime.fromtimestamp(
+            ts, datetime.timezone.utc
+        ),
+    }
+    columns = {}
+    for (name, _, arrow_type), values in zip(COLUMNS, zip(*rows)):
+        if arrow_type in converters:
+            convert = converters[arrow_type]
+            values = [None if v is None else convert(v) for v in values]
+        columns[name] = list(values)
+
+    return columns
+
+
+def partition_dir(dest: str, month: str, test_id: str) -> str:
+    test_id = urllib.parse.quote(test_id, safe="")
+    return os.path.join(dest, f"month={month}", f"test_id={test_id}")
+
+
+def write_file(path: str, table: "pa.Table", fmt: str):
+    directory, name = os.path.split(path)
+    tmp = os.path.join(directory, f".{name}.tmp")
+    if fmt == "parquet":
+        pq.write_table(table, tmp, compression="zstd")
+    else:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as w:
+            w.write_table(table)
+
+    os.replace(tmp, path)
+
+
+def export(
+    database: str, dest: str, fmt: str = "parquet", batch_size: int = 100_000
+) -> ExportResult:
+    """
+    Export runs of database added since the last export into dest.
+    """
+    if pa is None:
+        raise Error("exporting requires pyarrow: pip install pyarrow")
+
+    if fmt not in FORMATS:
+        raise Error(f"unknown format: {fmt}")
+
+    os.makedirs(dest, exist_ok=True)
+    last_id = read_state(dest)
+    s = schema()
+
+    runs = files = 0
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        for rows in read_batches(conn, last_id, batch_size):
+            for (month, test_id), part in partitions(rows).items():
+                table = pa.Table.from_pydict(to_columns(part), schema=s)
+
+                directory = partition_dir(dest, month, test_id)
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"part-{part[0][0]:012d}{FORMATS[fmt]}")
+                write_file(path, table, fmt)
+                files += 1
+
+            runs += len(rows)
+            last_id = rows[-1][1]
+            write_state(dest, last_id)
+            logger.info("Exported %d runs up to id %d", runs, last_id)
+    finally:
+        conn.close()
+
+    return ExportResult(runs=runs, files=files, last_id=last_id)
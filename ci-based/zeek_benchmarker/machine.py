@@ -4,8 +4,11 @@ Collect information about the running machine.
 Requires access to /sys for some of the DMI information
 """
 
+import collections
+import json
 import logging
 import platform
+import typing
 from pathlib import Path
 
 from . import models
@@ -64,6 +67,175 @@ def get_mem_total_bytes(path: Path = Path("/proc/meminfo")):
     return 0
 
 
+class CpuInfo(typing.NamedTuple):
+    """
+    Placement of a single logical CPU.
+    """
+
+    cpu: int
+    core_id: int
+    package_id: int
+    node: int
+    # Logical CPUs on the same physical core, including cpu.
+    thread_siblings: tuple[int, ...]
+    # Logical CPUs sharing the last level (L3) cache, including cpu.
+    # Empty if /sys has no L3 cache information, e.g. on many VMs.
+    l3_cpus: tuple[int, ...]
+
+    @property
+    def core(self) -> tuple[int, int]:
+        """
+        Identifier of the physical core.
+        """
+        return (self.package_id, self.core_id)
+
+
+def parse_cpu_list(text: str) -> list[int]:
+    """
+    Parse a cpulist as found in /sys, e.g. 0-3,8,10-11
+    """
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+
+    return cpus
+
+
+def get_cpu_topology(
+    cpu_path: Path = Path("/sys/devices/system/cpu"),
+    node_path: Path = Path("/sys/devices/system/node"),
+) -> list[CpuInfo]:
+    """
+    Collect the topology of all online CPUs from /sys.
+
+    Returns an empty list if the information isn't available.
+    """
+    try:
+        online = parse_cpu_list((cpu_path / "online").read_text())
+    except FileNotFoundError as e:
+        logger.warning("Could not read CPU topology: %s", e)
+        return []
+
+    cpu_nodes = {}
+    for p in sorted(node_path.glob("node[0-9]*")):
+        node = int(p.name[len("node") :])
+        for cpu in parse_cpu_list((p / "cpulist").read_text()):
+            cpu_nodes[cpu] = node
+
+    result = []
+    for cpu in online:
+        topology = cpu_path / f"cpu{cpu}" / "topology"
+
+        l3_cpus: tuple[int, ...] = ()
+        for index in (cpu_path / f"cpu{cpu}" / "cache").glob("index[0-9]*"):
+            if (index / "level").read_text().strip() == "3":
+                shared = (index / "shared_cpu_list").read_text()
+                l3_cpus = tuple(parse_cpu_list(shared))
+
+        result.append(
+            CpuInfo(
+                cpu=cpu,
+                core_id=int((topology / "core_id").read_text()),
+                package_id=int((topology / "physical_package_id").read_text()),
+                node=cpu_nodes.get(cpu, 0),
+                thread_siblings=tuple(
+                    parse_cpu_list((topology / "thread_siblings_list").read_text())
+                ),
+                l3_cpus=l3_cpus,
+            )
+        )
+
+    return result
+
+
+def check_cpu_slots(topology: list[CpuInfo], slots: list[list[int]]) -> list[str]:
+    """
+    Return problems with the placement of the given CPU slots.
+    """
+    by_cpu = {c.cpu: c for c in topology}
+    used = {cpu for slot in slots for cpu in slot}
+    problems = []
+    for slot in slots:
+        infos = [by_cpu[cpu] for cpu in slot if cpu in by_cpu]
+
+        cores = collections.Counter(c.core for c in infos)
+        if any(n > 1 for n in cores.values()):
+            problems.append(f"slot {slot} contains SMT siblings")
+
+        if len({(c.package_id, c.node) for c in infos}) > 1:
+            problems.append(f"slot {slot} spans packages or NUMA nodes")
+
+        for c in infos:
+            busy = set(c.thread_siblings) - set(slot)
+            if busy:
+                problems.append(
+                    f"slot {slot}: CPU {c.cpu} shares a core with {sorted(busy)}"
+                    + (" used by another slot" if busy <= used else "")
+                )
+
+    return problems
+
+
+def select_cpu_slots(
+    topology: list[CpuInfo], cpus: list[int], slot_size: int
+) -> list[list[int]]:
+    """
+    Group cpus into slots of slot_size CPUs.
+
+    Only one logical CPU of every physical core is used, so that
+    slots don't contend for SMT siblings. All CPUs of a slot share
+    the same package, NUMA node and L3 cache. L3 domains with fewer
+    CPUs outside of cpus, which may be busy with other work, are
+    used first. CPUs without L3 cache information are grouped by
+    package and NUMA node only.
+    """
+    wanted = set(cpus)
+    by_core: dict[tuple[int, int], CpuInfo] = {}
+    for c in sorted(topology, key=lambda c: c.cpu):
+        if c.cpu not in wanted:
+            continue
+
+        if c.core in by_core:
+            logger.warning(
+                "Not using CPU %d, SMT sibling of %d", c.cpu, by_core[c.core].cpu
+            )
+            continue
+
+        by_core[c.core] = c
+
+    domains: dict[tuple[int, int, tuple[int, ...]], list[int]] = (
+        collections.defaultdict(list)
+    )
+    for c in by_core.values():
+        domains[(c.package_id, c.node, c.l3_cpus)].append(c.cpu)
+
+    def busy_cpus(key):
+        return len(set(key[2]) - wanted)
+
+    slots = []
+    for key in sorted(domains, key=lambda k: (busy_cpus(k), k[:2])):
+        domain_cpus = domains[key]
+        for i in range(0, len(domain_cpus) - slot_size + 1, slot_size):
+            slots.append(domain_cpus[i : i + slot_size])
+
+        leftover = len(domain_cpus) % slot_size
+        if leftover:
+            logger.warning("Not using CPUs %s", domain_cpus[-leftover:])
+
+    return slots
+
+
+def topology_to_json(topology: list[CpuInfo]) -> str:
+    return json.dumps([c._asdict() for c in topology], sort_keys=True)
+
+
 def get_machine() -> models.Machine:
     """
     Collect information for this system/machine.
@@ -76,5 +248,6 @@ def get_machine() -> models.Machine:
     kwargs["architecture"] = platform.machine()
     kwargs["cpu_model"] = get_cpu_model()
     kwargs["mem_total_bytes"] = get_mem_total_bytes()
+    kwargs["cpu_topology"] = topology_to_json(get_cpu_topology())
 
     return models.Machine(**kwargs)
@@ -25,6 +25,7 @@ class Machine(Base):
     architecture: Mapped[str]
     cpu_model: Mapped[str]
     mem_total_bytes: Mapped[int]
+    cpu_topology: Mapped[str]
 
 
 class Job(Base):
@@ -49,3 +50,7 @@ class Job(Base):
     github_check_suite_id: Mapped[str]
     repo_version: Mapped[str]
     machine_id: Mapped[int]
+    baseline_build_url: Mapped[str]
+    baseline_build_hash: Mapped[str]
+    calibration_score: Mapped[float]
+    calibration_drifted: Mapped[bool]
@@ -0,0 +1,243 @@
+"""
+Metadata of the pcaps used by tests.
+
+Pcaps are referenced by filename in config-tests.yml. Their packet,
+byte and flow counts, capture duration and sha256 are computed once by
+memory-mapping the file and stored in the pcaps table. The entry is
+reused as long as the file's size and mtime stay the same.
+
+To index all pcaps of a directory upfront:
+
+    python -m zeek_benchmarker.pcaps index /path/to/test_data
+"""
+
+import argparse
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import typing
+
+from . import config, storage
+
+logger = logging.getLogger(__name__)
+
+
+class PcapInfo(typing.NamedTuple):
+    filename: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    packets: int
+    bytes: int  # on the wire, from the records' orig_len
+    duration: float  # seconds between the first and last packet
+    flows: int  # distinct bidirectional IP protocol, address and port tuples
+
+    @property
+    def mbits(self) -> float:
+        return self.bytes * 8 / 1e6
+
+
+# Magic of the pcap global header: endianness prefix and whether
+# the timestamp fraction is in micro- or nanoseconds.
+_MAGICS = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6),
+    b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9),
+    b"\xa1\xb2\x3c\x4d": (">", 1e-9),
+}
+
+_LINKTYPE_ETHERNET = 1
+_LINKTYPE_RAW = 101
+_LINKTYPE_LINUX_SLL = 113
+
+_ETHERTYPE_IPV4 = 0x0800
+_ETHERTYPE_IPV6 = 0x86DD
+_ETHERTYPE_VLANS = {0x8100, 0x88A8, 0x9100}
+
+# Protocols with ports at the start of their header.
+_PORT_PROTOCOLS = {6, 17, 132}  # TCP, UDP, SCTP
+
+
+def _ip_payload(linktype: int, frame: bytes) -> bytes | None:
+    """
+    The IP packet within frame, or None for other link layer payloads.
+    """
+    if linktype == _LINKTYPE_RAW:
+        return frame
+
+    if linktype == _LINKTYPE_ETHERNET:
+        offset = 12
+    elif linktype == _LINKTYPE_LINUX_SLL:
+        offset = 14
+    else:
+        return None
+
+    while len(frame) >= offset + 2:
+        ethertype = int.from_bytes(frame[offset : offset + 2], "big")
+        if ethertype in _ETHERTYPE_VLANS:
+            offset += 4
+            continue
+
+        if ethertype in (_ETHERTYPE_IPV4, _ETHERTYPE_IPV6):
+            return frame[offset + 2 :]
+
+        break
+
+    return None
+
+
+def _flow_key(packet: bytes) -> tuple | None:
+    """
+    Direction independent (protocol, endpoint, endpoint) key of an
+    IPv4 or IPv6 packet. Ports are only included for protocols that
+    have them and non-first fragments use the addresses only.
+    """
+    if not packet:
+        return None
+
+    version = packet[0] >> 4
+    if version == 4 and len(packet) >= 20:
+        ihl = (packet[0] & 0x0F) * 4
+        proto = packet[9]
+        src, dst = packet[12:16], packet[16:20]
+        first_fragment = int.from_bytes(packet[6:8], "big") & 0x1FFF == 0
+        l4 = packet[ihl:] if first_fragment else b""
+    elif version == 6 and len(packet) >= 40:
+        proto = packet[6]
+        src, dst = packet[8:24], packet[24:40]
+        l4 = packet[40:]
+    else:
+        return None
+
+    sport = dport = b""
+    if proto in _PORT_PROTOCOLS and len(l4) >= 4:
+        sport, dport = l4[0:2], l4[2:4]
+
+    a, b = (src, sport), (dst, dport)
+    return (proto, a, b) if a <= b else (proto, b, a)
+
+
+def scan(path: str, filename: str | None = None) -> PcapInfo:
+    """
+    Compute the metadata of the pcap at path in a single pass over
+    the memory-mapped file.
+
+    Raises ValueError for files that aren't classic pcap files,
+    pcapng isn't supported.
+    """
+    st = os.stat(path)
+    if st.st_size < 24:
+        raise ValueError(f"{path}: too short for a pcap file")
+
+    with (
+        open(path, "rb") as fp,
+        mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        magic = mm[0:4]
+        if magic not in _MAGICS:
+            raise ValueError(f"{path}: not a pcap file (magic {magic.hex()})")
+
+        endian, ts_unit = _MAGICS[magic]
+        (linktype,) = struct.unpack_from(endian + "I", mm, 20)
+        record_header = struct.Struct(endian + "IIII")
+        sha256 = hashlib.sha256(mm).hexdigest()
+
+        packets = total_bytes = 0
+        first_ts = last_ts = None
+        flows: set[tuple] = set()
+        offset = 24
+        while offset + record_header.size <= st.st_size:
+            ts_sec, ts_frac, incl_len, orig_len = record_header.unpack_from(mm, offset)
+            offset += record_header.size
+            if offset + incl_len > st.st_size:
+                logger.warning("%s: truncated record at offset %d", path, offset)
+                break
+
+            ts = ts_sec + ts_frac * ts_unit
+            first_ts = ts if first_ts is None else min(first_ts, ts)
+            last_ts = ts if last_ts is None else max(last_ts, ts)
+            packets += 1
+            total_bytes += orig_len
+
+            # Only headers are needed for the flow key.
+            frame = mm[offset : offset + min(incl_len, 128)]
+            offset += incl_len
+
+            ip = _ip_payload(linktype, frame)
+            key = _flow_key(ip) if ip is not None else None
+            if key is not None:
+                flows.add(key)
+
+    return PcapInfo(
+        filename=filename or os.path.basename(path),
+        size=st.st_size,
+        mtime_ns=st.st_mtime_ns,
+        sha256=sha256,
+        packets=packets,
+        bytes=total_bytes,
+        duration=last_ts - first_ts if packets else 0.0,
+        flows=len(flows),
+    )
+
+
+def index(store: "storage.Storage", directory: str, filename: str) -> PcapInfo:
+    """
+    Metadata of filename within directory, from the pcaps table if
+    the file's size and mtime didn't change, otherwise scanned and
+    stored. A changed sha256 for an existing filename is logged.
+    """
+    path = os.path.join(directory, filename)
+    st = os.stat(path)
+    cached = store.get_pcap(filename)
+    if cached and cached.size == st.st_size and cached.mtime_ns == st.st_mtime_ns:
+        return cached
+
+    logger.info("Indexing pcap %s", path)
+    info = scan(path, filename)
+    if cached and cached.sha256 != info.sha256:
+        logger.warning(
+            "Pcap %s was replaced: sha256 %s -> %s, results aren't comparable",
+            filename,
+            cached.sha256,
+            info.sha256,
+        )
+
+    store.store_pcap(info)
+    return info
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="command", required=True)
+    idx = sub.add_parser("index", help="index all pcaps of a directory")
+    idx.add_argument("directory")
+    args = p.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    store = storage.Storage(config.get()["DATABASE_FILE"])
+    rc = 0
+    for filename in sorted(os.listdir(args.directory)):
+        if not filename.endswith(".pcap"):
+            continue
+
+        try:
+            info = index(store, args.directory, filename)
+        except ValueError as e:
+            logger.error("%s", e)
+            rc = 1
+            continue
+
+        print(
+            f"{info.filename}: {info.packets} packets, {info.mbits:.1f} Mbit, "
+            f"{info.duration:.3f}s, {info.flows} flows, sha256={info.sha256}"
+        )
+
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Prefetch the build of the next queued job while the current one runs.
+
+The worker peeks at its rq queue and spawns a detached process that
+downloads, verifies and, with the install volume cache enabled, extracts
+the next job's build. That process is confined to CPUs outside of
+CPU_SET, runs with the lowest CPU and I/O priority and throttles its
+download so it doesn't disturb the running benchmarks. Once the next job
+starts, it finds the build in the artifact or install volume cache.
+
+Entry point for the background process:
+
+    python -m zeek_benchmarker.prefetch <build_url> <build_hash>
+"""
+
+import argparse
+import logging
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import typing
+
+from . import artifacts, config, tasks, volumes
+
+logger = logging.getLogger(__name__)
+
+
+def spare_cpus() -> list[int]:
+    """
+    CPUs available to this process that aren't in CPU_SET.
+    """
+    cpu_set = set(config.get().cpu_set)
+    return sorted(set(os.sched_getaffinity(0)) - cpu_set)
+
+
+def peek_next_job() -> dict[str, typing.Any] | None:
+    """
+    Return the request values of the next queued Zeek job, if any.
+
+    Must run within the rq worker.
+    """
+    import rq
+
+    current = rq.get_current_job()
+    q = rq.Queue(name=current.origin, connection=current.connection)
+    for job_id in q.get_job_ids(0, 1):
+        job = rq.job.Job.fetch(job_id, connection=current.connection)
+        if job.func_name != "zeek_benchmarker.tasks.zeek_job" or not job.args:
+            return None
+
+        return job.args[0]
+
+    return None
+
+
+def start_next() -> subprocess.Popen | None:
+    """
+    Spawn a background process preparing the next queued job's build.
+
+    Failures are logged, they should never fail the current job.
+    """
+    try:
+        req_vals = peek_next_job()
+    except Exception as e:
+        logger.warning("Failed to peek at the queue: %r", e)
+        return None
+
+    if not req_vals:
+        return None
+
+    if not artifacts.is_sha256(req_vals.get("build_hash")):
+        logger.warning(
+            "Not prefetching invalid build hash %r", req_vals.get("build_hash")
+        )
+        return None
+
+    if artifacts.get() is None and volumes.get() is None:
+        logger.warning("Prefetching requires an artifact or install volume cache")
+        return None
+
+    cpus = spare_cpus()
+    if not cpus:
+        logger.warning("No CPUs outside of CPU_SET available for prefetching")
+        return None
+
+    def confine():
+        os.sched_setaffinity(0, cpus)
+        os.nice(19)
+
+    cmd = [
+        sys.executable,
+        "-m",
+        "zeek_benchmarker.prefetch",
+        req_vals["build_url"],
+        req_vals["build_hash"],
+    ]
+
+    # Idle I/O scheduling class, if ionice is around.
+    ionice = shutil.which("ionice")
+    if ionice:
+        cmd = [ionice, "-c", "3"] + cmd
+
+    logger.info("Prefetching %s on CPUs %s", req_vals["build_url"], cpus)
+
+    # A new session keeps the process alive when the rq work horse exits.
+    return subprocess.Popen(
+        cmd,
+        preexec_fn=confine,
+        start_new_session=True,
+        stdin=subprocess.DEVNULL,
+    )
+
+
+def prefetch(build_url: str, build_hash: str):
+    """
+    Prepare the build for a queued job.
+    """
+    cfg = config.get()
+    job = tasks.ZeekJob(
+        build_url=build_url,
+        build_hash=build_hash,
+        original_branch="",
+        normalized_branch="",
+        commit=None,
+        job_id=f"prefetch-{build_hash[:16]}",
+        sha256=build_hash,
+    )
+    job.job_dir = (pathlib.Path(cfg.work_dir) / job.job_id).absolute()
+    job.job_dir.mkdir(parents=True, exist_ok=True)
+    job.build_filename = pathlib.Path(build_url).parts[-1]
+    job.build_path = job.job_dir / job.build_filename
+
+    try:
+        job.prepare_install(prefetching=True)
+    finally:
+        shutil.rmtree(job.job_dir, ignore_errors=True)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("build_url")
+    p.add_argument("build_hash")
+    args = p.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    try:
+        prefetch(args.build_url, args.build_hash)
+    except Exception:
+        logger.exception("Prefetching %s failed", args.build_url)
+        return 1
+
+    logger.info("Prefetched %s", args.build_url)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
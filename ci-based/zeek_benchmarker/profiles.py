@@ -0,0 +1,240 @@
+"""
+Collapsed stack profiles of profiled test runs and script profiles.
+
+A profiled run executes Zeek under perf record, the sampled stacks are
+collapsed within the container (scripts/stackcollapse-perf.py) and stored
+gzip compressed in the zeek_test_profiles table.
+
+The diff command renders a differential flamegraph of a test between
+two jobs. It writes the two-column folded format understood by
+FlameGraph's flamegraph.pl, or the SVG if --flamegraph points at it:
+
+    python -m zeek_benchmarker.profiles diff <job_a> <job_b> <test_id>
+
+Script profiles are produced by Zeek's --profile-scripts in an extra
+run of a microbenchmark and stored per function and body in the
+zeek_script_profiles table.
+"""
+
+import argparse
+import base64
+import gzip
+import logging
+import subprocess
+import sys
+import typing
+
+from . import config, storage
+
+logger = logging.getLogger(__name__)
+
+
+class CollapsedStacks(typing.NamedTuple):
+    samples: int
+    data: bytes  # gzip compressed folded stacks
+
+    @staticmethod
+    def parse_from(output: bytes) -> typing.Optional["CollapsedStacks"]:
+        """
+        Parse the COLLAPSED_STACKS= line of stackcollapse-perf.py --encode.
+
+        Returns None if there's no such line.
+        """
+        text = output.decode("utf-8", errors="replace")
+        for line in text.splitlines():
+            if not line.startswith("COLLAPSED_STACKS="):
+                continue
+
+            values = line.split("=", 1)[1]
+            kv = dict(item.split("=", 1) for item in values.split(";") if "=" in item)
+            if kv.get("v") != "1":
+                logger.warning("Unsupported COLLAPSED_STACKS version: %s", kv.get("v"))
+                return None
+
+            return CollapsedStacks(
+                samples=int(kv["samples"]),
+                data=base64.b64decode(kv["gzip_b64"]),
+            )
+
+        return None
+
+    def folded(self) -> dict[str, int]:
+        return parse_folded(gzip.decompress(self.data).decode())
+
+
+class ScriptProfileEntry(typing.NamedTuple):
+    """
+    A function or body entry of Zeek's script profiler.
+    """
+
+    function: str
+    location: str | None
+    kind: str | None  # func, event, hook, BiF, body...
+    calls: int
+    total_time: float  # seconds, including callees
+    self_time: float | None  # seconds, excluding callees
+
+
+# Column names in Zeek's --profile-scripts output for the fields of
+# ScriptProfileEntry. The header is parsed as it changed over time.
+_SCRIPT_PROFILE_COLUMNS = {
+    "function": ["function", "name"],
+    "location": ["location"],
+    "kind": ["type"],
+    "calls": ["ncall", "calls", "num_calls"],
+    "total_time": ["tot_CPU", "CPU_time"],
+    "self_time": ["CPU", "self_CPU"],
+}
+
+
+def parse_script_profile(output: bytes) -> list[ScriptProfileEntry]:
+    """
+    Parse SCRIPT_PROFILE=<line> lines containing the output of Zeek's
+    --profile-scripts, a tab separated table with a #fields header.
+
+    Returns an empty list if there's no such output.
+    """
+    text = output.decode("utf-8", errors="replace")
+    columns: dict[str, int] | None = None
+    entries = []
+    for line in text.splitlines():
+        if not line.startswith("SCRIPT_PROFILE="):
+            continue
+
+        fields = line.split("=", 1)[1].split("\t")
+        if fields[0] == "#fields":
+            names = fields[1:]
+            columns = {}
+            for field, aliases in _SCRIPT_PROFILE_COLUMNS.items():
+                for alias in aliases:
+                    if alias in names:
+                        columns[field] = names.index(alias)
+                        break
+
+            missing = {"function", "calls", "total_time"} - columns.keys()
+            if missing:
+                logger.warning(
+                    "Missing script profile columns %s in %s", missing, names
+                )
+                return []
+
+            continue
+
+        if columns is None or fields[0].startswith("#"):
+            continue
+
+        def get(field: str) -> str | None:
+            idx = columns.get(field)
+            return fields[idx] if idx is not None and idx < len(fields) else None
+
+        try:
+            self_time = get("self_time")
+            entries.append(
+                ScriptProfileEntry(
+                    function=get("function"),
+                    location=get("location"),
+                    kind=get("kind"),
+                    calls=int(get("calls")),
+                    total_time=float(get("total_time")),
+                    self_time=float(self_time) if self_time else None,
+                )
+            )
+        except (TypeError, ValueError):
+            logger.warning("Unexpected script profile line: %r", line)
+
+    return entries
+
+
+def parse_folded(text: str) -> dict[str, int]:
+    """
+    Parse folded stacks, one "frame;frame;... count" per line.
+    """
+    stacks: dict[str, int] = {}
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] = stacks.get(stack, 0) + int(count)
+
+    return stacks
+
+
+def diff_folded(a: dict[str, int], b: dict[str, int], normalize: bool = False) -> str:
+    """
+    Two-column folded stacks "stack count_a count_b" for flamegraph.pl.
+
+    With normalize, counts of b are scaled to the total of a so that
+    profiles with different sample counts can be compared.
+    """
+    scale = 1.0
+    if normalize and sum(b.values()):
+        scale = sum(a.values()) / sum(b.values())
+
+    lines = []
+    for stack in sorted(a.keys() | b.keys()):
+        count_b = round(b.get(stack, 0) * scale)
+        lines.append(f"{stack} {a.get(stack, 0)} {count_b}\n")
+
+    return "".join(lines)
+
+
+def render(folded: str, flamegraph: str, title: str) -> bytes:
+    """
+    Render folded stacks into an SVG using FlameGraph's flamegraph.pl.
+    """
+    proc = subprocess.run(
+        [flamegraph, "--title", title],
+        input=folded.encode(),
+        capture_output=True,
+        check=True,
+    )
+    return proc.stdout
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="command", required=True)
+    diff = sub.add_parser("diff", help="differential flamegraph of two jobs")
+    diff.add_argument("job_a", help="job before the change")
+    diff.add_argument("job_b", help="job after the change")
+    diff.add_argument("test_id")
+    diff.add_argument("--variant-a", default=None)
+    diff.add_argument("--variant-b", default=None)
+    diff.add_argument(
+        "--normalize",
+        action="store_true",
+        help="scale samples of job_b to the total of job_a",
+    )
+    diff.add_argument("--flamegraph", help="path to flamegraph.pl to render an SVG")
+    diff.add_argument("-o", "--output", default="-")
+    args = p.parse_args(argv)
+
+    logging.basicConfig()
+
+    store = storage.Storage(config.get()["DATABASE_FILE"])
+    profiles = []
+    for job_id, variant in [(args.job_a, args.variant_a), (args.job_b, args.variant_b)]:
+        stacks = store.get_zeek_profile(
+            job_id=job_id, test_id=args.test_id, variant=variant
+        )
+        if stacks is None:
+            logger.error("No profile for %s in job %s", args.test_id, job_id)
+            return 1
+
+        profiles.append(stacks.folded())
+
+    result = diff_folded(*profiles, normalize=args.normalize).encode()
+    if args.flamegraph:
+        title = f"{args.test_id}: {args.job_a} vs {args.job_b}"
+        result = render(result.decode(), args.flamegraph, title)
+
+    if args.output == "-":
+        sys.stdout.buffer.write(result)
+    else:
+        with open(args.output, "wb") as fp:
+            fp.write(result)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Small statistics helpers for deciding about and summarizing runs.
+
+Only the standard library is used: Student's t quantiles for 95%
+confidence intervals come from a table rather than scipy.
+"""
+
+import bisect
+import math
+import statistics
+import typing
+
+# Two-sided 95% critical values of Student's t distribution by degrees
+# of freedom. Degrees of freedom between entries use the next lower
+# entry, which errs on the side of a wider interval.
+_T95 = {
+    1: 12.706,
+    2: 4.303,
+    3: 3.182,
+    4: 2.776,
+    5: 2.571,
+    6: 2.447,
+    7: 2.365,
+    8: 2.306,
+    9: 2.262,
+    10: 2.228,
+    11: 2.201,
+    12: 2.179,
+    13: 2.160,
+    14: 2.145,
+    15: 2.131,
+    16: 2.120,
+    17: 2.110,
+    18: 2.101,
+    19: 2.093,
+    20: 2.086,
+    25: 2.060,
+    30: 2.042,
+    40: 2.021,
+    60: 2.000,
+    120: 1.980,
+}
+_T95_DFS = sorted(_T95)
+_Z95 = 1.960
+
+
+def t95(df: int) -> float:
+    """
+    Two-sided 95% critical value of Student's t for df degrees of freedom.
+    """
+    if df < 1:
+        raise ValueError(f"invalid degrees of freedom: {df}")
+
+    if df > _T95_DFS[-1]:
+        return _Z95
+
+    return _T95[_T95_DFS[bisect.bisect_right(_T95_DFS, df) - 1]]
+
+
+class MeanCI(typing.NamedTuple):
+    n: int
+    mean: float
+    half_width: float  # of the 95% confidence interval
+
+    @property
+    def relative(self) -> float:
+        """
+        Half width of the confidence interval relative to the mean.
+        """
+        if self.mean == 0:
+            return 0.0 if self.half_width == 0 else math.inf
+
+        return self.half_width / abs(self.mean)
+
+
+def mean_ci(values: typing.Sequence[float]) -> MeanCI:
+    """
+    Mean of values and the half width of its 95% confidence interval.
+
+    Requires at least two values.
+    """
+    n = len(values)
+    if n < 2:
+        raise ValueError(f"need at least two values, got {n}")
+
+    mean = statistics.fmean(values)
+    stderr = statistics.stdev(values, xbar=mean) / math.sqrt(n)
+    return MeanCI(n=n, mean=mean, half_width=t95(n - 1) * stderr)
+
+
+class PairedDelta(typing.NamedTuple):
+    n: int
+    baseline_mean: float
+    candidate_mean: float
+    delta: float  # mean of the candidate - baseline differences
+    half_width: float  # of the 95% confidence interval of delta
+
+    @property
+    def relative(self) -> float:
+        """
+        Delta relative to the baseline mean.
+        """
+        return self.delta / self.baseline_mean if self.baseline_mean else math.nan
+
+    @property
+    def relative_half_width(self) -> float:
+        """
+        Half width of the delta's confidence interval relative
+        to the baseline mean.
+        """
+        return self.half_width / self.baseline_mean if self.baseline_mean else math.nan
+
+
+def paired_delta(
+    baseline: typing.Sequence[float], candidate: typing.Sequence[float]
+) -> PairedDelta:
+    """
+    Mean difference between paired candidate and baseline values
+    and its 95% confidence interval.
+
+    Pairing the values cancels out drift that affects both
+    values of a pair in the same way.
+    """
+    if len(baseline) != len(candidate):
+        raise ValueError(f"unpaired values: {len(baseline)} != {len(candidate)}")
+
+    ci = mean_ci([c - b for b, c in zip(baseline, candidate)])
+    return PairedDelta(
+        n=ci.n,
+        baseline_mean=statistics.fmean(baseline),
+        candidate_mean=statistics.fmean(candidate),
+        delta=ci.mean,
+        half_width=ci.half_width,
+    )
+
+
+def mad_outliers(values: typing.Sequence[float], threshold: float = 3.5) -> list[bool]:
+    """
+    Flag values whose modified z-score, based on the median absolute
+    deviation (MAD), exceeds threshold (Iglewicz and Hoaglin).
+
+    If more than half of the values are equal, the MAD is zero
+    and nothing is flagged.
+    """
+    if len(values) < 3:
+        return [False] * len(values)
+
+    median = statistics.median(values)
+    mad = statistics.median([abs(v - median) for v in values])
+    if mad == 0:
+        return [False] * len(values)
+
+    return [0.6745 * abs(v - median) / mad > threshold for v in values]
+
+
+class Summary(typing.NamedTuple):
+    n: int
+    mean: float
+    median: float
+    stddev: float | None  # sample standard deviation, None for a single value
+    min: float
+    max: float
+    p95: float
+
+
+def summarize(values: typing.Sequence[float]) -> Summary:
+    """
+    Summary statistics of values. The 95th percentile is
+    interpolated between the closest values.
+    """
+    n = len(values)
+    if n == 0:
+        raise ValueError("need at least one value")
+
+    mean = statistics.fmean(values)
+    p95 = (
+        values[0]
+        if n == 1
+        else statistics.quantiles(values, n=20, method="inclusive")[18]
+    )
+    return Summary(
+        n=n,
+        mean=mean,
+        median=statistics.median(values),
+        stddev=statistics.stdev(values, xbar=mean) if n > 1 else None,
+        min=min(values),
+        max=max(values),
+        p95=p95,
+    )
@@ -4,7 +4,12 @@ Tiny storage abstraction.
 Really using sqlite directly, but this allows to test it some.
 """
 
+import contextlib
+import logging
+import math
+import os
 import sqlite3
+import threading
 import typing
 
 import sqlalchemy as sa
@@ -13,6 +18,31 @@ import zeek_benchmarker.tasks
 
 from . import config, models
 
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for locks held by other connections, e.g. the API
+# and Grafana, before failing with "database is locked".
+BUSY_TIMEOUT = 30.0
+
+# Pragmas for every connection. The journal mode is persistent and
+# also set by a migration, WAL allows reading while the worker writes.
+# With WAL, synchronous=NORMAL only syncs at checkpoints.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(BUSY_TIMEOUT * 1000),
+    "cache_size": -16384,  # KiB
+    "temp_store": "MEMORY",
+}
+
+
+def configure_connection(conn: sqlite3.Connection):
+    """
+    Apply PRAGMAS to a new connection.
+    """
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+
 
 def get_engine(url: str) -> sa.Engine:
     """
@@ -20,7 +50,61 @@ def get_engine(url: str) -> sa.Engine:
     """
     if "://" not in url:
         url = f"sqlite:///{url}"
-    return sa.create_engine(url)
+
+    engine = sa.create_engine(url)
+    if engine.dialect.name == "sqlite":
+        sa.event.listen(
+            engine,
+            "connect",
+            lambda dbapi_conn, _: configure_connection(dbapi_conn),
+        )
+
+    return engine
+
+
+def snapshot(filename: str, dest: str):
+    """
+    Write a consistent copy of the database at filename to dest using
+    SQLite's online backup API.
+
+    The copy is made within a single read transaction, so in WAL mode it
+    doesn't block writers. The snapshot uses the rollback journal mode
+    so it can be read from read-only mounts without -wal and -shm files,
+    and it replaces dest atomically.
+    """
+    tmp = f"{dest}.tmp"
+    src = sqlite3.connect(f"file:{filename}?mode=ro", uri=True, timeout=BUSY_TIMEOUT)
+    try:
+        dst = sqlite3.connect(tmp)
+        try:
+            src.backup(dst)
+            dst.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dst.close()
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    finally:
+        src.close()
+
+    os.replace(tmp, dest)
+
+
+# zeek_tests columns summarized in zeek_test_summaries.
+SUMMARY_METRICS = ["elapsed_time", "user_time", "system_time", "max_rss"]
+
+
+class Build(typing.NamedTuple):
+    build_url: str
+    branch: str
+    sha: str
+
+
+class RetentionResult(typing.NamedTuple):
+    tests: int  # job and test pairs rolled up
+    runs: int  # zeek_tests rows deleted
+    reclaimed_bytes: int
 
 
 class Storage:
@@ -28,6 +112,117 @@ class Storage:
         self._filename = filename
         self.Session = sa.orm.sessionmaker(get_engine(self._filename))
 
+        # A single connection per process, shared by threads running
+        # tests concurrently. Rows stored within batch() are kept in
+        # _pending and written with the next transaction.
+        self._lock = threading.RLock()
+        self._conn: sqlite3.Connection | None = None
+        self._conn_pid: int | None = None
+        self._batch_depth = 0
+        self._pending: list[typing.Callable[[sqlite3.Cursor], None]] = []
+
+    @contextlib.contextmanager
+    def _connection(self) -> typing.Iterator[sqlite3.Connection]:
+        """
+        The process' connection within a transaction that's committed
+        when the block exits without an exception. Pending rows of
+        batches are written first.
+        """
+        with self._lock:
+            # Don't use a connection inherited from a parent process.
+            if self._conn is None or self._conn_pid != os.getpid():
+                self._conn = sqlite3.connect(
+                    self._filename, timeout=BUSY_TIMEOUT, check_same_thread=False
+                )
+                configure_connection(self._conn)
+                self._conn_pid = os.getpid()
+
+            self._write_pending()
+            with self._conn:
+                yield self._conn
+
+    def _write_pending(self):
+        """
+        Write the rows buffered by batches in a single transaction.
+
+        Failures don't propagate to the caller, which may be unrelated to
+        the buffered rows. Instead, every row is retried in a transaction
+        of its own. Rows failing with an OperationalError, like a locked
+        database, are kept for the next transaction, others are logged
+        and dropped.
+        """
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        try:
+            with self._conn:
+                c = self._conn.cursor()
+                for write in pending:
+                    write(c)
+            return
+        except sqlite3.Error as e:
+            logger.warning("Writing %d buffered rows failed: %r", len(pending), e)
+
+        for write in pending:
+            try:
+                with self._conn:
+                    write(self._conn.cursor())
+            except sqlite3.OperationalError as e:
+                logger.warning("Keeping buffered row for retry: %r", e)
+                self._pending.append(write)
+            except sqlite3.Error as e:
+                logger.error("Dropping buffered row: %r", e)
+
+    def _write(self, write: typing.Callable[[sqlite3.Cursor], None]):
+        """
+        Execute write in its own transaction, or defer it if a batch is active.
+        """
+        with self._lock:
+            if self._batch_depth:
+                self._pending.append(write)
+                return
+
+            with self._connection() as conn:
+                write(conn.cursor())
+
+    @contextlib.contextmanager
+    def batch(self) -> typing.Iterator["Storage"]:
+        """
+        Buffer results and errors stored within the block and write
+        them in a single transaction when the block exits, also when
+        it's left with an exception. Other writes within the block
+        flush the buffered rows first.
+        """
+        with self._lock:
+            self._batch_depth += 1
+
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+
+            self.flush()
+
+    def flush(self):
+        """
+        Write buffered rows.
+        """
+        with self._connection():
+            pass
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self._pending:
+                logger.error("Dropping %d unwritten rows", len(self._pending))
+                self._pending = []
+
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
     def store_job(
         self,
         *,
@@ -36,7 +231,7 @@ class Storage:
         machine_id: int,
         req_vals: dict[str, typing.Any],
     ):
-        with sqlite3.connect(self._filename) as conn:
+        with self._connection() as conn:
             c = conn.cursor()
             sql = """INSERT INTO jobs (
                          id,
@@ -54,7 +249,9 @@ class Storage:
                          cirrus_pr,
                          github_check_suite_id,
                          repo_version,
-                         machine_id
+                         machine_id,
+                         baseline_build_url,
+                         baseline_build_hash
                     ) VALUES (
                         :id,
                         :kind,
@@ -71,9 +268,13 @@ class Storage:
                         :cirrus_pr,
                         :github_check_suite_id,
                         :repo_version,
-                        :machine_id
+                        :machine_id,
+                        :baseline_build_url,
+                        :baseline_build_hash
                     )"""
             data = req_vals.copy()
+            data.setdefault("baseline_build_url", None)
+            data.setdefault("baseline_build_hash", None)
             data["id"] = job_id
             data["sha"] = req_vals["commit"]
             data["kind"] = kind
@@ -86,12 +287,15 @@ class Storage:
         job: "zeek_benchmarker.tasks.ZeekJob",
         test: "zeek_benchmarker.tasks.ZeekTest",
         result: "zeek_benchmarker.tasks.ZeekTestResult",
+        cpu_slot: str | None = None,
+        variant: str | None = None,
+        warmup: bool = False,
     ):
         """
         Store a results entry into the zeek_tests table.
         """
-        with sqlite3.connect(self._filename) as conn:
-            c = conn.cursor()
+
+        def write(c: sqlite3.Cursor):
             sql = """INSERT INTO zeek_tests (
                          job_id,
                          test_id,
@@ -102,7 +306,16 @@ class Storage:
                          max_rss,
                          sha,
                          branch,
-                         success
+                         success,
+                         cpu_slot,
+                         minor_faults,
+                         major_faults,
+                         voluntary_ctx_switches,
+                         involuntary_ctx_switches,
+                         block_input,
+                         block_output,
+                         variant,
+                         warmup
                     ) VALUES (
                         :job_id,
                         :test_id,
@@ -113,15 +326,65 @@ class Storage:
                         :max_rss,
                         :sha,
                         :branch,
-                        :success
+                        :success,
+                        :cpu_slot,
+                        :minor_faults,
+                        :major_faults,
+                        :voluntary_ctx_switches,
+                        :involuntary_ctx_switches,
+                        :block_input,
+                        :block_output,
+                        :variant,
+                        :warmup
                     )"""
             data = result._asdict()
+            data["cpu_slot"] = cpu_slot
+            data["variant"] = variant
+            data["warmup"] = warmup
             data["job_id"] = job.job_id
             data["sha"] = job.commit
             data["branch"] = job.original_branch
             data["test_id"] = test.test_id
             data["success"] = True
             c.execute(sql, data)
+            zeek_test_id = c.lastrowid
+
+            if result.perf_stat is not None:
+                sql = """INSERT INTO zeek_test_perf_stats (
+                             zeek_test_id,
+                             instructions,
+                             cycles,
+                             branches,
+                             branch_misses,
+                             cache_misses,
+                             context_switches
+                        ) VALUES (
+                            :zeek_test_id,
+                            :instructions,
+                            :cycles,
+                            :branches,
+                            :branch_misses,
+                            :cache_misses,
+                            :context_switches
+                        )"""
+                data = result.perf_stat._asdict()
+                data["zeek_test_id"] = zeek_test_id
+                c.execute(sql, data)
+
+            if result.log_records:
+                c.executemany(
+                    """INSERT INTO zeek_test_log_records (
+                           zeek_test_id,
+                           stream,
+                           records
+                       ) VALUES (?, ?, ?)""",
+                    [
+                        (zeek_test_id, stream, records)
+                        for stream, records in sorted(result.log_records.items())
+                    ],
+                )
+
+        self._write(write)
 
     def store_zeek_error(
         self,
@@ -130,12 +393,15 @@ class Storage:
         test: "zeek_benchmarker.tasks.ZeekTest",  # noqa: F821
         test_run: int,
         error: str,
+        cpu_slot: str | None = None,
+        variant: str | None = None,
+        warmup: bool = False,
     ):
         """
         Set success=False and store the error message.
         """
-        with sqlite3.connect(self._filename) as conn:
-            c = conn.cursor()
+
+        def write(c: sqlite3.Cursor):
             sql = """INSERT INTO zeek_tests (
                          job_id,
                          test_id,
@@ -143,7 +409,10 @@ class Storage:
                          sha,
                          branch,
                          success,
-                         error
+                         error,
+                         cpu_slot,
+                         variant,
+                         warmup
                     ) VALUES (
                         :job_id,
                         :test_id,
@@ -151,7 +420,10 @@ class Storage:
                         :sha,
                         :branch,
                         :success,
-                        :error
+                        :error,
+                        :cpu_slot,
+                        :variant,
+                        :warmup
                     )"""
 
             data = {
@@ -162,7 +434,656 @@ class Storage:
                 "test_run": test_run,
                 "success": False,
                 "error": error,
+                "cpu_slot": cpu_slot,
+                "variant": variant,
+                "warmup": warmup,
+            }
+            c.execute(sql, data)
+
+        self._write(write)
+
+    def mark_zeek_outliers(
+        self,
+        *,
+        job: "zeek_benchmarker.tasks.ZeekJob",  # noqa: F821
+        test: "zeek_benchmarker.tasks.ZeekTest",  # noqa: F821
+        test_runs: list[int],
+        variant: str | None = None,
+    ):
+        """
+        Set outlier=True for the given non-warmup runs of test.
+        """
+        if not test_runs:
+            return
+
+        with self._connection() as conn:
+            c = conn.cursor()
+            placeholders = ", ".join("?" for _ in test_runs)
+            sql = f"""UPDATE zeek_tests
+                         SET outlier = 1
+                       WHERE job_id = ?
+                         AND test_id = ?
+                         AND variant IS ?
+                         AND NOT warmup
+                         AND test_run IN ({placeholders})"""
+            c.execute(sql, [job.job_id, test.test_id, variant, *test_runs])
+
+    def store_zeek_ab_delta(
+        self,
+        *,
+        job: "zeek_benchmarker.tasks.ZeekABJob",  # noqa: F821
+        test: "zeek_benchmarker.tasks.ZeekTest",  # noqa: F821
+        delta: "zeek_benchmarker.stats.PairedDelta",  # noqa: F821
+        workload_changed: bool | None = None,
+    ):
+        """
+        Store the difference between candidate and baseline for
+        test within an A/B job into the zeek_ab_deltas table.
+
+        workload_changed is None if log records weren't counted.
+        """
+        with self._connection() as conn:
+            c = conn.cursor()
+            sql = """INSERT INTO zeek_ab_deltas (
+                         job_id,
+                         test_id,
+                         pairs,
+                         baseline_mean,
+                         candidate_mean,
+                         delta,
+                         delta_ci,
+                         relative_delta,
+                         workload_changed
+                    ) VALUES (
+                        :job_id,
+                        :test_id,
+                        :pairs,
+                        :baseline_mean,
+                        :candidate_mean,
+                        :delta,
+                        :delta_ci,
+                        :relative_delta,
+                        :workload_changed
+                    )"""
+            relative_delta = delta.relative
+            data = {
+                "job_id": job.job_id,
+                "test_id": test.test_id,
+                "pairs": delta.n,
+                "baseline_mean": delta.baseline_mean,
+                "candidate_mean": delta.candidate_mean,
+                "delta": delta.delta,
+                "delta_ci": delta.half_width,
+                "relative_delta": None
+                if math.isnan(relative_delta)
+                else relative_delta,
+                "workload_changed": workload_changed,
+            }
+            c.execute(sql, data)
+
+    def store_zeek_profile(
+        self,
+        *,
+        job: "zeek_benchmarker.tasks.ZeekJob",
+        test: "zeek_benchmarker.tasks.ZeekTest",
+        stacks: "zeek_benchmarker.profiles.CollapsedStacks",  # noqa: F821
+        variant: str | None = None,
+    ):
+        """
+        Store the collapsed stacks of a profiled run of test.
+        """
+        with self._connection() as conn:
+            c = conn.cursor()
+            sql = """INSERT INTO zeek_test_profiles (
+                         job_id,
+                         test_id,
+                         variant,
+                         samples,
+                         folded_gz
+                    ) VALUES (
+                        :job_id,
+                        :test_id,
+                        :variant,
+                        :samples,
+                        :folded_gz
+                    )"""
+            data = {
+                "job_id": job.job_id,
+                "test_id": test.test_id,
+                "variant": variant,
+                "samples": stacks.samples,
+                "folded_gz": stacks.data,
+            }
+            c.execute(sql, data)
+
+    def store_zeek_script_profile(
+        self,
+        *,
+        job: "zeek_benchmarker.tasks.ZeekJob",
+        test: "zeek_benchmarker.tasks.ZeekTest",
+        entries: list["zeek_benchmarker.profiles.ScriptProfileEntry"],  # noqa: F821
+        variant: str | None = None,
+    ):
+        """
+        Store the entries of a script profiled run of test.
+        """
+        with self._connection() as conn:
+            c = conn.cursor()
+            sql = """INSERT INTO zeek_script_profiles (
+                         job_id,
+                         test_id,
+                         variant,
+                         function,
+                         location,
+                         kind,
+                         calls,
+                         total_time,
+                         self_time
+                    ) VALUES (
+                        :job_id,
+                        :test_id,
+                        :variant,
+                        :function,
+                        :location,
+                        :kind,
+                        :calls,
+                        :total_time,
+                        :self_time
+                    )"""
+            common = {
+                "job_id": job.job_id,
+                "test_id": test.test_id,
+                "variant": variant,
             }
+            c.executemany(sql, [e._asdict() | common for e in entries])
+
+    def get_zeek_profile(
+        self, *, job_id: str, test_id: str, variant: str | None = None
+    ) -> "zeek_benchmarker.profiles.CollapsedStacks | None":  # noqa: F821
+        """
+        The most recent collapsed stacks of test_id within job_id, if any.
+        """
+        from . import profiles
+
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute(
+                """SELECT samples, folded_gz
+                     FROM zeek_test_profiles
+                    WHERE job_id = ? AND test_id = ? AND variant IS ?
+                 ORDER BY id DESC
+                    LIMIT 1""",
+                (job_id, test_id, variant),
+            )
+            row = c.fetchone()
+
+        return profiles.CollapsedStacks(samples=row[0], data=row[1]) if row else None
+
+    def update_zeek_test_summaries(
+        self, *, job_id: str, test_id: str, variants: list[str | None] | None = None
+    ):
+        """
+        Replace the zeek_test_summaries rows of test_id within job_id,
+        one per variant and metric, with statistics over its successful
+        runs. Warmup runs and outliers are excluded.
+
+        Only the given variants are replaced, by default those that still
+        have runs. Summaries of variants whose runs were removed by
+        apply_retention() are kept.
+        """
+        from . import stats
+
+        with self._connection() as conn:
+            c = conn.cursor()
+            if variants is None:
+                c.execute(
+                    """SELECT DISTINCT variant FROM zeek_tests
+                        WHERE job_id = ? AND test_id = ?""",
+                    (job_id, test_id),
+                )
+                variants = [v for (v,) in c.fetchall()]
+
+            if not variants:
+                return
+
+            in_variants = " OR ".join("variant IS ?" for _ in variants)
+            columns = ", ".join(SUMMARY_METRICS)
+            c.execute(
+                f"""SELECT variant, {columns}
+                      FROM zeek_tests
+                     WHERE job_id = ?
+                       AND test_id = ?
+                       AND ({in_variants})
+                       AND success
+                       AND NOT warmup
+                       AND NOT outlier""",
+                (job_id, test_id, *variants),
+            )
+            values: dict[tuple[str | None, str], list[float]] = {}
+            for row in c.fetchall():
+                for metric, value in zip(SUMMARY_METRICS, row[1:]):
+                    if value is not None:
+                        values.setdefault((row[0], metric), []).append(value)
+
+            # Summaries are timestamped like the test's first run, also
+            # when backfilled.
+            c.execute(
+                f"""SELECT MIN(ts) FROM zeek_tests
+                     WHERE job_id = ? AND test_id = ? AND ({in_variants})""",
+                (job_id, test_id, *variants),
+            )
+            (ts,) = c.fetchone()
+
+            c.execute(
+                f"""DELETE FROM zeek_test_summaries
+                     WHERE job_id = ? AND test_id = ? AND ({in_variants})""",
+                (job_id, test_id, *variants),
+            )
+            sql = """INSERT INTO zeek_test_summaries (
+                         ts,
+                         job_id,
+                         test_id,
+                         variant,
+                         metric,
+                         n,
+                         mean,
+                         median,
+                         stddev,
+                         min,
+                         max,
+                         p95
+                    ) VALUES (
+                        COALESCE(:ts, STRFTIME('%s')),
+                        :job_id,
+                        :test_id,
+                        :variant,
+                        :metric,
+                        :n,
+                        :mean,
+                        :median,
+                        :stddev,
+                        :min,
+                        :max,
+                        :p95
+                    )"""
+            rows = []
+            for (variant, metric), vs in sorted(
+                values.items(), key=lambda kv: (kv[0][0] or "", kv[0][1])
+            ):
+                data = stats.summarize(vs)._asdict()
+                data.update(
+                    ts=ts,
+                    job_id=job_id,
+                    test_id=test_id,
+                    variant=variant,
+                    metric=metric,
+                )
+                rows.append(data)
+
+            c.executemany(sql, rows)
+
+    def backfill_zeek_test_summaries(self, *, overwrite: bool = False) -> int:
+        """
+        Update the summaries of all tests of all jobs, or only of those
+        without summaries unless overwrite is set. Returns the number of
+        job and test pairs updated.
+        """
+        with self._connection() as conn:
+            c = conn.cursor()
+            sql = "SELECT DISTINCT job_id, test_id FROM zeek_tests t"
+            if not overwrite:
+                sql += """ WHERE NOT EXISTS (
+                              SELECT 1 FROM zeek_test_summaries s
+                               WHERE s.job_id = t.job_id AND s.test_id = t.test_id
+                          )"""
+            c.execute(sql)
+            pairs = c.fetchall()
+
+        for job_id, test_id in pairs:
+            self.update_zeek_test_summaries(job_id=job_id, test_id=test_id)
+
+        return len(pairs)
+
+    def apply_retention(
+        self, *, before: int, keep_branches: list[str], dry_run: bool = False
+    ) -> RetentionResult:
+        """
+        Roll up runs older than the timestamp before into their
+        zeek_test_summaries rows and delete them, together with their
+        perf stats, log record counts and profiles. Runs of branches in
+        keep_branches are kept, also when they belong to the same A/B
+        job as removed runs. A variant of a test is only removed once
+        all of its runs are old, so its summary covers exactly the
+        removed runs. Freed pages are returned to the file system with
+        an incremental vacuum.
+        """
+        placeholders = ", ".join("?" for _ in keep_branches)
+        old = f"""CAST(ts AS INTEGER) < ?
+                  AND COALESCE(branch, '') NOT IN ({placeholders})"""
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute(
+                f"""SELECT job_id, test_id, variant, COUNT(*)
+                      FROM zeek_tests
+                     WHERE COALESCE(branch, '') NOT IN ({placeholders})
+                  GROUP BY job_id, test_id, variant
+                    HAVING MAX(CAST(ts AS INTEGER)) < ?""",
+                [*keep_branches, before],
+            )
+            variants: dict[tuple[str, str], list[str | None]] = {}
+            runs = 0
+            for job_id, test_id, variant, n in c.fetchall():
+                variants.setdefault((job_id, test_id), []).append(variant)
+                runs += n
+
+        if dry_run:
+            return RetentionResult(tests=len(variants), runs=runs, reclaimed_bytes=0)
+
+        runs = 0
+        for (job_id, test_id), vs in variants.items():
+            self.update_zeek_test_summaries(job_id=job_id, test_id=test_id, variants=vs)
+            with self._connection() as conn:
+                c = conn.cursor()
+                for variant in vs:
+                    key = (job_id, test_id, variant)
+                    ids = f"""SELECT id FROM zeek_tests
+                               WHERE job_id = ? AND test_id = ? AND variant IS ?
+                                 AND {old}"""
+                    for table in ["zeek_test_perf_stats", "zeek_test_log_records"]:
+                        c.execute(
+                            f"DELETE FROM {table} WHERE zeek_test_id IN ({ids})",
+                            [*key, before, *keep_branches],
+                        )
+
+                    for table in ["zeek_test_profiles", "zeek_script_profiles"]:
+                        c.execute(
+                            f"""DELETE FROM {table}
+                                 WHERE job_id = ? AND test_id = ? AND variant IS ?""",
+                            key,
+                        )
+
+                    c.execute(
+                        f"""DELETE FROM zeek_tests
+                             WHERE job_id = ? AND test_id = ? AND variant IS ?
+                               AND {old}""",
+                        [*key, before, *keep_branches],
+                    )
+                    runs += c.rowcount
+
+        return RetentionResult(
+            tests=len(variants), runs=runs, reclaimed_bytes=self.incremental_vacuum()
+        )
+
+    def incremental_vacuum(self) -> int:
+        """
+        Release free pages and truncate the WAL. Returns the number
+        of bytes the database shrank by.
+        """
+        with self._connection() as conn:
+
+            def size() -> int:
+                page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                return page_count * page_size
+
+            before = size()
+            conn.execute("PRAGMA incremental_vacuum").fetchall()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            return before - size()
+
+    def get_zeek_processing_times(self, job_id: str) -> list[dict[str, typing.Any]]:
+        """
+        Per test means of the elapsed, startup and startup-adjusted
+        processing times of job_id. Warmup runs, outliers and failed
+        runs are excluded. Times without startup runs are None.
+
+        For indexed pcaps, the throughput is reported in packets and
+        Mbit per second of processing time, or elapsed time if the
+        startup time is unknown. With COUNT_LOG_RECORDS, the time per
+        connection and per log record are reported the same way.
+        """
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.row_factory = sqlite3.Row
+            c.execute(
+                """SELECT test_id,
+                          variant,
+                          COUNT(*) AS runs,
+                          AVG(elapsed_time) AS elapsed_time,
+                          MAX(startup_elapsed_time) AS startup_elapsed_time,
+                          AVG(processing_time) AS processing_time,
+                          AVG(processing_user_time) AS processing_user_time,
+                          AVG(processing_system_time) AS processing_system_time,
+                          MAX(packets) / AVG(COALESCE(processing_time, elapsed_time))
+                              AS packets_per_sec,
+                          MAX(bytes) * 8 / 1e6
+                              / AVG(COALESCE(processing_time, elapsed_time))
+                              AS mbit_per_sec,
+                          AVG(conn_records) AS conn_records,
+                          AVG(log_records) AS log_records,
+                          AVG(COALESCE(processing_time, elapsed_time) / conn_records)
+                              AS time_per_conn,
+                          AVG(COALESCE(processing_time, elapsed_time) / log_records)
+                              AS time_per_log_record
+                     FROM zeek_test_processing_times
+                     LEFT JOIN (
+                         SELECT zeek_test_id,
+                                SUM(records) AS log_records,
+                                SUM(IIF(stream = 'conn', records, NULL))
+                                    AS conn_records
+                           FROM zeek_test_log_records
+                       GROUP BY zeek_test_id
+                     ) ON zeek_test_id = id
+                     LEFT JOIN (
+                         SELECT s.test_id AS s_test_id, p.packets, p.bytes
+                           FROM zeek_job_tests s
+                           JOIN pcaps p ON p.sha256 = s.pcap_sha256
+                          WHERE s.job_id = ?
+                       GROUP BY s.test_id
+                     ) ON s_test_id = test_id
+                    WHERE job_id = ?
+                      AND success
+                      AND NOT warmup
+                      AND NOT outlier
+                 GROUP BY test_id, variant
+                 ORDER BY test_id, variant""",
+                (job_id, job_id),
+            )
+            return [dict(row) for row in c.fetchall()]
+
+    def get_pcap(self, filename: str) -> "zeek_benchmarker.pcaps.PcapInfo | None":  # noqa: F821
+        """
+        The most recently indexed metadata of filename, if any.
+        """
+        from . import pcaps
+
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute(
+                """SELECT filename, size, mtime_ns, sha256,
+                          packets, bytes, duration, flows
+                     FROM pcaps
+                    WHERE filename = ?
+                 ORDER BY ts DESC, id DESC
+                    LIMIT 1""",
+                (filename,),
+            )
+            row = c.fetchone()
+
+        return pcaps.PcapInfo(*row) if row else None
+
+    def store_pcap(self, info: "zeek_benchmarker.pcaps.PcapInfo"):  # noqa: F821
+        """
+        Insert or update the metadata of a pcap.
+        """
+        with self._connection() as conn:
+            c = conn.cursor()
+            sql = """INSERT INTO pcaps (
+                         filename,
+                         sha256,
+                         size,
+                         mtime_ns,
+                         packets,
+                         bytes,
+                         duration,
+                         flows
+                    ) VALUES (
+                        :filename,
+                        :sha256,
+                        :size,
+                        :mtime_ns,
+                        :packets,
+                        :bytes,
+                        :duration,
+                        :flows
+                    ) ON CONFLICT (filename, sha256) DO UPDATE SET
+                        ts = STRFTIME('%s'),
+                        mtime_ns = excluded.mtime_ns"""
+            c.execute(sql, info._asdict())
+
+    def calibration_reference(self, *, machine_id: int, cpu_slot: str) -> list[float]:
+        """
+        Total times of the calibrations making up the reference
+        of machine_id and cpu_slot, oldest first.
+        """
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute(
+                """SELECT cpu_time + mem_time
+                     FROM calibrations
+                    WHERE machine_id = ? AND cpu_slot = ? AND reference
+                 ORDER BY id""",
+                (machine_id, cpu_slot),
+            )
+            return [row[0] for row in c.fetchall()]
+
+    def reset_calibration_reference(
+        self, *, machine_id: int | None = None, cpu_slot: str | None = None
+    ) -> int:
+        """
+        Drop calibrations from the reference of the given machine and
+        CPU slot, or all of them, so that the following calibrations
+        form a new reference. Returns the number of updated rows.
+        """
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute(
+                """UPDATE calibrations
+                      SET reference = 0
+                    WHERE reference
+                      AND (:machine_id IS NULL OR machine_id = :machine_id)
+                      AND (:cpu_slot IS NULL OR cpu_slot = :cpu_slot)""",
+                {"machine_id": machine_id, "cpu_slot": cpu_slot},
+            )
+            return c.rowcount
+
+    def store_calibration(
+        self,
+        *,
+        job: "zeek_benchmarker.tasks.ZeekJob",
+        machine_id: int,
+        cpu_slot: str,
+        result: "zeek_benchmarker.tasks.CalibrationResult",
+        score: float | None,
+        reference: bool = False,
+    ):
+        """
+        Store a calibration result into the calibrations table.
+        """
+        with self._connection() as conn:
+            c = conn.cursor()
+            sql = """INSERT INTO calibrations (
+                         job_id,
+                         machine_id,
+                         cpu_slot,
+                         cpu_time,
+                         mem_time,
+                         score,
+                         reference
+                    ) VALUES (
+                        :job_id,
+                        :machine_id,
+                        :cpu_slot,
+                        :cpu_time,
+                        :mem_time,
+                        :score,
+                        :reference
+                    )"""
+            data = result._asdict()
+            data["job_id"] = job.job_id
+            data["machine_id"] = machine_id
+            data["cpu_slot"] = cpu_slot
+            data["score"] = score
+            data["reference"] = reference
+            c.execute(sql, data)
+
+    def store_job_calibration(
+        self,
+        *,
+        job: "zeek_benchmarker.tasks.ZeekJob",
+        score: float,
+        drifted: bool,
+    ):
+        """
+        Set the calibration score of job in the jobs table.
+        """
+        with self._connection() as conn:
+            conn.execute(
+                """UPDATE jobs
+                      SET calibration_score = ?, calibration_drifted = ?
+                    WHERE id = ?""",
+                (score, drifted, job.job_id),
+            )
+
+    def find_build(self, build_hash: str) -> Build | None:
+        """
+        The build URL, branch and commit of the most recent job
+        for build_hash, if any.
+        """
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute(
+                "SELECT build_url, branch, sha FROM jobs WHERE build_hash = ? "
+                "ORDER BY ts DESC LIMIT 1",
+                (build_hash,),
+            )
+            row = c.fetchone()
+
+        return Build(*row) if row else None
+
+    def store_zeek_job_test(
+        self,
+        *,
+        job: "zeek_benchmarker.tasks.ZeekJob",
+        test: "zeek_benchmarker.tasks.ZeekTest",
+        **values: typing.Any,
+    ):
+        """
+        Insert or update the zeek_job_tests entry for job and test,
+        setting the columns given as keyword arguments.
+        """
+        columns = sorted(values)
+        if not columns or not all(c.isidentifier() for c in columns):
+            raise ValueError(f"invalid columns: {columns}")
+
+        names = ", ".join(columns)
+        params = ", ".join(f":{c}" for c in columns)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns)
+
+        with self._connection() as conn:
+            c = conn.cursor()
+            sql = f"""INSERT INTO zeek_job_tests (
+                         job_id,
+                         test_id,
+                         {names}
+                    ) VALUES (
+                        :job_id,
+                        :test_id,
+                        {params}
+                    ) ON CONFLICT (job_id, test_id) DO UPDATE SET {updates}"""
+            data = dict(values)
+            data["job_id"] = job.job_id
+            data["test_id"] = test.test_id
             c.execute(sql, data)
 
     def get_or_create_machine(self, m: models.Machine):
@@ -188,6 +1109,7 @@ class Storage:
                 models.Machine.architecture == m.architecture,
                 models.Machine.cpu_model == m.cpu_model,
                 models.Machine.mem_total_bytes == m.mem_total_bytes,
+                models.Machine.cpu_topology == m.cpu_topology,
             )
 
             r = query.scalar()
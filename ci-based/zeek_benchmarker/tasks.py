@@ -1,21 +1,41 @@
+import concurrent.futures
+import contextlib
 import dataclasses
 import errno
+import fcntl
+import functools
 import hashlib
+import io
 import json
 import logging
 import os
 import os.path
 import pathlib
+import queue
 import re
 import shlex
 import shutil
+import statistics
+import tarfile
+import time
 import typing
+import uuid
 
 import docker
 import docker.types
 import requests
 
-from . import config, storage
+from . import (
+    artifacts,
+    config,
+    machine,
+    pcaps,
+    prefetch,
+    profiles,
+    stats,
+    storage,
+    volumes,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +67,72 @@ class CommandFailed(Error):
 
 Env = dict[str, str]
 
+DEFAULT_TMPFS_PATH = "/mnt/data/tmpfs"
+DEFAULT_RUN_PATH = "/run"
+
+
+class RunResult(typing.NamedTuple):
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+
+
+@contextlib.contextmanager
+def build_lock(work_dir: str, sha256: str):
+    """
+    Serialize preparing the same build between the worker
+    and a background prefetch process.
+    """
+    lock_dir = pathlib.Path(work_dir) / "locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    name = re.sub(r"[^0-9A-Za-z]", "_", sha256 or "unknown")
+    with open(lock_dir / f"{name}.lock", "w") as fp:
+        fcntl.flock(fp, fcntl.LOCK_EX)
+        yield
+
+
+class WarmContainer:
+    """
+    A long running benchmarking container as created by
+    ContainerRunner.start_warm().
+    """
+
+    def __init__(self, container: docker.models.containers.Container):
+        self._container = container
+
+    def exec(self, command: str, env: Env) -> RunResult:
+        """
+        Run command within the container with the additional env.
+
+        The run directory is emptied before, so every invocation
+        starts out like a fresh container would.
+        """
+        self._container.exec_run(
+            ["find", DEFAULT_RUN_PATH, "-mindepth", "1", "-delete"],
+        )
+
+        exit_code, (stdout_bytes, stderr_bytes) = self._container.exec_run(
+            shlex.split(command),
+            environment=env,
+            workdir=DEFAULT_RUN_PATH,
+            demux=True,
+        )
+        result = RunResult(exit_code, stdout_bytes or b"", stderr_bytes or b"")
+        logger.debug(
+            "exec: returncode=%s stdout=%s stderr=%s",
+            result.returncode,
+            result.stdout,
+            result.stderr,
+        )
+
+        if result.returncode:
+            raise CommandFailed(result)
+
+        return result
+
+    def close(self):
+        self._container.remove(force=True)
+
 
 class ContainerRunner:
     """
@@ -66,23 +152,21 @@ class ContainerRunner:
     def __init__(self, client: docker.client.DockerClient = None):
         self._client = client or docker.from_env()
 
-    def runc(
+    def _benchmark_container_kwargs(
         self,
         *,
         image: str,
-        command: str,
         env: Env,
-        seccomp_profile: dict[str, typing.Any],  # contents of the seccomp profile
+        seccomp_profile: dict[str, typing.Any],
         install_volume: str,
         install_target: str,
         test_data_volume: str,
-        test_data_target: str = "/test_data",
-        cap_add: list[str] | None = None,
-        network_disabled: bool = True,
-    ):
+        test_data_target: str,
+        cap_add: list[str] | None,
+        network_disabled: bool,
+    ) -> dict[str, typing.Any]:
         """
-        Run the given image for benchmarking, mounting
-        install_volume at install_target.
+        Arguments for containers.run() shared by runc() and start_warm().
         """
         # Don't modify the caller's env.
         env = env.copy()
@@ -90,21 +174,14 @@ class ContainerRunner:
         # Ensure the image exists locally.
         self._client.images.get(image)
 
-        class Result(typing.NamedTuple):
-            returncode: int
-            stdout: bytes
-            stderr: bytes
-
         cap_add = cap_add or ["SYS_NICE"]
-        default_tmpfs_path = "/mnt/data/tmpfs"
-        default_run_path = "/run"
         tmpfs = {
-            default_tmpfs_path: "",
-            default_run_path: "",
+            DEFAULT_TMPFS_PATH: "",
+            DEFAULT_RUN_PATH: "",
         }
 
-        env["TMPFS_PATH"] = default_tmpfs_path
-        env["RUN_PATH"] = default_run_path
+        env["TMPFS_PATH"] = DEFAULT_TMPFS_PATH
+        env["RUN_PATH"] = DEFAULT_RUN_PATH
 
         mounts = [
             docker.types.Mount(
@@ -123,24 +200,56 @@ class ContainerRunner:
             f"seccomp={json.dumps(seccomp_profile)}",
         ]
 
+        return {
+            "image": image,
+            "working_dir": DEFAULT_RUN_PATH,
+            "detach": True,
+            "cap_add": cap_add,
+            "environment": env,
+            "tmpfs": tmpfs,
+            "mounts": mounts,
+            "security_opt": security_opt,
+            "network_disabled": network_disabled,
+        }
+
+    def runc(
+        self,
+        *,
+        image: str,
+        command: str,
+        env: Env,
+        seccomp_profile: dict[str, typing.Any],  # contents of the seccomp profile
+        install_volume: str,
+        install_target: str,
+        test_data_volume: str,
+        test_data_target: str = "/test_data",
+        cap_add: list[str] | None = None,
+        network_disabled: bool = True,
+    ):
+        """
+        Run the given image for benchmarking, mounting
+        install_volume at install_target.
+        """
         container = self._client.containers.run(
-            image=image,
-            working_dir=default_run_path,
             command=command,
-            detach=True,
-            cap_add=cap_add,
-            environment=env,
-            tmpfs=tmpfs,
-            mounts=mounts,
-            security_opt=security_opt,
-            network_disabled=network_disabled,
+            **self._benchmark_container_kwargs(
+                image=image,
+                env=env,
+                seccomp_profile=seccomp_profile,
+                install_volume=install_volume,
+                install_target=install_target,
+                test_data_volume=test_data_volume,
+                test_data_target=test_data_target,
+                cap_add=cap_add,
+                network_disabled=network_disabled,
+            ),
         )
 
         try:
             wait = container.wait()
             stdout_bytes = container.logs(stdout=True, stderr=False)
             stderr_bytes = container.logs(stdout=False, stderr=True)
-            result = Result(wait.get("StatusCode", 99), stdout_bytes, stderr_bytes)
+            result = RunResult(wait.get("StatusCode", 99), stdout_bytes, stderr_bytes)
             logger.debug(
                 "runc: returndcode=%s stdout=%s stderr=%s",
                 result.returncode,
@@ -155,6 +264,42 @@ class ContainerRunner:
         finally:
             container.remove(force=True)
 
+    def start_warm(
+        self,
+        *,
+        image: str,
+        seccomp_profile: dict[str, typing.Any],  # contents of the seccomp profile
+        install_volume: str,
+        install_target: str,
+        test_data_volume: str,
+        test_data_target: str = "/test_data",
+        cap_add: list[str] | None = None,
+        network_disabled: bool = True,
+    ) -> "WarmContainer":
+        """
+        Start an idle benchmarking container that commands
+        are run in via WarmContainer.exec().
+
+        The container is setup the same way as with runc().
+        """
+        container = self._client.containers.run(
+            command=["sleep", "infinity"],
+            init=True,
+            **self._benchmark_container_kwargs(
+                image=image,
+                env={},
+                seccomp_profile=seccomp_profile,
+                install_volume=install_volume,
+                install_target=install_target,
+                test_data_volume=test_data_volume,
+                test_data_target=test_data_target,
+                cap_add=cap_add,
+                network_disabled=network_disabled,
+            ),
+        )
+
+        return WarmContainer(container)
+
     def unpack_build(
         self,
         *,
@@ -163,12 +308,20 @@ class ContainerRunner:
         volume: str,
         strip_components=2,
         timeout=30,
+        cpuset_cpus: str | None = None,
+        blkio_weight: int | None = None,
     ):
         """
         Starts a container and extracts the tar archive provided by
         ``build_path`` into ``volume`` using ``image``.
 
         The contents of ``volume`` are deleted before extraction.
+
+        ``cpuset_cpus`` and ``blkio_weight`` are passed through to
+        constrain the container's CPU placement and I/O share.
+
+        Returns the size of the extracted tree in bytes, or 0 if
+        it could not be determined.
         """
         if not build_path.exists():
             raise FileNotFoundError(str(build_path))
@@ -195,6 +348,7 @@ class ContainerRunner:
                 f"tar -xzf {shlex.quote(build_filename)}",
                 f"--strip-components {int(strip_components)}",
                 f"-C {shlex.quote(target_dir)}",
+                f"&& du -sb {shlex.quote(target_dir)}",
             ]
         )
 
@@ -229,7 +383,7 @@ class ContainerRunner:
         mounts.append(source_mount)
 
         logger.debug("Unpacking %s in container: %s (%s)", build_path, command, mounts)
-        self._client.containers.run(
+        output = self._client.containers.run(
             image=image,
             mounts=mounts,
             auto_remove=True,
@@ -237,8 +391,144 @@ class ContainerRunner:
             working_dir=source_dir,
             security_opt=["no-new-privileges"],
             command=["bash", "-x", "-c", command],
+            cpuset_cpus=cpuset_cpus,
+            blkio_weight=blkio_weight,
         )
 
+        return parse_du_output(output)
+
+    def stream_build(
+        self,
+        *,
+        chunks: typing.Iterable[bytes],
+        verify: typing.Callable[[], None],
+        image: str,
+        volume: str,
+        strip_components=2,
+        timeout=30,
+    ) -> int:
+        """
+        Extract the gzip compressed tar archive produced by ``chunks``
+        into ``volume`` without storing it on disk first.
+
+        The archive is uploaded through the put_archive() API into a
+        staging directory within ``volume``. Only if ``verify()`` returns
+        without raising, the staging directory replaces the previous
+        contents of ``volume``. Otherwise it is removed and the exception
+        from ``verify()`` is propagated.
+
+        Returns the size of the extracted tree in bytes, or 0 if
+        it could not be determined.
+        """
+        if not volume:
+            raise ValueError("no volume")
+
+        target_dir = "/target"
+        staging = f".incoming-{uuid.uuid4().hex}"
+        commit_marker = ".commit"
+
+        # Entries below the staging directory that end up in target_dir.
+        move_glob = "/".join([staging] + ["*"] * (int(strip_components) + 1))
+
+        # Removing everything but the staging directory also removes
+        # leftover staging directories from earlier failed attempts.
+        command = "; ".join(
+            [
+                "set -e",
+                "shopt -s dotglob nullglob",
+                f"cd {shlex.quote(target_dir)}",
+                f"if [ ! -e {commit_marker} ]; then rm -rf {staging}; exit 1; fi",
+                f"find . -mindepth 1 -maxdepth 1 ! -name {staging} -exec rm -rf {{}} +",
+                f"timeout --signal=SIGKILL {int(timeout)} mv {move_glob} .",
+                f"rm -rf {staging}",
+                f"du -sb {shlex.quote(target_dir)}",
+            ]
+        )
+
+        mounts = [
+            docker.types.Mount(
+                target=target_dir,
+                source=volume,
+            ),
+        ]
+
+        logger.debug("Streaming build into %s: %s", volume, command)
+        container = self._client.containers.create(
+            image=image,
+            mounts=mounts,
+            network_disabled=True,
+            working_dir=target_dir,
+            security_opt=["no-new-privileges"],
+            command=["bash", "-x", "-c", command],
+        )
+
+        try:
+            container.put_archive(target_dir, _make_tar_dir(staging))
+            container.put_archive(f"{target_dir}/{staging}", chunks)
+
+            try:
+                verify()
+            except Exception:
+                # Run the container without the commit marker
+                # to remove the staging directory.
+                container.start()
+                container.wait(timeout=timeout)
+                raise
+
+            container.put_archive(target_dir, _make_tar_file(commit_marker))
+            container.start()
+            wait = container.wait(timeout=timeout)
+            stdout_bytes = container.logs(stdout=True, stderr=False)
+            if wait.get("StatusCode", 99):
+                stderr_bytes = container.logs(stdout=False, stderr=True)
+                raise CommandFailed((wait, stdout_bytes, stderr_bytes))
+
+            return parse_du_output(stdout_bytes)
+        finally:
+            container.remove(force=True)
+
+
+def _make_tar_dir(name: str) -> bytes:
+    """
+    Create an uncompressed tar archive containing the directory ``name``.
+    """
+    info = tarfile.TarInfo(name)
+    info.type = tarfile.DIRTYPE
+    info.mode = 0o755
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tf:
+        tf.addfile(info)
+
+    return buf.getvalue()
+
+
+def _make_tar_file(name: str, data: bytes = b"") -> bytes:
+    """
+    Create an uncompressed tar archive containing the file ``name``.
+    """
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tf:
+        tf.addfile(info, io.BytesIO(data))
+
+    return buf.getvalue()
+
+
+def parse_du_output(output: bytes) -> int:
+    """
+    Parse the size from the last line of du -sb output.
+    """
+    if not isinstance(output, bytes):
+        return 0
+
+    lines = output.decode("utf-8", errors="replace").strip().splitlines()
+    try:
+        return int(lines[-1].split()[0])
+    except (IndexError, ValueError):
+        logger.warning("Unexpected du output: %r", output)
+        return 0
+
 
 @dataclasses.dataclass
 class Job:
@@ -276,6 +566,8 @@ class Job:
     cirrus_pr_labels: str | None = None
     github_check_suite_id: int | None = None
     repo_version: str | None = None
+    # Run an extra profiled iteration of every test.
+    profile: bool = False
 
     @property
     def install_volume(self) -> str:
@@ -299,10 +591,24 @@ class Job:
         """
         return 1
 
-    def fetch_build_url(self, build_path: pathlib.Path):
+    def fetch_build_url(
+        self, build_path: pathlib.Path, max_bytes_per_sec: int | None = None
+    ):
         """
         Download self.build_url into filename.
+
+        If the artifact cache has an entry for self.sha256, use it
+        instead of downloading. Otherwise, add the downloaded and
+        verified file to the cache.
+
+        With max_bytes_per_sec, the download is throttled to
+        approximately that rate.
         """
+        cache = artifacts.get()
+        if cache is not None and cache.get(self.sha256, build_path):
+            logger.info("Using cached %s for %s", self.sha256, self.build_url)
+            return
+
         logger.debug("Downloading %s to %s", self.build_url, build_path)
         r = requests.get(
             self.build_url, allow_redirects=True, stream=True, timeout=(10, 300)
@@ -312,17 +618,130 @@ class Job:
         # The file is being streamed, fetch it in chunks and compute sha256
         # on the fly.
         h = hashlib.sha256()
+        start, total = time.monotonic(), 0
         with open(build_path, "wb") as fp:
             for chunk in r.iter_content(chunk_size=4096):
                 h.update(chunk)
                 fp.write(chunk)
 
+                if max_bytes_per_sec:
+                    total += len(chunk)
+                    ahead = total / max_bytes_per_sec - (time.monotonic() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
         digest = h.digest().hex()
         if digest != self.sha256:
             raise InvalidChecksum(
                 f"{self.build_url}: expected {self.sha256}, got {digest}"
             )
 
+        if cache is not None:
+            cache.put(self.sha256, build_path)
+
+    def stream_build_url(self) -> int:
+        """
+        Stream self.build_url straight into self.install_volume,
+        computing the sha256 on the fly.
+
+        The extracted build is only committed to the install volume
+        if the checksum matches.
+        """
+        logger.debug("Streaming %s into %s", self.build_url, self.install_volume)
+        r = requests.get(
+            self.build_url, allow_redirects=True, stream=True, timeout=(10, 300)
+        )
+        r.raise_for_status()
+
+        h = hashlib.sha256()
+
+        def chunks():
+            for chunk in r.iter_content(chunk_size=65536):
+                h.update(chunk)
+                yield chunk
+
+        def verify():
+            digest = h.digest().hex()
+            if digest != self.sha256:
+                raise InvalidChecksum(
+                    f"{self.build_url}: expected {self.sha256}, got {digest}"
+                )
+
+        return ContainerRunner.get().stream_build(
+            chunks=chunks(),
+            verify=verify,
+            image=self.testing_image,
+            volume=self.install_volume,
+            strip_components=self.unpack_strip_component,
+            timeout=config.get().tar_timeout,
+        )
+
+    def prepare_install(self, *, prefetching: bool = False):
+        """
+        Make the build available in self.install_volume, using the
+        install volume and artifact caches when enabled.
+
+        With prefetching, the build is prepared in the background for a
+        job that is still queued: The download is throttled, extraction
+        is confined to CPUs outside of CPU_SET and only happens if the
+        install volume cache is enabled, as the shared install volume
+        may be in use by the running job.
+
+        Otherwise, the install volume is pinned in the cache until
+        release_install() so prefetching can't evict it.
+        """
+        cfg = config.get()
+        pin = not prefetching
+        with build_lock(cfg.work_dir, self.sha256):
+            install_cache = volumes.get()
+            if install_cache is not None and install_cache.lookup(
+                self.install_volume, pin=pin
+            ):
+                logger.info("Using cached install volume %s", self.install_volume)
+                return
+
+            max_bytes_per_sec = None
+            unpack_kwargs = {}
+            if prefetching:
+                max_bytes_per_sec = cfg.prefetch_max_bytes_per_sec
+                unpack_kwargs = {
+                    "cpuset_cpus": ",".join(str(c) for c in prefetch.spare_cpus()),
+                    "blkio_weight": 10,
+                }
+
+                if install_cache is None:
+                    self.fetch_build_url(self.build_path, max_bytes_per_sec)
+                    return
+
+            artifact_cache = artifacts.get()
+            cached = artifact_cache is not None and self.sha256 in artifact_cache
+
+            if cfg.stream_builds and not cached and not prefetching:
+                size = self.stream_build_url()
+            else:
+                self.fetch_build_url(self.build_path, max_bytes_per_sec)
+
+                cr = ContainerRunner.get()
+                size = cr.unpack_build(
+                    build_path=self.build_path,
+                    image=self.testing_image,
+                    volume=self.install_volume,
+                    strip_components=self.unpack_strip_component,
+                    timeout=cfg.tar_timeout,
+                    **unpack_kwargs,
+                )
+
+            if install_cache is not None:
+                install_cache.commit(self.install_volume, size, pin=pin)
+
+    def release_install(self):
+        """
+        Unpin the install volume pinned by prepare_install().
+        """
+        install_cache = volumes.get()
+        if install_cache is not None:
+            install_cache.release(self.install_volume)
+
     def process(self):
         """
         Process this job.
@@ -340,24 +759,15 @@ class Job:
         self.build_filename = pathlib.Path(self.build_url).parts[-1]
         self.build_path = self.job_dir / self.build_filename
 
-        self.fetch_build_url(self.build_path)
-
-        cr = ContainerRunner.get()
-
-        cr.unpack_build(
-            build_path=self.build_path,
-            image=self.testing_image,
-            volume=self.install_volume,
-            strip_components=self.unpack_strip_component,
-            timeout=config.get().tar_timeout,
-        )
-
         try:
+            self.prepare_install()
             self._process()
             shutil.rmtree(self.job_dir)  # only cleanup on success for now
         except Exception as e:
             logger.error("Failed job %r", e)
             raise e
+        finally:
+            self.release_install()
 
         def _process(self):
             """
@@ -370,16 +780,167 @@ class ResultNotFound(Error):
     pass
 
 
+class PerfStatResult(typing.NamedTuple):
+    """
+    Hardware and software counters collected with perf stat.
+
+    Counters that perf could not collect are None.
+    """
+
+    instructions: int | None = None
+    cycles: int | None = None
+    branches: int | None = None
+    branch_misses: int | None = None
+    cache_misses: int | None = None
+    context_switches: int | None = None
+
+    @staticmethod
+    def parse_from(output: bytes) -> typing.Optional["PerfStatResult"]:
+        """
+        Parse PERF_STAT= lines containing perf stat -x ';' output:
+
+            PERF_STAT=1234567;;instructions:u;1000;100.00;;
+            PERF_STAT=<not counted>;;cache-misses;0;0.00;;
+
+        Hybrid CPUs report events per PMU (cpu_core/instructions/),
+        these are summed up. Returns None if there are no such lines.
+        """
+        text = output.decode("utf-8", errors="replace")
+        counters: dict[str, int | None] = {}
+        for line in text.splitlines():
+            if not line.startswith("PERF_STAT="):
+                continue
+
+            fields = line.split("=", 1)[1].split(";")
+            if len(fields) < 3:
+                continue
+
+            value, event = fields[0], fields[2]
+            if "/" in event:
+                event = event.split("/")[1]
+            name = event.split(":")[0].replace("-", "_")
+            if name not in PerfStatResult._fields:
+                continue
+
+            if value.isdigit():
+                counters[name] = (counters.get(name) or 0) + int(value)
+            else:
+                counters.setdefault(name, None)
+
+        if not counters:
+            return None
+
+        return PerfStatResult(**counters)
+
+
+class CalibrationResult(typing.NamedTuple):
+    """
+    Times of the calibration kernels in scripts/calibrate.py.
+    """
+
+    cpu_time: float
+    mem_time: float
+
+    @property
+    def total(self) -> float:
+        return self.cpu_time + self.mem_time
+
+    @staticmethod
+    def parse_from(output: bytes) -> "CalibrationResult":
+        text = output.decode("utf-8", errors="replace")
+        for line in text.splitlines():
+            if not line.startswith("CALIBRATION="):
+                continue
+
+            values = line.split("=", 1)[1]
+            kv = dict(item.split("=", 1) for item in values.split(";") if "=" in item)
+            if kv.get("v") != "1":
+                raise ResultNotFound(f"unsupported CALIBRATION version: {values}")
+
+            return CalibrationResult(
+                cpu_time=int(kv["cpu_us"]) / 1e6,
+                mem_time=int(kv["mem_us"]) / 1e6,
+            )
+
+        raise ResultNotFound(text)
+
+
+def parse_log_records(output: bytes) -> dict[str, int] | None:
+    """
+    Parse the LOG_RECORDS= line of scripts/count-log-records.py into
+    the number of records per log stream.
+
+    Returns None if there's no such line.
+    """
+    text = output.decode("utf-8", errors="replace")
+    for line in text.splitlines():
+        if not line.startswith("LOG_RECORDS="):
+            continue
+
+        values = line.split("=", 1)[1]
+        kv = dict(item.split("=", 1) for item in values.split(";") if "=" in item)
+        if kv.pop("v", None) != "1":
+            logger.warning("Unsupported LOG_RECORDS line: %s", values)
+            return None
+
+        return {stream: int(records) for stream, records in kv.items()}
+
+    return None
+
+
 class ZeekTestResult(typing.NamedTuple):
     test_run: int
     elapsed_time: float
     user_time: float
     system_time: float
     max_rss: float  # in bytes
+    minor_faults: int | None = None
+    major_faults: int | None = None
+    voluntary_ctx_switches: int | None = None
+    involuntary_ctx_switches: int | None = None
+    block_input: int | None = None
+    block_output: int | None = None
+    perf_stat: PerfStatResult | None = None
+    log_records: dict[str, int] | None = None
+
+    @staticmethod
+    def _parse_rusage(test_run: int, values: str, output: bytes):
+        """
+        Parse the key=value pairs of a BENCHMARK_RUSAGE line
+        as produced by scripts/rusage-launcher.py.
+        """
+        kv = dict(item.split("=", 1) for item in values.split(";") if "=" in item)
+        if kv.get("v") != "1":
+            raise ResultNotFound(f"unsupported BENCHMARK_RUSAGE version: {values}")
+
+        return ZeekTestResult(
+            test_run=test_run,
+            elapsed_time=int(kv["elapsed_us"]) / 1e6,
+            user_time=int(kv["user_us"]) / 1e6,
+            system_time=int(kv["sys_us"]) / 1e6,
+            max_rss=int(kv["max_rss_kb"]) * 1024,
+            minor_faults=int(kv["minflt"]),
+            major_faults=int(kv["majflt"]),
+            voluntary_ctx_switches=int(kv["nvcsw"]),
+            involuntary_ctx_switches=int(kv["nivcsw"]),
+            block_input=int(kv["inblock"]),
+            block_output=int(kv["oublock"]),
+            perf_stat=PerfStatResult.parse_from(output),
+            log_records=parse_log_records(output),
+        )
 
     @staticmethod
     def parse_from(test_run: int, output: bytes):
+        """
+        Parse the BENCHMARK_RUSAGE line of the rusage launcher, falling
+        back to the BENCHMARK_TIMING line of /usr/bin/time.
+        """
         text = output.decode("utf-8", errors="replace")
+        for line in text.splitlines():
+            if line.startswith("BENCHMARK_RUSAGE="):
+                values = line.split("=", 1)[1]
+                return ZeekTestResult._parse_rusage(test_run, values, output)
+
         for line in text.splitlines():
             if not line.startswith("BENCHMARK_TIMING="):
                 continue
@@ -393,6 +954,8 @@ class ZeekTestResult(typing.NamedTuple):
                 user_time=float(user_time),
                 system_time=float(system_time),
                 max_rss=int(max_rss_kb) * 1024,
+                perf_stat=PerfStatResult.parse_from(output),
+                log_records=parse_log_records(output),
             )
 
         raise ResultNotFound(text)
@@ -406,6 +969,12 @@ class ZeekTest(typing.NamedTuple):
     bench_command: str | None = None
     bench_args: str | None = None
     skip: bool | None = None
+    target_rel_ci: float | None = None
+    min_runs: int | None = None
+    max_runs: int | None = None
+    warmup_runs: int = 0
+    profile: bool = False
+    profile_scripts: bool = False
 
     @staticmethod
     def from_dict(cfg: config.Config, d: dict[str, typing.Any]):
@@ -417,33 +986,136 @@ class ZeekTest(typing.NamedTuple):
             pcap=d.get("pcap_file"),
             pcap_args=d.get("pcap_args"),
             skip=d.get("skip", False),
+            target_rel_ci=d.get("target_rel_ci", cfg.target_rel_ci),
+            min_runs=d.get("min_runs", cfg.min_run_count),
+            max_runs=d.get("max_runs", cfg.max_run_count),
+            warmup_runs=d.get("warmup_runs", 0),
+            profile=d.get("profile", False),
+            profile_scripts=d.get("profile_scripts", False),
         )
 
+    def stop_reason(self, runs: int, elapsed_times: list[float]) -> str | None:
+        """
+        Reason for stopping after the given number of runs with
+        elapsed_times from the successful ones, or None to continue.
+
+        Without target_rel_ci, the test stops after a fixed number
+        of runs. Otherwise, it stops once at least min_runs succeeded
+        and the confidence interval of the mean elapsed time is within
+        target_rel_ci of the mean, or after max_runs.
+        """
+        if self.target_rel_ci is None:
+            return "fixed" if runs >= self.runs else None
+
+        min_runs = max(self.min_runs or 0, 2)
+        if len(elapsed_times) >= min_runs:
+            if stats.mean_ci(elapsed_times).relative <= self.target_rel_ci:
+                return "converged"
+
+        if runs >= (self.max_runs or self.runs):
+            return "max_runs"
+
+        return None
+
 
 class ZeekJob(Job):
     """
     Zeek benchmarker job.
     """
 
+    # Stored with results of A/B jobs to tell baseline and candidate apart.
+    variant: typing.ClassVar[str | None] = None
+
+    # Install volume used when the install volume cache is disabled.
+    shared_install_volume: typing.ClassVar[str] = "zeek_install_data"
+
     @property
     def install_volume(self) -> str:
-        return "zeek_install_data"
+        """
+        With the install volume cache enabled, every build
+        hash is extracted into its own volume.
+        """
+        if self.sha256 and volumes.get() is not None:
+            return volumes.volume_name("zeek_install", self.sha256)
+
+        return self.shared_install_volume
 
     @property
     def testing_image(self) -> str:
         return "zeek-benchmarker-zeek-runner"
 
-    def run_zeek_test(self, t):
+    def run_zeek_test(self, t, cpus: str | None = None):
+        """
+        Run all runs of test t, pinned to cpus or the
+        first slot in CPU_SET.
+
+        The number of runs is decided by ZeekTest.stop_reason(), the
+        count and the reason are stored in zeek_job_tests. Warmup runs
+        come first and are stored with warmup set, outliers among the
+        other runs are flagged once all runs completed. Pcap tests are
+        followed by startup-only runs, see run_startup().
+        """
         if t.skip:
             logger.warning("Skipping %s", t)
             return
 
-        cr = ContainerRunner.get()
-        cfg = config.get()
+        cpus = cpus or config.get().zeek_cpus
+        env = self.test_env(t, cpus)
 
+        store = storage.get()
+        runs = 0
+        results: list[ZeekTestResult] = []
+        elapsed_times: list[float] = []
+        with self.test_runner(t) as run:
+            for i in range(1, t.warmup_runs + 1):
+                self.run_zeek_test_once(run, t, i, env, cpus, warmup=True)
+
+            while (stop_reason := t.stop_reason(runs, elapsed_times)) is None:
+                runs += 1
+                result = self.run_zeek_test_once(run, t, runs, env, cpus)
+                if result is not None:
+                    results.append(result)
+                    elapsed_times.append(result.elapsed_time)
+
+            if self.should_profile(t):
+                self.run_profiled(run, t, env)
+
+            if t.profile_scripts:
+                self.run_script_profiled(run, t, env)
+
+            if t.pcap and config.get().startup_runs:
+                self.run_startup(run, t, env)
+
+        self.mark_outliers(t, results)
+
+        elapsed_rel_ci = None
+        if len(elapsed_times) >= 2:
+            elapsed_rel_ci = stats.mean_ci(elapsed_times).relative
+
+        logger.info(
+            "Stopped %s:%s after %d runs (%s) elapsed_rel_ci=%s",
+            self.job_id,
+            t.test_id,
+            runs,
+            stop_reason,
+            elapsed_rel_ci,
+        )
+        store.store_zeek_job_test(
+            job=self,
+            test=t,
+            run_count=runs,
+            stop_reason=stop_reason,
+            elapsed_rel_ci=elapsed_rel_ci,
+        )
+
+    def test_env(self, t: ZeekTest, cpus: str) -> Env:
+        """
+        Environment for running test t via run-zeek.sh pinned to cpus.
+        """
+        cfg = config.get()
         env = {
             "BENCH_TEST_ID": t.test_id,
-            "ZEEKCPUS": cfg.zeek_cpus,
+            "ZEEKCPUS": cpus,
             "ZEEKBIN": "/root/project/install/bin/zeek",
             "ZEEKCONFIG": "/root/project/install/bin/zeek-config",
             "ZEEKSEED": "/benchmarker/random.seed",
@@ -461,51 +1133,455 @@ class ZeekJob(Job):
         if t.pcap_args:
             env["PCAP_ARGS"] = t.pcap_args
 
+        if cfg.perf_stat_events:
+            env["PERF_STAT_EVENTS"] = cfg.perf_stat_events
+
+        if cfg.count_log_records:
+            env["COUNT_LOG_RECORDS"] = "1"
+
+        return env
+
+    def run_zeek_test_once(
+        self,
+        run: typing.Callable[[str, Env], RunResult],
+        t: ZeekTest,
+        i: int,
+        env: Env,
+        cpus: str,
+        *,
+        warmup: bool = False,
+    ) -> ZeekTestResult | None:
+        """
+        Execute run i of test t and store its result or error.
+        """
+        store = storage.get()
+        logger.debug(
+            "Running %s:%s (%d%s)",
+            self.job_id,
+            t.test_id,
+            i,
+            ", warmup" if warmup else "",
+        )
+
+        try:
+            proc = run("/benchmarker/scripts/run-zeek.sh", env)
+
+            result = ZeekTestResult.parse_from(i, proc.stdout)
+            logger.info(
+                "Completed %s:%s (%d) result=%s",
+                self.job_id,
+                t.test_id,
+                i,
+                result,
+            )
+            store.store_zeek_result(
+                job=self,
+                test=t,
+                result=result,
+                cpu_slot=cpus,
+                variant=self.variant,
+                warmup=warmup,
+            )
+            return result
+        except ResultNotFound:
+            error = (
+                f"Missing result {proc.returncode} "
+                f"stdout={proc.stdout} stderr={proc.stderr}"
+            )
+            logger.error(error)
+            store.store_zeek_error(
+                job=self,
+                test=t,
+                test_run=i,
+                error=error,
+                cpu_slot=cpus,
+                variant=self.variant,
+                warmup=warmup,
+            )
+        except Exception as e:
+            error = f"Unhandled exception {type(e)} {e}"
+            logger.exception(error)
+            store.store_zeek_error(
+                job=self,
+                test=t,
+                test_run=i,
+                error=error,
+                cpu_slot=cpus,
+                variant=self.variant,
+                warmup=warmup,
+            )
+
+        return None
+
+    def run_startup(
+        self, run: typing.Callable[[str, Env], RunResult], t: ZeekTest, env: Env
+    ):
+        """
+        Run pcap test t on an empty pcap, with the same pcap_args, to
+        measure Zeek's startup and shutdown cost. The medians over
+        STARTUP_RUNS runs are stored in zeek_job_tests.
+        """
+        results = []
+        for i in range(1, config.get().startup_runs + 1):
+            try:
+                proc = run(
+                    "/benchmarker/scripts/run-zeek.sh", env | {"STARTUP_ONLY": "1"}
+                )
+                results.append(ZeekTestResult.parse_from(i, proc.stdout))
+            except Exception as e:
+                logger.exception(
+                    "Startup run %s:%s (%d) failed: %r", self.job_id, t.test_id, i, e
+                )
+
+        if not results:
+            return
+
+        startup = {
+            "startup_elapsed_time": statistics.median(r.elapsed_time for r in results),
+            "startup_user_time": statistics.median(r.user_time for r in results),
+            "startup_system_time": statistics.median(r.system_time for r in results),
+            "startup_max_rss": statistics.median(r.max_rss for r in results),
+        }
+        logger.info("Startup %s:%s %s", self.job_id, t.test_id, startup)
+        storage.get().store_zeek_job_test(job=self, test=t, **startup)
+
+    def should_profile(self, t: ZeekTest) -> bool:
+        return self.profile or bool(t.profile)
+
+    def run_profiled(
+        self, run: typing.Callable[[str, Env], RunResult], t: ZeekTest, env: Env
+    ):
+        """
+        Run test t once more under perf record and store the collapsed
+        stacks. The run's timings are not stored as they include the
+        profiling overhead. Failures are logged only.
+        """
+        logger.debug("Profiling %s:%s", self.job_id, t.test_id)
+        try:
+            proc = run("/benchmarker/scripts/run-zeek.sh", env | {"PERF_RECORD": "1"})
+        except Exception as e:
+            logger.exception("Profiling %s:%s failed: %r", self.job_id, t.test_id, e)
+            return
+
+        stacks = profiles.CollapsedStacks.parse_from(proc.stdout)
+        if stacks is None:
+            logger.error(
+                "Missing stacks for %s:%s stderr=%s",
+                self.job_id,
+                t.test_id,
+                proc.stderr,
+            )
+            return
+
+        logger.info("Profiled %s:%s samples=%d", self.job_id, t.test_id, stacks.samples)
+        storage.get().store_zeek_profile(
+            job=self, test=t, stacks=stacks, variant=self.variant
+        )
+
+    def run_script_profiled(
+        self, run: typing.Callable[[str, Env], RunResult], t: ZeekTest, env: Env
+    ):
+        """
+        Run test t once more with Zeek's script profiler enabled and
+        store the per function and body times and call counts. Like
+        for run_profiled(), the run's timings are not stored.
+        """
+        logger.debug("Script profiling %s:%s", self.job_id, t.test_id)
+        try:
+            proc = run(
+                "/benchmarker/scripts/run-zeek.sh", env | {"SCRIPT_PROFILE": "1"}
+            )
+        except Exception as e:
+            logger.exception(
+                "Script profiling %s:%s failed: %r", self.job_id, t.test_id, e
+            )
+            return
+
+        entries = profiles.parse_script_profile(proc.stdout)
+        if not entries:
+            logger.error(
+                "Missing script profile for %s:%s stderr=%s",
+                self.job_id,
+                t.test_id,
+                proc.stderr,
+            )
+            return
+
+        logger.info(
+            "Script profiled %s:%s entries=%d", self.job_id, t.test_id, len(entries)
+        )
+        storage.get().store_zeek_script_profile(
+            job=self, test=t, entries=entries, variant=self.variant
+        )
+
+    def mark_outliers(self, t: ZeekTest, results: list[ZeekTestResult]) -> set[int]:
+        """
+        Flag results of test t with outlying elapsed times based on
+        the median absolute deviation and return their run numbers.
+        """
+        threshold = config.get().outlier_threshold
+        if not threshold:
+            return set()
+
+        flags = stats.mad_outliers([r.elapsed_time for r in results], threshold)
+        test_runs = [r.test_run for r, flag in zip(results, flags) if flag]
+        if test_runs:
+            logger.info(
+                "Outliers %s:%s%s runs=%s",
+                self.job_id,
+                t.test_id,
+                f" ({self.variant})" if self.variant else "",
+                test_runs,
+            )
+            storage.get().mark_zeek_outliers(
+                job=self, test=t, test_runs=test_runs, variant=self.variant
+            )
+
+        return set(test_runs)
+
+    def container_kwargs(self, t: ZeekTest | None = None) -> dict[str, typing.Any]:
+        """
+        Arguments for ContainerRunner.runc() and start_warm(),
+        optionally for running test t.
+        """
         # TODO: Make configurable.
         with open("./zeek-seccomp.json", "rb") as fp:
             seccomp_profile = json.load(fp)
 
+        container_kwargs = {
+            "image": self.testing_image,
+            "seccomp_profile": seccomp_profile,
+            "install_volume": self.install_volume,
+            "install_target": "/root/project/install",
+            "test_data_volume": "test_data",
+        }
+
+        if config.get().perf_stat_events or (t and self.should_profile(t)):
+            container_kwargs["cap_add"] = ["SYS_NICE", "PERFMON"]
+
+        return container_kwargs
+
+    @contextlib.contextmanager
+    def test_runner(
+        self, t: ZeekTest
+    ) -> typing.Iterator[typing.Callable[[str, Env], RunResult]]:
+        """
+        Provide a function running a command for test t in
+        a benchmarking container.
+
+        By default, every invocation runs in a new container. With
+        CONTAINER_REUSE enabled, a single container is started for
+        the test and every invocation runs within it. The time for
+        starting and removing that container is stored separately.
+        """
+        cr = ContainerRunner.get()
+        container_kwargs = self.container_kwargs(t)
+
+        def runc(command: str, env: Env) -> RunResult:
+            return cr.runc(command=command, env=env, **container_kwargs)
+
+        if not config.get().container_reuse:
+            yield runc
+            return
+
+        start = time.monotonic()
+        try:
+            warm = cr.start_warm(**container_kwargs)
+        except Exception as e:
+            logger.exception("Failed to start container for %s: %r", t.test_id, e)
+            yield runc
+            return
+
+        setup_time = time.monotonic() - start
+
+        try:
+            yield warm.exec
+        finally:
+            start = time.monotonic()
+            warm.close()
+            teardown_time = time.monotonic() - start
+
+            logger.info(
+                "Container for %s:%s setup=%.3fs teardown=%.3fs",
+                self.job_id,
+                t.test_id,
+                setup_time,
+                teardown_time,
+            )
+            storage.get().store_zeek_job_test(
+                job=self,
+                test=t,
+                container_setup_time=setup_time,
+                container_teardown_time=teardown_time,
+            )
+
+    def _process(self):
+        cfg = config.get()
+        if cfg.prefetch_next_job:
+            prefetch.start_next()
+
+        zeek_tests = [ZeekTest.from_dict(cfg, t) for t in cfg.zeek_tests]
+        slots = [",".join(str(c) for c in slot) for slot in self.cpu_slots()]
+        if cfg.calibrate:
+            self.calibrate(slots)
+
+        if cfg.test_data_dir:
+            self.index_pcaps(zeek_tests)
+
+        if len(slots) == 1:
+            for zeek_test in zeek_tests:
+                self.run_and_summarize_zeek_test(zeek_test)
+        else:
+            self.run_zeek_tests_concurrently(zeek_tests, slots)
+
+    def run_and_summarize_zeek_test(self, t: ZeekTest, cpus: str | None = None):
+        """
+        Run test t with the results of its runs written in a single
+        batch at the end, then update its zeek_test_summaries rows.
+        """
+        store = storage.get()
+        with store.batch():
+            self.run_zeek_test(t, cpus=cpus)
+
+        if not t.skip:
+            store.update_zeek_test_summaries(job_id=self.job_id, test_id=t.test_id)
+
+    def index_pcaps(self, zeek_tests: list[ZeekTest]):
+        """
+        Index the pcaps of zeek_tests found in TEST_DATA_DIR and record
+        the sha256 of the pcap every test runs with.
+        """
+        cfg = config.get()
         store = storage.get()
-        for i in range(1, t.runs + 1):
-            logger.debug("Running %s:%s (%d)", self.job_id, t.test_id, i)
+        for t in zeek_tests:
+            if not t.pcap:
+                continue
 
             try:
-                proc = cr.runc(
-                    image=self.testing_image,
-                    command="/benchmarker/scripts/run-zeek.sh",
-                    env=env,
-                    seccomp_profile=seccomp_profile,
-                    install_volume=self.install_volume,
-                    install_target="/root/project/install",
-                    test_data_volume="test_data",
-                )
+                info = pcaps.index(store, cfg.test_data_dir, t.pcap)
+            except (OSError, ValueError) as e:
+                logger.warning("Failed to index pcap %s: %r", t.pcap, e)
+                continue
 
-                result = ZeekTestResult.parse_from(i, proc.stdout)
-                logger.info(
-                    "Completed %s:%s (%d) result=%s", self.job_id, t.test_id, i, result
-                )
-                store.store_zeek_result(
-                    job=self,
-                    test=t,
-                    result=result,
-                )
-            except ResultNotFound:
-                error = (
-                    f"Missing result {proc.returncode} "
-                    f"stdout={proc.stdout} stderr={proc.stderr}"
+            store.store_zeek_job_test(job=self, test=t, pcap_sha256=info.sha256)
+
+    def calibrate(self, slots: list[str]) -> float | None:
+        """
+        Run the calibration workload on every CPU slot.
+
+        Every slot's result is scored relative to the median of the
+        reference calibrations of the same machine and slot, a score
+        above 1.0 means the machine got slower. The first
+        CALIBRATION_HISTORY calibrations that didn't drift make up the
+        reference and it stays fixed until reset, so that gradual
+        slowdowns aren't followed. The job's score is the mean over all
+        slots. Scores deviating from 1.0 by more than
+        CALIBRATION_DRIFT_THRESHOLD flag the job.
+        """
+        cfg = config.get()
+        store = storage.get()
+        machine_id = store.get_or_create_machine(machine.get_machine()).id
+
+        cr = ContainerRunner.get()
+        container_kwargs = self.container_kwargs()
+
+        scores = []
+        for cpus in slots:
+            try:
+                proc = cr.runc(
+                    command="python3 /benchmarker/scripts/calibrate.py",
+                    env={"ZEEKCPUS": cpus},
+                    **container_kwargs,
                 )
-                logger.error(error)
-                store.store_zeek_error(job=self, test=t, test_run=i, error=error)
+                result = CalibrationResult.parse_from(proc.stdout)
             except Exception as e:
-                error = f"Unhandled exception {type(e)} {e}"
-                logger.exception(error)
-                store.store_zeek_error(job=self, test=t, test_run=i, error=error)
+                logger.exception("Calibration on CPUs %s failed: %r", cpus, e)
+                continue
 
-    def _process(self):
+            totals = store.calibration_reference(machine_id=machine_id, cpu_slot=cpus)
+            reference = statistics.median(totals) if totals else None
+            score = result.total / reference if reference else None
+            is_reference = len(totals) < cfg.calibration_history and (
+                score is None or abs(score - 1.0) <= cfg.calibration_drift_threshold
+            )
+            logger.info(
+                "Calibration %s on CPUs %s: %s score=%s",
+                self.job_id,
+                cpus,
+                result,
+                score,
+            )
+            store.store_calibration(
+                job=self,
+                machine_id=machine_id,
+                cpu_slot=cpus,
+                result=result,
+                score=score,
+                reference=is_reference,
+            )
+            if score is not None:
+                scores.append(score)
+
+        if not scores:
+            return None
+
+        score = sum(scores) / len(scores)
+        drifted = abs(score - 1.0) > cfg.calibration_drift_threshold
+        if drifted:
+            logger.warning(
+                "Machine drifted for %s: calibration score %.3f", self.job_id, score
+            )
+
+        store.store_job_calibration(job=self, score=score, drifted=drifted)
+        return score
+
+    def cpu_slots(self) -> list[list[int]]:
+        """
+        CPU slots to run tests on.
+
+        With CPU_SLOT_SIZE, slots are selected from the CPUs in CPU_SET
+        based on the machine's topology. Otherwise, the slots given by
+        CPU_SET are used and problems with their placement are logged.
+        """
         cfg = config.get()
-        for t in cfg.zeek_tests:
-            zeek_test = ZeekTest.from_dict(cfg, t)
-            self.run_zeek_test(zeek_test)
+        topology = machine.get_cpu_topology()
+        if not topology:
+            return cfg.cpu_slots
+
+        if cfg.cpu_slot_size:
+            slots = machine.select_cpu_slots(topology, cfg.cpu_set, cfg.cpu_slot_size)
+            if not slots:
+                raise Error(f"No CPU slots of size {cfg.cpu_slot_size} in CPU_SET")
+
+            logger.info("Selected CPU slots %s", slots)
+            return slots
+
+        for problem in machine.check_cpu_slots(topology, cfg.cpu_slots):
+            logger.warning("CPU_SET: %s", problem)
+
+        return cfg.cpu_slots
+
+    def run_zeek_tests_concurrently(self, zeek_tests: list[ZeekTest], slots: list[str]):
+        """
+        Run the given tests concurrently, each test using one of
+        the CPU slots exclusively while it runs.
+        """
+        free_slots: queue.SimpleQueue[str] = queue.SimpleQueue()
+        for slot in slots:
+            free_slots.put(slot)
+
+        def run(t: ZeekTest):
+            slot = free_slots.get()
+            try:
+                logger.debug("Running %s:%s on CPUs %s", self.job_id, t.test_id, slot)
+                self.run_and_summarize_zeek_test(t, cpus=slot)
+            finally:
+                free_slots.put(slot)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(slots)) as executor:
+            futures = [executor.submit(run, t) for t in zeek_tests]
+            for f in futures:
+                f.result()
 
 
 def zeek_job(req_vals):
@@ -530,6 +1606,204 @@ def zeek_job(req_vals):
     job.process()
 
 
+class ZeekBaselineJob(ZeekJob):
+    """
+    The baseline build of a ZeekABJob.
+    """
+
+    variant = "baseline"
+    shared_install_volume = "zeek_install_baseline_data"
+
+
+@dataclasses.dataclass
+class ZeekABJob(ZeekJob):
+    """
+    Interleaved A/B job comparing a candidate build, given by build_url
+    and build_hash, against a baseline build.
+
+    Both builds are extracted into separate install volumes. For every
+    test, runs of the baseline and the candidate alternate so that
+    changes of the machine over time affect both equally. Results are
+    stored with their variant, baseline runs with the baseline's commit
+    and branch. The per-test difference of the paired elapsed times goes
+    into the zeek_ab_deltas table.
+    """
+
+    baseline_build_url: str | None = None
+    baseline_build_hash: str | None = None
+    baseline_commit: str | None = None
+    baseline_branch: str | None = None
+    baseline_original_branch: str | None = None
+
+    variant = "candidate"
+
+    @functools.cached_property
+    def baseline(self) -> ZeekBaselineJob:
+        job = ZeekBaselineJob(
+            build_url=self.baseline_build_url,
+            build_hash=self.baseline_build_hash,
+            original_branch=self.baseline_original_branch,
+            normalized_branch=self.normalized_branch,
+            commit=self.baseline_commit,
+            branch=self.baseline_branch,
+            job_id=self.job_id,
+            sha256=self.baseline_build_hash,
+            job_dir=self.job_dir,
+            profile=self.profile,
+        )
+        job.build_filename = pathlib.Path(job.build_url).parts[-1]
+        job.build_path = self.job_dir / f"baseline-{job.build_filename}"
+        return job
+
+    def prepare_install(self, *, prefetching: bool = False):
+        super().prepare_install(prefetching=prefetching)
+        self.baseline.prepare_install(prefetching=prefetching)
+
+    def release_install(self):
+        super().release_install()
+        self.baseline.release_install()
+
+    def run_zeek_test(self, t, cpus: str | None = None):
+        """
+        Run t.runs pairs of baseline and candidate runs of test t,
+        alternating between the two.
+
+        Adaptive run counts aren't supported, the number of
+        pairs is always t.runs. Pairs in which either run is
+        an outlier don't contribute to the delta.
+        """
+        if t.skip:
+            logger.warning("Skipping %s", t)
+            return
+
+        cpus = cpus or config.get().zeek_cpus
+        env = self.test_env(t, cpus)
+
+        pairs: list[tuple[ZeekTestResult, ZeekTestResult]] = []
+        with (
+            self.baseline.test_runner(t) as run_baseline,
+            self.test_runner(t) as run_candidate,
+        ):
+            for i in range(1, t.warmup_runs + 1):
+                self.baseline.run_zeek_test_once(
+                    run_baseline, t, i, env, cpus, warmup=True
+                )
+                self.run_zeek_test_once(run_candidate, t, i, env, cpus, warmup=True)
+
+            for i in range(1, t.runs + 1):
+                a = self.baseline.run_zeek_test_once(run_baseline, t, i, env, cpus)
+                b = self.run_zeek_test_once(run_candidate, t, i, env, cpus)
+                if a is not None and b is not None:
+                    pairs.append((a, b))
+
+            if self.should_profile(t):
+                self.baseline.run_profiled(run_baseline, t, env)
+                self.run_profiled(run_candidate, t, env)
+
+            if t.profile_scripts:
+                self.baseline.run_script_profiled(run_baseline, t, env)
+                self.run_script_profiled(run_candidate, t, env)
+
+        # Pairs with an outlier on either side are left out of the delta.
+        baseline_outliers = self.baseline.mark_outliers(t, [a for a, _ in pairs])
+        candidate_outliers = self.mark_outliers(t, [b for _, b in pairs])
+        baseline_times = []
+        candidate_times = []
+        for a, b in pairs:
+            if a.test_run in baseline_outliers or b.test_run in candidate_outliers:
+                continue
+
+            baseline_times.append(a.elapsed_time)
+            candidate_times.append(b.elapsed_time)
+
+        store = storage.get()
+        store.store_zeek_job_test(
+            job=self, test=t, run_count=t.runs, stop_reason="fixed"
+        )
+
+        workload_changed = None
+        if pairs and all(a.log_records is not None for a, _ in pairs):
+            changed = self.workload_changes(pairs)
+            workload_changed = bool(changed)
+            if changed:
+                logger.warning(
+                    "Workload of %s:%s changed (baseline, candidate): %s",
+                    self.job_id,
+                    t.test_id,
+                    changed,
+                )
+
+        if len(baseline_times) < 2:
+            logger.warning(
+                "Not enough successful pairs for %s:%s", self.job_id, t.test_id
+            )
+            return
+
+        delta = stats.paired_delta(baseline_times, candidate_times)
+        logger.info(
+            "A/B %s:%s delta=%.6fs (%.2f%%) +/- %.6fs over %d pairs",
+            self.job_id,
+            t.test_id,
+            delta.delta,
+            delta.relative * 100,
+            delta.half_width,
+            delta.n,
+        )
+        store.store_zeek_ab_delta(
+            job=self, test=t, delta=delta, workload_changed=workload_changed
+        )
+
+    @staticmethod
+    def workload_changes(
+        pairs: list[tuple[ZeekTestResult, ZeekTestResult]],
+    ) -> dict[str, tuple[float, float]]:
+        """
+        Log streams whose median number of records differs between
+        the baseline and candidate runs, with both medians.
+        """
+        streams = set()
+        for a, b in pairs:
+            streams |= (a.log_records or {}).keys() | (b.log_records or {}).keys()
+
+        changes = {}
+        for stream in sorted(streams):
+            baseline = statistics.median(
+                (a.log_records or {}).get(stream, 0) for a, _ in pairs
+            )
+            candidate = statistics.median(
+                (b.log_records or {}).get(stream, 0) for _, b in pairs
+            )
+            if baseline != candidate:
+                changes[stream] = (baseline, candidate)
+
+        return changes
+
+
+def zeek_ab_job(req_vals):
+    """
+    Entry point for an A/B Zeek job.
+    """
+    req_vals.pop("remote", None)
+    job = ZeekABJob(job_id=get_current_job_id(), **req_vals)
+    job.sha256 = job.build_hash
+
+    cfg = config.get()
+    job.job_dir = (pathlib.Path(cfg.work_dir) / get_current_job_id()).absolute()
+
+    logger.info(
+        "Working on A/B job %s build_url=%s sha256=%s baseline_build_url=%s "
+        "baseline_sha256=%s (jobdir=%s)",
+        job.job_id,
+        job.build_url,
+        job.sha256,
+        job.baseline_build_url,
+        job.baseline_build_hash,
+        job.job_dir,
+    )
+
+    job.process()
+
+
 class BrokerJob(Job):
     """
     Broker benchmarker job.
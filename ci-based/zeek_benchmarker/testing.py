@@ -1,4 +1,3 @@
-import os
 import pathlib
 import tempfile
 import unittest
@@ -27,4 +26,5 @@ class TestWithDatabase(unittest.TestCase):
         self.storage = storage.Storage(self.database_file.name)
 
     def tearDown(self):
-        os.unlink(self.database_file.name)
+        for suffix in ["", "-wal", "-shm"]:
+            pathlib.Path(self.database_file.name + suffix).unlink(missing_ok=True)
@@ -0,0 +1,203 @@
+"""
+Pool of Docker volumes holding unpacked builds, one per sha256.
+
+The pool is tracked in a small JSON index file. A volume is only listed
+in the index once a build has been extracted into it successfully.
+Least recently used volumes are removed when the pool exceeds the
+configured count or byte budget.
+
+A job pins the volumes it uses by recording its pid with them in the
+index. Pinned volumes aren't evicted until the job releases them or its
+process is gone, so a background prefetch can't remove them.
+"""
+
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import pathlib
+import time
+import typing
+
+import docker
+import docker.errors
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+def volume_name(prefix: str, sha256: str) -> str:
+    """
+    Name of the install volume for the given build hash.
+    """
+    return f"{prefix}_{sha256}"
+
+
+class InstallVolumeCache:
+    def __init__(
+        self,
+        *,
+        client: docker.client.DockerClient,
+        index_path: pathlib.Path,
+        max_count: int,
+        max_bytes: int | None = None,
+    ):
+        self._client = client
+        self._index_path = pathlib.Path(index_path)
+        self._max_count = max_count
+        self._max_bytes = max_bytes
+
+    @contextlib.contextmanager
+    def _index(self) -> typing.Iterator[dict[str, dict[str, typing.Any]]]:
+        """
+        Load the index under an exclusive lock and write back
+        any modifications.
+        """
+        self._index_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._index_path, "a+") as fp:
+            fcntl.flock(fp, fcntl.LOCK_EX)
+            fp.seek(0)
+            data = fp.read()
+            index = json.loads(data) if data else {}
+
+            yield index
+
+            fp.seek(0)
+            fp.truncate()
+            json.dump(index, fp, indent=2, sort_keys=True)
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    def lookup(self, volume: str, pin: bool = False) -> bool:
+        """
+        Is there a committed install volume with the given name?
+
+        With pin, a found volume is pinned for the current process.
+        """
+        with self._index() as index:
+            if volume not in index:
+                return False
+
+            try:
+                self._client.volumes.get(volume)
+            except docker.errors.NotFound:
+                logger.warning("Install volume %s vanished", volume)
+                del index[volume]
+                return False
+
+            index[volume]["last_used"] = time.time()
+            if pin:
+                self._pin(index[volume])
+            return True
+
+    def commit(self, volume: str, size: int, pin: bool = False):
+        """
+        Record a successful extraction into volume and evict
+        least recently used volumes if over budget.
+
+        With pin, volume is pinned for the current process.
+        """
+        with self._index() as index:
+            index[volume] = {"size": size, "last_used": time.time()}
+            if pin:
+                self._pin(index[volume])
+            self._evict(index, keep=volume)
+
+    def release(self, volume: str):
+        """
+        Unpin volume for the current process.
+        """
+        with self._index() as index:
+            entry = index.get(volume)
+            if entry is not None and os.getpid() in entry.get("pinned_by", []):
+                entry["pinned_by"].remove(os.getpid())
+
+    def discard(self, volume: str):
+        """
+        Remove volume and its index entry.
+        """
+        with self._index() as index:
+            index.pop(volume, None)
+            self._remove_volume(volume)
+
+    def _remove_volume(self, volume: str) -> bool:
+        try:
+            self._client.volumes.get(volume).remove(force=True)
+        except docker.errors.NotFound:
+            pass
+        except docker.errors.APIError as e:
+            # Most likely still in use by a container.
+            logger.warning("Could not remove install volume %s: %s", volume, e)
+            return False
+
+        return True
+
+    def _pin(self, entry: dict[str, typing.Any]):
+        pinned_by = entry.setdefault("pinned_by", [])
+        if os.getpid() not in pinned_by:
+            pinned_by.append(os.getpid())
+
+    def _pinned(self, entry: dict[str, typing.Any]) -> bool:
+        """
+        Is entry pinned by a process that is still running?
+        """
+        for pid in entry.get("pinned_by", []):
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                continue
+            except PermissionError:
+                pass
+
+            return True
+
+        return False
+
+    def _over_budget(self, index: dict[str, dict[str, typing.Any]]) -> bool:
+        if len(index) > self._max_count:
+            return True
+
+        if self._max_bytes is not None:
+            return sum(e["size"] for e in index.values()) > self._max_bytes
+
+        return False
+
+    def _evict(self, index: dict[str, dict[str, typing.Any]], keep: str):
+        lru = sorted(index.items(), key=lambda item: item[1]["last_used"])
+        for volume, entry in lru:
+            if not self._over_budget(index):
+                break
+
+            if volume == keep:
+                continue
+
+            if self._pinned(entry):
+                logger.info("Not evicting pinned install volume %s", volume)
+                continue
+
+            logger.info("Evicting install volume %s (%d bytes)", volume, entry["size"])
+            if self._remove_volume(volume):
+                del index[volume]
+
+
+_cache: typing.Optional[InstallVolumeCache] = None
+
+
+def get() -> InstallVolumeCache | None:
+    """
+    Get the InstallVolumeCache singleton, or None if
+    INSTALL_CACHE_MAX_COUNT isn't configured.
+    """
+    global _cache
+    cfg = config.get()
+    if _cache is None and cfg.install_cache_max_count > 0:
+        _cache = InstallVolumeCache(
+            client=docker.from_env(),
+            index_path=pathlib.Path(cfg.install_cache_index),
+            max_count=cfg.install_cache_max_count,
+            max_bytes=cfg.install_cache_max_bytes,
+        )
+
+    return _cache